@@ -1,13 +1,81 @@
-import bisect
+import copy
+import hashlib
 import json
 import numpy as np
+import threading
 import time
+from collections import OrderedDict
+from typing import Callable, Iterator, NamedTuple
 from pathlib import Path
 from os import cpu_count
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+from . import OrbitalKernel
+from .EventStore import EVENT_DTYPE, MOON_DTYPE, saveEventStore
+from .EphemerisStore import EphemerisStore, FileStore
+from .OrbitalKernel import (
+    ORB_NAMES,
+    ORB_BITS,
+    MASK_ORB_NAMES,
+    PAIR_A,
+    PAIR_B,
+    PAIR_BITS,
+    PAIR_MASK_BITS,
+    OrbitalParams,
+    getWorkerPool,
+    shutdownWorkerPool,
+)
 
 DEBUG = False
 
+# moon phases in the order they occur, stored moon phase changes hold an index into this list
+MOON_PHASES = [
+    "new",
+    "waxing_crescent",
+    "first_quarter",
+    "waxing_gibbous",
+    "full",
+    "waning_gibbous",
+    "third_quarter",
+    "waning_crescent",
+]
+# layout of the confidence window of each event found by the ensemble mode (see `getEventWindows`),
+# members is the number of ensemble members that see the event within the search window
+EVENT_WINDOW_DTYPE = np.dtype(
+    [
+        ("timestamp", "<i8"),
+        ("earliest", "<i8"),
+        ("latest", "<i8"),
+        ("members", "<u2"),
+    ]
+)
+
+
+class EphemerisState(NamedTuple):
+    """The orb variables, the arrays created from them, and the scroll event cache created with
+    them. Every update creates a new state and publishes it with a single assignment (see
+    `Ephemeris.publishState`), so a state that's read once never mixes parameters, events, or
+    time ranges from different updates."""
+
+    variables: dict[str, dict]
+    periods: np.ndarray[int]
+    radii: np.ndarray[float]
+    refTimes: np.ndarray[int]
+    refOffsets: np.ndarray[int]
+    refPositions: np.ndarray[float]
+    events: np.ndarray
+    # the time range covered by the scroll event cache
+    start: int
+    stop: int
+    # alignment windows of every orb pair over the cache's time range, kept by the roots engine
+    # so new reference times only recalculate the pairs of the changed orbs
+    pairWindows: dict[int, np.ndarray[np.int64]] | None = None
+    # confidence window of every event in the cache (see `Ephemeris.getEventWindows`), only kept
+    # when they were created along with the cache or by `Ephemeris.updateEventWindows`
+    eventWindows: np.ndarray | None = None
+    # the ensemble settings eventWindows were created with
+    eventWindowsKey: tuple | None = None
+
 
 class Ephemeris:
     def __init__(
@@ -18,7 +86,17 @@ class Ephemeris:
         discordTimestamps: bool = False,
         multiProcess: bool = True,
         numCores: int | None = None,
+        eventEngine: str = "scan",
+        warmStart: bool = True,
+        variables: dict[str, dict] | None = None,
+        store: EphemerisStore | None = None,
     ) -> None:
+        # variables (in the variables.json layout) are copied so the caller's can't change under
+        # the instance. Passing variables without a store reads and writes nothing, when neither
+        # is given the variables and caches are kept in their files with a FileStore
+        if store is None:
+            store = FileStore() if variables is None else EphemerisStore()
+        self.store = store
         self.discordTimestamps = discordTimestamps
         self.multiProcess = multiProcess
         self.numCores = numCores
@@ -32,36 +110,235 @@ class Ephemeris:
                     self.numCores = 1
             else:
                 self.numCores = cpuCount
+        # both engines solve for the times each orb pair crosses its alignment threshold,
+        # "scan" reports events at the following refineIncrement step and splits work by time range
+        # while "roots" reports them to within rootPrecision ms and splits work by orb pair.
+        # Long builds (see `buildScrollEventRange`) split the time range with either engine
+        self.eventEngine = eventEngine
+        if eventEngine not in ("scan", "roots"):
+            print(f'Unknown eventEngine "{eventEngine}", defaulting to "scan"')
+            self.eventEngine = "scan"
 
         self.glowThresh = 0.5
         self.darkThresh = 1
+        # overlap with the end of the cached range when extending the scroll event cache and
+        # with the neighbouring chunks of a multi-process build
         self.increment = 60 * 1000
+        # length of the chunks the time range is split into for multi-process builds, chunks are
+        # pulled by workers as they become free and their boundaries don't depend on the core count.
+        # Each chunk costs ~20ms on top of its events so chunks much shorter than this are slower
+        self.chunkLength = 4 * 86400000
+        # checkpoints older than this many ms are removed by the next build, cancelled builds that
+        # are never resumed would otherwise leave theirs behind
+        self.checkpointLifetime = 7 * 86400000
+        # the scan engine reports events at the first refineIncrement sized step after they happen
+        self.refineIncrement = 1000
+        # max number of times evaluated by a single batched alignment calculation
+        self.batchSize = 8192
+        # alignment threshold for each orb pair, pairs with the shadow orb use the dark threshold
+        self.pairThresholds = np.where(PAIR_A == 0, self.darkThresh, self.glowThresh)
+        # smallest step taken when searching for threshold crossings, steps are otherwise as long
+        # as a pair's margin allows so any alignment window at least this long is found
+        self.minimumStep = 1000
+        # max error in ms of a threshold crossing time found by the roots engine
+        self.rootPrecision = 1
         self.oneAberothDay = 8640000
         self.noonRefTime = 1725903360554  # Night starts 42 minutes after
-        self.variablesFile = Path("ephemeris/Ephemeris/variables.json")
-        self.cacheFile = Path("ephemeris/Ephemeris/cache.json")
-        self.newRefTimeFile = Path("ephemeris/UpdateWebServer/newRefTimes.json")
-        self.v: dict[str, dict] = self.getVariables(self.variablesFile)
-        self.periods = self.getPeriods()
-        self.radii = self.getRadii()
-        self.refTimes = self.getRefTimes()
-        self.refOffsets = self.getRefOffsets()
-        self.setRefPositions()
-        self.refPositions = self.getRefPositions()
+        # times outside the scroll event cache are split into segments at every multiple of
+        # segmentLength ms since the epoch, which are only calculated once they're requested
+        self.segmentLength = self.oneAberothDay
+        # max number of bytes of segment events kept in memory, the least recently used segments
+        # are evicted first and can be reloaded from self.store
+        self.segmentMemoryBudget = 16 * 2**20
+        # max number of segments a single timeline request calculates (40 real days), longer
+        # ranges should be built with buildScrollEventRange instead
+        self.maxTimelineSegments = 400
+        # the ensemble mode shifts every measured period by up to periodTolerance ms and every
+        # reference time by up to refTimeTolerance ms to find how early or late events could be
+        self.periodTolerance = 100
+        self.refTimeTolerance = 1000
+        # number of parameter sets in the ensemble, the first is always the measured one
+        self.ensembleSize = 256
+        # furthest in ms from an event's predicted time that the crossings of ensemble members
+        # are searched for
+        self.ensembleWindow = 30 * 60 * 1000
+        # seed of the ensemble's random shifts so repeated requests report the same windows
+        self.ensembleSeed = 0
+        variables = (
+            copy.deepcopy(variables)
+            if variables is not None
+            else self.store.loadVariables()
+        )
+        if variables is None:
+            raise ValueError(
+                "No orb variables, they must be passed in or saved in the store"
+            )
+        # held while a new state is created from the current one so updates from several threads
+        # don't undo each other, readers never take it and keep using the state they loaded
+        self.updateLock = threading.RLock()
+        self.state = EphemerisState(
+            variables=variables,
+            periods=None,
+            radii=None,
+            refTimes=None,
+            refOffsets=None,
+            refPositions=None,
+            events=np.zeros(0, dtype=EVENT_DTYPE),
+            start=0,
+            stop=0,
+        )
+        self.setVariables(variables)
 
         # Boolean that indicates if orb is aligned with another orb or the shadow orb
         # Ordered as ['shadow', 'white', 'black', 'green', 'red', 'purple', 'yellow', 'cyan', 'blue']
         self.currentAlignmentStates = np.full(9, False)
         self.lastAlignmentStates = np.full(9, False)
-        self.scrollEventsCache = []
-        self.scrollEventsCache = self.multiProcessCreateScrollEventRange(start, end)
-        self.moonCyclesCache = self.createLunarCalendar(start, numMoonCycles)
-        self.saveCache(self.cacheFile)
+        # the cache array and time range the glow and dark intervals of every orb were last created
+        # from (see `getOrbIntervals`), followed by the intervals
+        self.orbIntervalsCache = None
+        # events of the recently used segments in least to most recently used order
+        self.segmentCache: OrderedDict[int, np.ndarray] = OrderedDict()
+        self.segmentCacheBytes = 0
+        # parameter fingerprint the segments in self.segmentCache were calculated with
+        self.segmentFingerprint = None
+        # held while the timeline is read so requests from several threads don't calculate
+        # the same segments or change self.segmentCache at the same time
+        self.timelineLock = threading.Lock()
+        # saved events that were created with the same parameters are reused so that
+        # only the parts of the time range they don't cover need to be calculated
+        if warmStart:
+            self.loadSavedScrollCache()
+        events, pairWindows = self.buildScrollCacheWindows(start, end)
+        self.publishState(
+            self.state._replace(
+                events=events, start=int(start), stop=int(end), pairWindows=pairWindows
+            )
+        )
+        self.moonCyclesCache = None
+        if warmStart:
+            self.moonCyclesCache = self.loadSavedMoonCache(start, numMoonCycles)
+        if self.moonCyclesCache is None:
+            self.moonCyclesCache = self.createLunarCalendar(start, numMoonCycles)
+        self.indexMoonCache()
+        # the first noon the moon cycle cache was calculated from
+        self.moonCacheStart = self.getLastNoonTime(int(start))
+        self.saveCache()
+        self.saveMoonCache()
+
+    @property
+    def v(self) -> dict[str, dict]:
+        """The orb variables of the current state, in the variables.json layout."""
+        return self.state.variables
+
+    @property
+    def periods(self) -> np.ndarray[int]:
+        """The periods of the current state, see `getPeriods`."""
+        return self.state.periods
+
+    @property
+    def radii(self) -> np.ndarray[float]:
+        """The radii of the current state, see `getRadii`."""
+        return self.state.radii
+
+    @property
+    def refTimes(self) -> np.ndarray[int]:
+        """The reference times of the current state, see `getRefTimes`."""
+        return self.state.refTimes
+
+    @property
+    def refOffsets(self) -> np.ndarray[int]:
+        """The reference offsets of the current state, see `getRefOffsets`."""
+        return self.state.refOffsets
+
+    @property
+    def refPositions(self) -> np.ndarray[float]:
+        """The reference positions of the current state, see `getRefPositions`."""
+        return self.state.refPositions
+
+    @property
+    def scrollEventsCache(self) -> np.ndarray:
+        """The scroll event cache of the current state."""
+        return self.state.events
+
+    @property
+    def scrollCacheStart(self) -> int:
+        """The epoch time in ms the current scroll event cache starts from."""
+        return self.state.start
+
+    @property
+    def scrollCacheStop(self) -> int:
+        """The epoch time in ms the current scroll event cache stops at."""
+        return self.state.stop
+
+    @property
+    def pairWindowsCache(self) -> dict[int, np.ndarray[np.int64]] | None:
+        """The alignment windows of every orb pair kept with the current scroll event cache."""
+        return self.state.pairWindows
+
+    def publishState(self, state: EphemerisState) -> None:
+        """Replaces the current state with a single assignment, so other threads see either all of
+        the old state or all of the new one. A reader that needs several parts of the state should
+        load self.state once and only use what it loaded.
+
+        Parameters
+        ------------
+        state: `EphemerisState`
+            The new state.
+        """
+        with self.updateLock:
+            self.state = state
+
+    def getSnapshot(self, state: EphemerisState | None = None) -> "Ephemeris":
+        """Creates a copy of the instance that keeps a state of its own. Updates are made to a
+        snapshot and published once they're complete, and requests that calculate events use a
+        snapshot so the parameters can't change partway through. The snapshot shares self.store
+        and the settings but starts with an empty segment cache.
+
+        Parameters
+        ------------
+        state: `EphemerisState` *(optional)*
+            The state of the snapshot. Defaults to the current state.
+
+        Returns
+        ---------
+        `Ephemeris`
+            The snapshot, publishing a state to it doesn't change this instance.
+        """
+        snapshot = copy.copy(self)
+        snapshot.state = self.state if state is None else state
+        snapshot.segmentCache = OrderedDict()
+        snapshot.segmentCacheBytes = 0
+        snapshot.segmentFingerprint = None
+        snapshot.timelineLock = threading.Lock()
+        return snapshot
+
+    def setVariables(self, variables: dict[str, dict]) -> None:
+        """Replaces the orb variables along with the arrays created from them and the reference
+        positions calculated from them (see `setRefPositions`). Everything is calculated before
+        the new state is published, the scroll event cache is kept as is.
+
+        Parameters
+        ------------
+        variables: `dict[str, dict]`
+            The new orb variables in the variables.json layout, they must not be changed afterwards.
+        """
+        with self.updateLock:
+            snapshot = self.getSnapshot(self.state._replace(variables=variables))
+            snapshot.state = snapshot.state._replace(
+                periods=snapshot.getPeriods(),
+                radii=snapshot.getRadii(),
+                refTimes=snapshot.getRefTimes(),
+                refOffsets=snapshot.getRefOffsets(),
+            )
+            snapshot.setRefPositions()
+            self.publishState(
+                snapshot.state._replace(refPositions=snapshot.getRefPositions())
+            )
 
     def createScrollEventRange(
         self, startTime: int, stopTime: int, saveToCache: bool = False
-    ) -> list[tuple[int, dict[str, any]]]:
-        """Creates a chronologically ordered `list` of `tuples` that each
+    ) -> np.ndarray:
+        """Creates a chronologically ordered array of events that each
         contain information on a unique change in scroll/alignment states
 
         Parameters
@@ -76,48 +353,25 @@ class Ephemeris:
 
         Returns
         ---------
-        `list[tuple[int, dict[str, any]]]`
-            A chronologically ordered `list` of `tuples` that contain a timestamp and a dictionary containing
-            information about the changed phases and a discord timestamp for the event.
+        `np.ndarray`
+            A chronologically ordered structured array of events with the EventStore.EVENT_DTYPE layout,
+            each holding a timestamp and bitmasks of the orbs whose states changed.
         """
         if startTime == stopTime or startTime > stopTime:
             print("stopTime must be greater than startTime")
-            return []
+            return np.zeros(0, dtype=EVENT_DTYPE)
 
-        currentTime = startTime
-        tempCache = []
-        # create event for the starting alignments
-        self.lastAlignmentStates = np.full(9, False)
-        self.currentAlignmentStates = self.setAlignmentStates(currentTime)
-        # tempCache.append(self.createAlignmentEvent(currentTime))
-
-        # colon is IMPORTANT, creates shallow copy of list instead of copy by ref
-        self.lastAlignmentStates = self.currentAlignmentStates[:]
-        # iterate through time range and find events
-        while currentTime < stopTime:
-            self.currentAlignmentStates = self.setAlignmentStates(currentTime)
-            if self.checkForAlignmentChange():
-                currentTime -= self.increment
-                # if an alignment is found go back a step and step through with small step size to find more accurate start
-                while currentTime <= (currentTime + self.increment):
-                    self.currentAlignmentStates = self.setAlignmentStates(currentTime)
-                    if self.checkForAlignmentChange():
-                        tempCache.append(self.createAlignmentEvent(currentTime))
-                        # colon is IMPORTANT, creates shallow copy of list instead of copy by ref
-                        self.lastAlignmentStates = self.currentAlignmentStates[:]
-                        break
-                    currentTime += 1000
-            currentTime += self.increment
+        tempCache = self.processScrollTimeRange(int(startTime), int(stopTime))
         if saveToCache:
-            self.scrollEventsCache = tempCache
-            self.saveCache(self.cacheFile)
+            self.swapScrollCache(tempCache, startTime, stopTime)
         return tempCache
 
     def multiProcessCreateScrollEventRange(
         self, startTime: int, stopTime: int, saveToCache: bool = False
-    ) -> list[tuple[int, dict[str, any]]]:
+    ) -> np.ndarray:
         """Splits the time range into chunks and utilizes multi-processing in order to make a chronologically
-        ordered `list` of `tuples` that each contain information on a unique change in scroll/alignment states
+        ordered array of events that each contain information on a unique change in scroll/alignment states.
+        The roots engine splits the orb pairs between processes instead of the time range.
 
         Parameters
         ------------
@@ -131,9 +385,9 @@ class Ephemeris:
 
         Returns
         ---------
-        `list[tuple[int, dict[str, any]]]`
-            A chronologically ordered `list` of `tuples` that contain a timestamp and a dictionary containing
-            information about the changed phases and a discord timestamp for the event.
+        `np.ndarray`
+            A chronologically ordered structured array of events with the EventStore.EVENT_DTYPE layout,
+            each holding a timestamp and bitmasks of the orbs whose states changed.
         """
         if not self.multiProcess or self.numCores == 1:
             # use normal process when only one core is available
@@ -141,36 +395,27 @@ class Ephemeris:
         if startTime == stopTime or startTime > stopTime:
             # if the time range is not valid return
             print("stopTime must be greater than startTime")
-            return []
+            return np.zeros(0, dtype=EVENT_DTYPE)
         # convert float to int
         startTime = int(startTime)
         stopTime = int(stopTime)
 
-        # divide the time range into ~equal chunks for each core
-        chunkSize = (stopTime - startTime) // self.numCores
-        chunks = []
-        chunkNum = 0
-        for chunkStart in range(startTime, stopTime, chunkSize):
-            # package chunk information to be passed as an argument
-            chunks.append(
-                (
-                    chunkStart,
-                    (
-                        chunkEnd
-                        if (chunkEnd := chunkStart + chunkSize) <= stopTime
-                        else stopTime
-                    ),
-                    chunkNum,
-                )
-            )
-            chunkNum += 1
-
         retries = 0
         max_retries = 3
         while retries < max_retries:
             # try creating event cache with multi-processing
             try:
-                tempCache = self.createProcessPool(chunks)
+                if self.eventEngine == "roots":
+                    # orb pairs are independent so the roots engine splits the pairs between
+                    # processes rather than the time range
+                    tempCache = self.mergePairWindows(
+                        self.createPairProcessPool(startTime, stopTime),
+                        startTime,
+                        stopTime,
+                    )
+                else:
+                    # completed chunks are checkpointed so a retry only calculates the rest
+                    tempCache = self.buildScrollEventRange(startTime, stopTime)
                 print("Cache Created!")
                 break
             except Exception as e:
@@ -187,58 +432,390 @@ class Ephemeris:
                     print(f"Retrying... ({retries}/{max_retries})")
 
         if saveToCache:
-            self.scrollEventsCache = tempCache
-            self.saveCache(self.cacheFile)
+            self.swapScrollCache(tempCache, startTime, stopTime)
         return tempCache
 
+    def buildScrollEventRange(
+        self,
+        startTime: int,
+        stopTime: int,
+        progressCallback: Callable[[int, int], None] | None = None,
+        cancelEvent: threading.Event | None = None,
+    ) -> np.ndarray | None:
+        """Creates a chronologically ordered array of events that each contain information on a unique
+        change in scroll/alignment states by scanning the time range in chunks (see `getScrollChunks`).
+        Every completed chunk is saved as a checkpoint to self.store, so a build of the same range
+        that was cancelled or interrupted, or of a later range that contains the same chunks, resumes
+        from the chunks it already completed. The checkpoints are removed once the whole range is
+        built, and stale checkpoints of other builds are removed before it starts (see
+        `removeStaleCheckpoints`). Uses the shared worker pool when multi-processing is enabled, otherwise the chunks are
+        calculated one after another. The roots engine solves each chunk for the alignment windows
+        of every orb pair (see `OrbitalKernel.solveScrollChunk`) instead of scanning it.
+
+        Parameters
+        ------------
+        startTime: `int`
+            The epoch time in ms that alignment calculations will start from.
+        stopTime: `int`
+            The epoch time in ms that alignment calculations will stop at.
+        progressCallback: `Callable[[int, int], None]` *(optional)*
+            Called with the number of completed chunks and the total number of chunks once the
+            checkpoints are loaded and after every chunk completes. Defaults to None.
+        cancelEvent: `threading.Event` *(optional)*
+            The build stops after the next chunk completes once the event is set, any object with
+            an is_set method can be used. Defaults to None.
+
+        Returns
+        ---------
+        `np.ndarray | None`
+            A chronologically ordered structured array of events with the EventStore.EVENT_DTYPE layout,
+            each holding a timestamp and bitmasks of the orbs whose states changed. None if the build
+            was cancelled.
+        """
+        startTime = int(startTime)
+        stopTime = int(stopTime)
+        if startTime >= stopTime:
+            print("stopTime must be greater than startTime")
+            return np.zeros(0, dtype=EVENT_DTYPE)
+        self.removeStaleCheckpoints()
+        chunks = self.getScrollChunks(startTime, stopTime)
+        chunkEvents = [
+            self.loadScrollCheckpoint(chunk, startTime, stopTime) for chunk in chunks
+        ]
+        remainingChunks = [
+            chunk for chunk, events in zip(chunks, chunkEvents) if events is None
+        ]
+        numCompleted = len(chunks) - len(remainingChunks)
+        if progressCallback is not None:
+            progressCallback(numCompleted, len(chunks))
+        if cancelEvent is not None and cancelEvent.is_set():
+            return None
+        if self.multiProcess and self.numCores > 1:
+            completedChunks = self.createProcessPool(
+                remainingChunks, startTime, stopTime
+            )
+        else:
+            params = self.getOrbitalParams()
+            chunkFunction = self.getChunkFunction()
+            completedChunks = (
+                (
+                    chunkNum,
+                    chunkFunction(
+                        params,
+                        chunkStart,
+                        chunkEnd,
+                        self.increment,
+                        startTime,
+                        stopTime,
+                    ),
+                )
+                for chunkStart, chunkEnd, chunkNum in remainingChunks
+            )
+        for chunkNum, events in completedChunks:
+            chunkEvents[chunkNum] = events
+            self.saveScrollCheckpoint(chunks[chunkNum], startTime, stopTime, events)
+            numCompleted += 1
+            if progressCallback is not None:
+                progressCallback(numCompleted, len(chunks))
+            if cancelEvent is not None and cancelEvent.is_set():
+                # stop queued chunks from starting, the completed ones are kept for the next build
+                completedChunks.close()
+                print(
+                    f"Build cancelled with {numCompleted} of {len(chunks)} chunks checkpointed"
+                )
+                return None
+        for chunk in chunks:
+            self.store.removeEvents(self.getCheckpointName(chunk))
+        return OrbitalKernel.stitchEventChunks(chunkEvents)
+
+    def getChunkFunction(self) -> Callable[..., np.ndarray]:
+        """Gets the OrbitalKernel function that finds the events of a single chunk for the event
+        engine in use.
+
+        Returns
+        ---------
+        `Callable[..., np.ndarray]`
+            `OrbitalKernel.solveScrollChunk` for the roots engine, otherwise
+            `OrbitalKernel.scanScrollChunk`.
+        """
+        if self.eventEngine == "roots":
+            return OrbitalKernel.solveScrollChunk
+        return OrbitalKernel.scanScrollChunk
+
+    def getScrollChunks(
+        self, startTime: int, stopTime: int
+    ) -> list[tuple[int, int, int]]:
+        """Divides a time range into chunks at every multiple of self.chunkLength ms (rounded to a
+        multiple of refineIncrement) since the epoch, so chunks inside the range are the same for
+        every range that contains them and their checkpoints can be reused.
+
+        Parameters
+        ------------
+        startTime: `int`
+            The epoch time in ms that the time range starts at.
+        stopTime: `int`
+            The epoch time in ms that the time range stops at.
+
+        Returns
+        ---------
+        `list[tuple[int, int, int]]`
+            A tuple for each chunk containing its start and stop time as an epoch timestamp in ms
+            and its index in the list.
+        """
+        chunkSize = (
+            max(self.chunkLength // self.refineIncrement, 1) * self.refineIncrement
+        )
+        boundaries = [startTime] + list(
+            range(startTime - startTime % chunkSize + chunkSize, stopTime, chunkSize)
+        )
+        return [
+            (chunkStart, chunkEnd, chunkNum)
+            for chunkNum, (chunkStart, chunkEnd) in enumerate(
+                zip(boundaries, boundaries[1:] + [stopTime])
+            )
+        ]
+
+    def getCheckpointName(self, chunk: tuple[int, int, int]) -> str:
+        """Gets the name the checkpoint of a chunk is saved under, chunks with the same times share a
+        checkpoint whichever time range they're part of.
+
+        Parameters
+        ------------
+        chunk: `tuple[int, int, int]`
+            The chunk as created by `getScrollChunks`.
+
+        Returns
+        ---------
+        `str`
+            The name of the chunk's checkpoint in self.store.
+        """
+        return f"checkpoints/scroll-{chunk[0]}-{chunk[1]}"
+
+    def getCheckpointHeader(
+        self, chunk: tuple[int, int, int], startTime: int, stopTime: int
+    ) -> dict[str, any]:
+        """Creates the header that identifies the checkpoint of a chunk, a checkpoint is only
+        loaded when its header matches the current one.
+
+        Parameters
+        ------------
+        chunk: `tuple[int, int, int]`
+            The chunk as created by `getScrollChunks`.
+        startTime: `int`
+            The epoch time in ms that the time range starts at.
+        stopTime: `int`
+            The epoch time in ms that the time range stops at.
+
+        Returns
+        ---------
+        `dict[str, any]`
+            The parameters and times the chunk's events depend on.
+        """
+        return {
+            "fingerprint": self.getParameterFingerprint(),
+            "eventEngine": self.eventEngine,
+            "refineIncrement": self.refineIncrement,
+            "minimumStep": self.minimumStep,
+            "rootPrecision": self.rootPrecision,
+            "start": chunk[0],
+            "stop": chunk[1],
+            # the time range scanned for the chunk's events
+            "scanStart": max(chunk[0] - self.increment, startTime),
+            "scanStop": min(chunk[1] + self.increment, stopTime),
+        }
+
+    def saveScrollCheckpoint(
+        self,
+        chunk: tuple[int, int, int],
+        startTime: int,
+        stopTime: int,
+        events: np.ndarray,
+    ) -> None:
+        """Saves the events of a completed chunk as its checkpoint.
+
+        Parameters
+        ------------
+        chunk: `tuple[int, int, int]`
+            The chunk as created by `getScrollChunks`.
+        startTime: `int`
+            The epoch time in ms that the time range starts at.
+        stopTime: `int`
+            The epoch time in ms that the time range stops at.
+        events: `np.ndarray`
+            The chunk's events with the EventStore.EVENT_DTYPE layout.
+        """
+        self.store.saveEvents(
+            self.getCheckpointName(chunk),
+            events,
+            {
+                **self.getCheckpointHeader(chunk, startTime, stopTime),
+                "created": int(time.time() * 1000),
+            },
+        )
+
+    def removeStaleCheckpoints(self) -> None:
+        """Removes the checkpoints in self.store that can't be loaded with the current parameters or
+        are older than self.checkpointLifetime ms, e.g. the ones left by builds that were cancelled
+        and never resumed.
+        """
+        expectedHeader = self.getCheckpointHeader((0, 0, 0), 0, 0)
+        # the times depend on the range being built, only the parameters make a checkpoint stale
+        parameterKeys = (
+            "fingerprint",
+            "eventEngine",
+            "refineIncrement",
+            "minimumStep",
+            "rootPrecision",
+        )
+        oldestCreated = int(time.time() * 1000) - self.checkpointLifetime
+        for name in self.store.listEvents("checkpoints/"):
+            checkpoint = self.store.loadEvents(name)
+            if checkpoint is None:
+                continue
+            header = checkpoint[0]
+            if header.get("created", 0) < oldestCreated or any(
+                header.get(key) != expectedHeader[key] for key in parameterKeys
+            ):
+                self.store.removeEvents(name)
+
+    def loadScrollCheckpoint(
+        self, chunk: tuple[int, int, int], startTime: int, stopTime: int
+    ) -> np.ndarray | None:
+        """Loads the events of a chunk that were checkpointed by an earlier build.
+
+        Parameters
+        ------------
+        chunk: `tuple[int, int, int]`
+            The chunk as created by `getScrollChunks`.
+        startTime: `int`
+            The epoch time in ms that the time range starts at.
+        stopTime: `int`
+            The epoch time in ms that the time range stops at.
+
+        Returns
+        ---------
+        `np.ndarray | None`
+            The chunk's events with the EventStore.EVENT_DTYPE layout, None if the chunk has no
+            checkpoint or it was created with different parameters or scan range.
+        """
+        checkpoint = self.store.loadEvents(self.getCheckpointName(chunk))
+        if checkpoint is None:
+            return None
+        header, events = checkpoint
+        expectedHeader = self.getCheckpointHeader(chunk, startTime, stopTime)
+        if (
+            any(header.get(key) != value for key, value in expectedHeader.items())
+            or events.dtype != EVENT_DTYPE
+        ):
+            return None
+        return np.array(events)
+
     def createProcessPool(
-        self, chunks: tuple[int, int, int]
-    ) -> list[tuple[int, dict[str, any]]]:
-        """Creates a process pool and assigns the time chunks evenly to each process. Each process process makes
-        its own chronologically ordered `list` of `tuples` that each contain information on a unique change in scroll/alignment states.
-        before they're recombined into a bigger cache that spans the whole time range.
+        self, chunks: list[tuple[int, int, int]], startTime: int, stopTime: int
+    ) -> Iterator[tuple[int, np.ndarray]]:
+        """Queues the time chunks on the shared worker pool, each process takes the next chunk as soon as
+        it finishes its last one. Each chunk makes its own chronologically ordered array of events that each
+        contain information on a unique change in scroll/alignment states, calculating self.increment ms past
+        both of its ends (see `getChunkFunction`), which can be stitched into a bigger cache with
+        `OrbitalKernel.stitchEventChunks`.
+        Only the orbital parameters and chunk times are sent to the workers.
 
         Parameters
         ------------
-        chunks: `tuple[int, int, int]`
+        chunks: `list[tuple[int, int, int]]`
             A tuple containing the start and stop time of each chunk as an epoch timestamp in ms as well as
             an integer that indicates where in the final cache the results should be inserted.
+        startTime: `int`
+            The epoch time in ms that the full time range starts at.
+        stopTime: `int`
+            The epoch time in ms that the full time range stops at.
 
         Returns
         ---------
-        `list[tuple[int, dict[str, any]]]`
-            A chronologically ordered `list` of `tuples` that contain a timestamp and a dictionary containing
-            information about the changed phases and a discord timestamp for the event.
+        `Iterator[tuple[int, np.ndarray]]`
+            The index of each chunk and its events in the order the chunks complete. Chunks that haven't
+            started yet are cancelled when the iterator is closed early.
         """
-        with ProcessPoolExecutor(max_workers=self.numCores) as executor:
-            futures = {
-                executor.submit(
-                    self.processScrollTimeRange, chunkStart, chunkEnd, chunkNum
-                ): chunkNum
-                for chunkStart, chunkEnd, chunkNum in chunks
-            }
-            # Note: this section sorts data similar to a priority queue but allows inserting the
-            # whole chunk at once rather than the elements individually
-            tempCache = [None] * len(chunks)
+        params = self.getOrbitalParams()
+        chunkFunction = self.getChunkFunction()
+        executor = getWorkerPool(self.numCores)
+        futures = {}
+        try:
+            for chunkStart, chunkEnd, chunkNum in chunks:
+                future = executor.submit(
+                    chunkFunction,
+                    params,
+                    chunkStart,
+                    chunkEnd,
+                    self.increment,
+                    startTime,
+                    stopTime,
+                )
+                futures[future] = chunkNum
             for future in as_completed(futures):
                 chunkNum = futures[future]
                 try:
                     chunkCache = future.result()
-                    tempCache[chunkNum] = chunkCache
                 except Exception as e:
                     print(f"Exception in chunk {chunkNum}: {e}")
                     # re-raise to propagate the exception
                     raise
-            # reverse traverse
-            for i in range(len(chunks) - 1, -1, -1):
-                # unpack the lists of events stored in each index in tempCache
-                tempCache[i : i + 1] = tempCache[i]
-        return tempCache
+                yield chunkNum, chunkCache
+        except BrokenProcessPool:
+            # a worker dying breaks the pool, the next build starts a new one
+            shutdownWorkerPool(executor)
+            raise
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def createPairProcessPool(
+        self, startTime: int, stopTime: int, pairs: list[int] | None = None
+    ) -> dict[int, np.ndarray[np.int64]]:
+        """Assigns the orb pairs evenly to the processes of the shared worker pool. Each process finds
+        the alignment windows of its pairs over the whole time range.
 
-    def processScrollTimeRange(
-        self, startTime, stopTime, chunkNum=None
-    ) -> list[tuple[int, dict[str, any]]]:
-        """Creates a chronologically ordered `list` of `tuples` that each contain information on a unique change in scroll/alignment states.
+        Parameters
+        ------------
+        startTime: `int`
+            The epoch time in ms that the window search will start from.
+        stopTime: `int`
+            The epoch time in ms that the window search will stop at.
+        pairs: `list[int]` *(optional)*
+            The indices (into PAIR_A and PAIR_B) of the pairs to find windows for. Defaults to all pairs.
+
+        Returns
+        ---------
+        `dict[int, np.ndarray[np.int64]]`
+            The alignment windows of the orb pairs as created by `createPairWindows`.
+        """
+        if pairs is None:
+            pairs = np.arange(len(PAIR_A))
+        params = self.getOrbitalParams()
+        executor = getWorkerPool(self.numCores)
+        pairWindows = {}
+        try:
+            futures = [
+                executor.submit(
+                    OrbitalKernel.createPairWindows,
+                    params,
+                    startTime,
+                    stopTime,
+                    pairGroup,
+                )
+                for pairGroup in np.array_split(np.asarray(pairs), self.numCores)
+                if len(pairGroup) > 0
+            ]
+            for future in as_completed(futures):
+                pairWindows.update(future.result())
+        except BrokenProcessPool:
+            # a worker dying breaks the pool, the next build starts a new one
+            shutdownWorkerPool(executor)
+            raise
+        return pairWindows
+
+    def processScrollTimeRange(self, startTime, stopTime, chunkNum=None) -> np.ndarray:
+        """Creates a chronologically ordered array of events that each contain information on a unique change in scroll/alignment states.
         Multi-processing friendly
 
         Parameters
@@ -252,52 +829,170 @@ class Ephemeris:
 
         Returns
         ---------
-        `list[tuple[int, dict[str, any]]]`
-            A chronologically ordered `list` of `tuples` that contain a timestamp and a dictionary containing
-            information about the changed phases and a discord timestamp for the event.
+        `np.ndarray`
+            A chronologically ordered structured array of events with the EventStore.EVENT_DTYPE layout,
+            each holding a timestamp and bitmasks of the orbs whose states changed.
         """
+        if self.eventEngine == "roots":
+            return self.solveScrollTimeRange(startTime, stopTime, chunkNum)
         try:
-            currentTime = startTime
-            tempCache = []
-            # Set starting state
-            lastAlignmentStates = np.full(9, False)
-            currentAlignmentStates = self.setAlignmentStates(currentTime)
-
-            # colon is IMPORTANT, creates shallow copy of list instead of copy by ref
-            lastAlignmentStates = currentAlignmentStates[:]
-            # iterate through time range and find events
-            while currentTime < stopTime:
-                currentAlignmentStates = self.setAlignmentStates(currentTime)
-                if self.checkForAlignmentChange(
-                    lastAlignmentStates, currentAlignmentStates
-                ):
-                    currentTime -= self.increment
-                    # if an alignment is found go back a step and step through with small step size to find more accurate start
-                    while currentTime <= (currentTime + self.increment):
-                        currentAlignmentStates = self.setAlignmentStates(currentTime)
-                        if self.checkForAlignmentChange(
-                            lastAlignmentStates, currentAlignmentStates
-                        ):
-                            tempCache.append(
-                                self.createAlignmentEvent(
-                                    currentTime,
-                                    lastAlignmentStates,
-                                    currentAlignmentStates,
-                                )
-                            )
-                            # colon is IMPORTANT, creates shallow copy of list instead of copy by ref
-                            lastAlignmentStates = currentAlignmentStates[:]
-                            break
-                        currentTime += 1000
-                currentTime += self.increment
+            tempCache = OrbitalKernel.scanScrollTimeRange(
+                self.getOrbitalParams(), startTime, stopTime
+            )
+        except Exception as e:
+            print(f"Exception in worker process for chunk {chunkNum}: {e}")
+            raise  # re-raise to propagate the exception
+        return tempCache
+
+    def solveScrollTimeRange(
+        self, startTime: int, stopTime: int, chunkNum: int | None = None
+    ) -> np.ndarray:
+        """Creates a chronologically ordered array of events that each contain information on a
+        unique change in scroll/alignment states by solving for the times each orb pair crosses
+        its alignment threshold rather than stepping through the time range.
+        Multi-processing friendly
+
+        Parameters
+        ------------
+        startTime: `int`
+            An epoch timestamp in ms that represents the time at which calculations will start at.
+        stopTime: `int`
+            An epoch timestamp in ms that represents the time at which calculations will stop at.
+        chunkNum: `int`
+            An integer that indicates where in the final cache the results should be inserted.
+
+        Returns
+        ---------
+        `np.ndarray`
+            A chronologically ordered structured array of events with the EventStore.EVENT_DTYPE layout,
+            each holding a timestamp and bitmasks of the orbs whose states changed.
+        """
+        try:
+            tempCache = self.mergePairWindows(
+                self.createPairWindows(startTime, stopTime), startTime, stopTime
+            )
         except Exception as e:
             print(f"Exception in worker process for chunk {chunkNum}: {e}")
             raise  # re-raise to propagate the exception
         return tempCache
 
+    def createPairWindows(
+        self, startTime: int, stopTime: int, pairs: list[int] | None = None
+    ) -> dict[int, np.ndarray[np.int64]]:
+        """Finds the windows of time each orb pair spends aligned. Every pair is independent of
+        the others, so any subset of pairs can be calculated separately (e.g. in another process)
+        and merged afterwards with `mergePairWindows`.
+
+        Parameters
+        ------------
+        startTime: `int`
+            The epoch time in ms that the window search will start from.
+        stopTime: `int`
+            The epoch time in ms that the window search will stop at.
+        pairs: `list[int]` *(optional)*
+            The indices (into PAIR_A and PAIR_B) of the pairs to find windows for. Defaults to all pairs.
+
+        Returns
+        ---------
+        `dict[int, np.ndarray[np.int64]]`
+            A `dict` with pair indices for keys and (W, 2) arrays of chronologically ordered
+            [start, end) epoch times in ms for values. Windows are clipped to the time range, a window
+            that starts at startTime was already aligned and one that ends at stopTime is still aligned.
+        """
+        return OrbitalKernel.createPairWindows(
+            self.getOrbitalParams(), startTime, stopTime, pairs
+        )
+
+    def createPairWindowRange(
+        self, startTime: int, stopTime: int, pairs: list[int] | None = None
+    ) -> dict[int, np.ndarray[np.int64]]:
+        """Finds the alignment windows of the orb pairs, splitting the pairs between the processes
+        of the shared worker pool when multi-processing is enabled.
+
+        Parameters
+        ------------
+        startTime: `int`
+            The epoch time in ms that the window search will start from.
+        stopTime: `int`
+            The epoch time in ms that the window search will stop at.
+        pairs: `list[int]` *(optional)*
+            The indices (into PAIR_A and PAIR_B) of the pairs to find windows for. Defaults to all pairs.
+
+        Returns
+        ---------
+        `dict[int, np.ndarray[np.int64]]`
+            The alignment windows of the orb pairs as created by `createPairWindows`.
+        """
+        if self.multiProcess and self.numCores > 1:
+            try:
+                return self.createPairProcessPool(startTime, stopTime, pairs)
+            except Exception as e:
+                print(
+                    f"Error during processing: {e}\nSwapping to single core processing mode."
+                )
+        return self.createPairWindows(startTime, stopTime, pairs)
+
+    def mergePairWindows(
+        self,
+        pairWindows: dict[int, np.ndarray[np.int64]],
+        startTime: int,
+        stopTime: int,
+    ) -> np.ndarray:
+        """Merges the alignment windows of every orb pair into scroll events with a sweep line.
+        Each window start and end is a point where an orb's count of aligned pairs changes,
+        an orb is aligned whenever its count is above zero.
+
+        Parameters
+        ------------
+        pairWindows: `dict[int, np.ndarray[np.int64]]`
+            The alignment windows of every orb pair as created by `createPairWindows`.
+        startTime: `int`
+            The epoch time in ms that the windows start from.
+        stopTime: `int`
+            The epoch time in ms that the windows stop at.
+
+        Returns
+        ---------
+        `np.ndarray`
+            A chronologically ordered structured array of events with the EventStore.EVENT_DTYPE layout,
+            each holding a timestamp and bitmasks of the orbs whose states changed.
+        """
+        return OrbitalKernel.mergePairWindows(pairWindows, startTime, stopTime)
+
+    def findThresholdCrossings(
+        self, startTime: int, stopTime: int, pairs: np.ndarray[int] | None = None
+    ) -> tuple[np.ndarray[np.int64], np.ndarray[int]]:
+        """Finds the times at which each orb pair moves into or out of alignment. Each pair steps
+        through the time range as fast as its margin allows (never less than self.minimumStep ms)
+        and crossings are then solved by bisection to within self.rootPrecision ms.
+
+        Parameters
+        ------------
+        startTime: `int`
+            The epoch time in ms that the crossing search will start from.
+        stopTime: `int`
+            The epoch time in ms that the crossing search will stop at.
+        pairs: `np.ndarray[int]` *(optional)*
+            The indices (into PAIR_A and PAIR_B) of the pairs to search. Defaults to all pairs.
+
+        Returns
+        ---------
+        `tuple[np.ndarray[np.int64], np.ndarray[int]]`
+            The chronologically ordered epoch times in ms of the first ms at which each pair is in
+            its new state and the index of the pair (into PAIR_A and PAIR_B) that crossed at that time.
+            Only crossings after startTime and before stopTime are included.
+        """
+        return OrbitalKernel.findThresholdCrossings(
+            self.getOrbitalParams(), startTime, stopTime, pairs
+        )
+
     def getScrollEventsInRange(
-        self, startTime: int, endTime: int
-    ) -> list[tuple[int, dict[str, any]]]:
+        self,
+        startTime: int,
+        endTime: int,
+        orbs: list[str] | None = None,
+        confidenceWindows: bool = False,
+    ) -> list[dict[str, any]]:
         """Subsections self.scrollEventsCache in O(2log(n)) time to only include all
         predicted events between the start and stop time. Does not change order of events.
 
@@ -307,16 +1002,724 @@ class Ephemeris:
             The epoch time in ms that alignment calculations will start from.
         stopTime: `int`
             The epoch time in ms that alignment calculations will stop at.
+        orbs: `list[str]` *(optional)*
+            When given, only events that change the state of at least one of these orbs are included.
+        confidenceWindows: `bool` *(optional)*
+            When set to true the earliest and latest epoch times in ms each event could plausibly
+            happen at are added to its information (see `getEventWindows`). Defaults to False.
+
+        Returns
+        ---------
+        `list[dict[str, any]]`
+            A chronologically ordered `list` of `dicts` that contains the predicted events' information.
+        """
+        state = self.state
+        events = self.getScrollEventRecordsInRange(startTime, endTime, state)
+        windows = None
+        if confidenceWindows:
+            windows = self.getEventWindowsInRange(startTime, endTime, events, state)
+        if orbs:
+            orbMask = self.getOrbMask(orbs)
+            matching = (
+                events["glows"] | events["darks"] | events["normals"]
+            ) & orbMask != 0
+            events = events[matching]
+            windows = None if windows is None else windows[matching]
+        eventInfos = [self.createEventInfo(event) for event in events]
+        if windows is not None:
+            for eventInfo, window in zip(eventInfos, windows):
+                eventInfo["earliest"] = int(window["earliest"])
+                eventInfo["latest"] = int(window["latest"])
+        return eventInfos
+
+    def getScrollEventRecordsInRange(
+        self, startTime: int, endTime: int, state: EphemerisState | None = None
+    ) -> np.ndarray:
+        """Subsections self.scrollEventsCache in O(2log(n)) time to only include the
+        events between the start and stop time, without converting them to `dicts`.
+        Time ranges the cache doesn't cover are taken from the segmented timeline instead
+        (see `getTimelineEvents`).
+
+        Parameters
+        ------------
+        startTime: `int`
+            The earliest epoch time in ms an event can happen at.
+        stopTime: `int`
+            The latest epoch time in ms an event can happen at.
+        state: `EphemerisState` *(optional)*
+            The state to use. Defaults to the current state.
+
+        Returns
+        ---------
+        `np.ndarray`
+            The events with the EventStore.EVENT_DTYPE layout, a view of the state's scroll event
+            cache when the cache covers the time range.
+        """
+        state = self.state if state is None else state
+        if startTime < state.start or endTime >= state.stop:
+            return self.getTimelineEvents(startTime, endTime, state)
+        timestamps = state.events["timestamp"]
+        startIndex = np.searchsorted(timestamps, startTime, side="left")
+        stopIndex = np.searchsorted(timestamps, endTime, side="right")
+        return state.events[startIndex:stopIndex]
+
+    def getEventWindowsInRange(
+        self,
+        startTime: int,
+        endTime: int,
+        events: np.ndarray,
+        state: EphemerisState | None = None,
+    ) -> np.ndarray:
+        """Gets the confidence windows of the events between the start and stop time, taken from
+        the windows kept with the scroll event cache when it has them and calculated otherwise.
+
+        Parameters
+        ------------
+        startTime: `int`
+            The earliest epoch time in ms an event can happen at.
+        endTime: `int`
+            The latest epoch time in ms an event can happen at.
+        events: `np.ndarray`
+            The events in the time range as returned by `getScrollEventRecordsInRange`.
+        state: `EphemerisState` *(optional)*
+            The state to use. Defaults to the current state.
+
+        Returns
+        ---------
+        `np.ndarray`
+            The confidence window of each event with the EVENT_WINDOW_DTYPE layout.
+        """
+        state = self.state if state is None else state
+        cachedWindows = self.getCachedEventWindows(state)
+        if cachedWindows is None or startTime < state.start or endTime >= state.stop:
+            return self.getEventWindows(events, state)
+        timestamps = state.events["timestamp"]
+        startIndex = np.searchsorted(timestamps, startTime, side="left")
+        stopIndex = np.searchsorted(timestamps, endTime, side="right")
+        return cachedWindows[startIndex:stopIndex]
+
+    def getCachedEventWindows(
+        self, state: EphemerisState | None = None
+    ) -> np.ndarray | None:
+        """Gets the confidence windows kept with the scroll event cache.
+
+        Parameters
+        ------------
+        state: `EphemerisState` *(optional)*
+            The state to use. Defaults to the current state.
+
+        Returns
+        ---------
+        `np.ndarray | None`
+            The confidence window of every event in the state's scroll event cache with the
+            EVENT_WINDOW_DTYPE layout, None if they weren't created for the current ensemble settings.
+        """
+        state = self.state if state is None else state
+        if state.eventWindowsKey != self.getEventWindowsKey():
+            return None
+        return state.eventWindows
+
+    def getEventWindowsKey(self) -> tuple:
+        """Creates the key that confidence windows are kept with, windows are always kept in the
+        same state as the events they belong to so only the ensemble settings are needed.
+
+        Returns
+        ---------
+        `tuple`
+            The ensemble settings the windows are created with.
+        """
+        return (
+            self.periodTolerance,
+            self.refTimeTolerance,
+            self.ensembleSize,
+            self.ensembleWindow,
+            self.ensembleSeed,
+        )
+
+    def updateEventWindows(self) -> None:
+        """Creates the confidence windows of every event in the scroll event cache and keeps them
+        with it, so later requests for confidence windows within the cache don't calculate any.
+        """
+        with self.updateLock:
+            state = self.state
+            self.publishState(
+                state._replace(
+                    eventWindows=self.getEventWindows(state.events, state),
+                    eventWindowsKey=self.getEventWindowsKey(),
+                )
+            )
+
+    def getEventWindows(
+        self, events: np.ndarray, state: EphemerisState | None = None
+    ) -> np.ndarray:
+        """Finds how early and late each event could happen given the uncertainty of the measured
+        orbital parameters. Every threshold crossing that caused an event is solved again for each
+        member of the ensemble (see `getEnsembleParams`) in a single batch, a member sees the event
+        at the earliest of its crossings.
+
+        Parameters
+        ------------
+        events: `np.ndarray`
+            Events with the EventStore.EVENT_DTYPE layout.
+        state: `EphemerisState` *(optional)*
+            The state whose orbital parameters the ensemble is created from. Defaults to the
+            current state.
+
+        Returns
+        ---------
+        `np.ndarray`
+            The confidence window of each event with the EVENT_WINDOW_DTYPE layout. Events that no
+            member sees, or that don't record the pairs that caused them, have a window of their
+            own timestamp.
+        """
+        windows = np.zeros(len(events), dtype=EVENT_WINDOW_DTYPE)
+        windows["timestamp"] = events["timestamp"]
+        windows["earliest"] = events["timestamp"]
+        windows["latest"] = events["timestamp"]
+        rows, pairs = np.nonzero(
+            events["pairs"][:, np.newaxis].astype(np.uint64) & PAIR_MASK_BITS != 0
+        )
+        if len(rows) == 0:
+            return windows
+        state = self.state if state is None else state
+        precision = (
+            self.refineIncrement if self.eventEngine == "scan" else self.rootPrecision
+        )
+        crossings = OrbitalKernel.findEnsembleCrossings(
+            self.getOrbitalParams(state),
+            self.getEnsembleParams(state),
+            events["timestamp"][rows],
+            pairs,
+            self.ensembleWindow - self.ensembleWindow % precision,
+            precision,
+        )
+        # the earliest crossing of each event for every member, rows are grouped by event
+        firstRows = np.flatnonzero(np.diff(rows, prepend=-1))
+        missing = np.iinfo(np.int64).max
+        memberTimes = np.minimum.reduceat(
+            np.where(crossings < 0, missing, crossings), firstRows, axis=0
+        )
+        seen = memberTimes != missing
+        members = seen.sum(axis=1)
+        eventRows = rows[firstRows][members > 0]
+        seen, memberTimes = seen[members > 0], memberTimes[members > 0]
+        windows["members"][rows[firstRows]] = members
+        windows["earliest"][eventRows] = memberTimes.min(axis=1)
+        windows["latest"][eventRows] = np.where(seen, memberTimes, 0).max(axis=1)
+        return windows
+
+    def getOrbIntervals(
+        self, state: EphemerisState | None = None
+    ) -> dict[str, dict[str, np.ndarray[np.int64]]]:
+        """Gets the intervals of time each orb spends glowing and dark over the scroll event cache's
+        time range, creating them with `OrbitalKernel.createOrbIntervals` when the cache has changed
+        since they were last created.
+
+        Parameters
+        ------------
+        state: `EphemerisState` *(optional)*
+            The state to use. Defaults to the current state.
+
+        Returns
+        ---------
+        `dict[str, dict[str, np.ndarray[np.int64]]]`
+            The intervals of each orb for the "glow" and "dark" phases, keyed by phase and then orb
+            name. Each is an (N, 2) array of chronologically ordered [start, stop) epoch times in ms.
+        """
+        state = self.state if state is None else state
+        # the cache array itself is kept so it can't be replaced by a different array that happens
+        # to reuse its memory, the intervals are kept in the same tuple so they're replaced at once
+        orbIntervalsCache = self.orbIntervalsCache
+        if (
+            orbIntervalsCache is not None
+            and orbIntervalsCache[0] is state.events
+            and orbIntervalsCache[1:3] == (state.start, state.stop)
+        ):
+            return orbIntervalsCache[3]
+        glowIntervals, darkIntervals = OrbitalKernel.createOrbIntervals(
+            state.events,
+            int(
+                OrbitalKernel.getAlignmentMasks(
+                    self.getOrbitalParams(state), np.array([state.start])
+                )[0]
+            ),
+            state.start,
+            state.stop,
+        )
+        intervals = {
+            "glow": dict(zip(ORB_NAMES, glowIntervals)),
+            "dark": dict(zip(ORB_NAMES, darkIntervals)),
+        }
+        self.orbIntervalsCache = (state.events, state.start, state.stop, intervals)
+        return intervals
+
+    def findOrbOverlaps(
+        self,
+        orbs: list[str],
+        phase: str,
+        minOrbs: int | None = None,
+        startTime: int | None = None,
+        endTime: int | None = None,
+    ) -> np.ndarray[np.int64]:
+        """Finds the times at which at least minOrbs of the orbs are in the same phase, e.g. when Red
+        and Blue glow together or when any 3 orbs glow at once.
+
+        Parameters
+        ------------
+        orbs: `list[str]`
+            The names of the orbs to check.
+        phase: `str`
+            The phase the orbs must be in, either "glow" or "dark".
+        minOrbs: `int` *(optional)*
+            The least number of the orbs that must be in the phase at once. Defaults to all of them.
+        startTime: `int` *(optional)*
+            The epoch time in ms that the search starts from. Defaults to the start of the scroll
+            event cache.
+        endTime: `int` *(optional)*
+            The epoch time in ms that the search stops at. Defaults to the end of the scroll event cache.
+
+        Returns
+        ---------
+        `np.ndarray[np.int64]`
+            An (N, 2) array of the chronologically ordered [start, stop) epoch times in ms at which
+            the orbs overlap, clipped to the time range.
+        """
+        if phase not in ("glow", "dark"):
+            print(f'Unknown phase "{phase}", must be "glow" or "dark"')
+            return np.empty((0, 2), dtype=np.int64)
+        orbs = list(dict.fromkeys(orbs))
+        minOrbs = len(orbs) if minOrbs is None else minOrbs
+        if not 0 < minOrbs <= len(orbs):
+            print(f"minOrbs must be between 1 and the number of orbs ({len(orbs)})")
+            return np.empty((0, 2), dtype=np.int64)
+        state = self.state
+        startTime = state.start if startTime is None else int(startTime)
+        endTime = state.stop if endTime is None else int(endTime)
+        intervals = self.getOrbIntervals(state)[phase]
+        overlaps = OrbitalKernel.findIntervalOverlaps(
+            [intervals[orb] for orb in orbs], minOrbs
+        )
+        overlaps = overlaps[(overlaps[:, 1] > startTime) & (overlaps[:, 0] < endTime)]
+        return np.clip(overlaps, startTime, endTime)
+
+    def getTimelineEvents(
+        self, startTime: int, endTime: int, state: EphemerisState | None = None
+    ) -> np.ndarray:
+        """Gets the events between the start and stop time from the segments of the timeline that
+        cover them. Segments are taken from memory, then from self.store, and only calculated
+        when neither has them, so any time range can be requested and only the segments it
+        touches are ever calculated. Safe to call from several threads.
+
+        Parameters
+        ------------
+        startTime: `int`
+            The earliest epoch time in ms an event can happen at.
+        endTime: `int`
+            The latest epoch time in ms an event can happen at.
+        state: `EphemerisState` *(optional)*
+            The state whose orbital parameters the segments are calculated with. Defaults to the
+            current state.
 
         Returns
         ---------
-        `list[tuple[int, dict[str, any]]]`
-            A chronologically ordered `list` of `tuples` that contains the predicted events' information.
+        `np.ndarray`
+            A chronologically ordered structured array of events with the EventStore.EVENT_DTYPE layout.
+
+        Raises
+        ---------
+        `ValueError`
+            If more than self.maxTimelineSegments segments would have to be calculated.
         """
-        # bisect O(log(n)), total O(2log(n))
-        startIndex = bisect.bisect_left(self.scrollEventsCache, (startTime,))
-        stopIndex = bisect.bisect_right(self.scrollEventsCache, (endTime,))
-        return [events for _, events in self.scrollEventsCache[startIndex:stopIndex]]
+        startTime = int(startTime)
+        endTime = int(endTime)
+        if startTime > endTime:
+            return np.zeros(0, dtype=EVENT_DTYPE)
+        state = self.state if state is None else state
+        with self.timelineLock:
+            return self.readTimeline(startTime, endTime, state)
+
+    def readTimeline(
+        self, startTime: int, endTime: int, state: EphemerisState
+    ) -> np.ndarray:
+        """Gets the events between the start and stop time from the timeline's segments, see
+        `getTimelineEvents`. Must be called with self.timelineLock held.
+
+        Parameters
+        ------------
+        startTime: `int`
+            The earliest epoch time in ms an event can happen at.
+        endTime: `int`
+            The latest epoch time in ms an event can happen at.
+        state: `EphemerisState`
+            The state whose orbital parameters the segments are calculated with.
+
+        Returns
+        ---------
+        `np.ndarray`
+            A chronologically ordered structured array of events with the EventStore.EVENT_DTYPE layout.
+        """
+        # segments are loaded and calculated with the state's parameters even if a new state is
+        # published in the meantime
+        snapshot = self.getSnapshot(state)
+        fingerprint = self.getParameterFingerprint(state)
+        if fingerprint != self.segmentFingerprint:
+            # segments calculated with old parameters are no longer valid
+            self.segmentCache.clear()
+            self.segmentCacheBytes = 0
+            self.segmentFingerprint = fingerprint
+            snapshot.removeStaleSegments()
+        segments = {}
+        missing = []
+        for index in range(
+            startTime // self.segmentLength, endTime // self.segmentLength + 1
+        ):
+            if index in self.segmentCache:
+                self.segmentCache.move_to_end(index)
+                segments[index] = self.segmentCache[index]
+                continue
+            segments[index] = snapshot.loadSegment(index)
+            if segments[index] is None:
+                missing.append(index)
+            else:
+                self.cacheSegment(index, segments[index])
+        if len(missing) > self.maxTimelineSegments:
+            raise ValueError(
+                f"{len(missing)} timeline segments need to be calculated, a single request "
+                f"can calculate at most {self.maxTimelineSegments}"
+            )
+        for index, events in snapshot.createSegments(missing).items():
+            segments[index] = events
+            self.cacheSegment(index, events)
+        if len(missing) > 0:
+            self.limitSavedSegments(set(segments))
+        events = OrbitalKernel.stitchEventChunks(
+            [segments[index] for index in sorted(segments)]
+        )
+        timestamps = events["timestamp"]
+        startIndex = np.searchsorted(timestamps, startTime, side="left")
+        stopIndex = np.searchsorted(timestamps, endTime, side="right")
+        return events[startIndex:stopIndex]
+
+    def createSegments(self, indices: list[int]) -> dict[int, np.ndarray]:
+        """Calculates the events of timeline segments, consecutive segments are calculated by a
+        single build so short segments don't each pay the cost of starting a build. Every segment
+        is saved to self.store.
+
+        Parameters
+        ------------
+        indices: `list[int]`
+            The ascending indices of the segments, segment i covers
+            [i * self.segmentLength, (i + 1) * self.segmentLength).
+
+        Returns
+        ---------
+        `dict[int, np.ndarray]`
+            The events of each segment with the EventStore.EVENT_DTYPE layout.
+        """
+        segments = {}
+        if len(indices) == 0:
+            return segments
+        # split the indices into runs of consecutive segments
+        runs = np.split(indices, np.flatnonzero(np.diff(indices) != 1) + 1)
+        for run in runs:
+            runStart = int(run[0]) * self.segmentLength
+            runStop = (int(run[-1]) + 1) * self.segmentLength
+            # scan past both ends so the states at the ends of the run are already known
+            events = self.multiProcessCreateScrollEventRange(
+                runStart - self.increment, runStop + self.increment
+            )
+            boundaries = np.searchsorted(
+                events["timestamp"],
+                np.arange(runStart, runStop + 1, self.segmentLength),
+            )
+            for index, segStart, segStop in zip(
+                run.tolist(), boundaries[:-1], boundaries[1:]
+            ):
+                segments[index] = events[segStart:segStop].copy()
+                self.saveSegment(index, segments[index])
+        return segments
+
+    def cacheSegment(self, index: int, events: np.ndarray) -> None:
+        """Keeps the events of a segment in memory as the most recently used segment, then evicts
+        the least recently used segments until the kept events fit self.segmentMemoryBudget.
+
+        Parameters
+        ------------
+        index: `int`
+            The index of the segment.
+        events: `np.ndarray`
+            The segment's events with the EventStore.EVENT_DTYPE layout.
+        """
+        # every segment counts as at least one event so segments without events are evicted too
+        if index in self.segmentCache:
+            self.segmentCacheBytes -= max(
+                self.segmentCache.pop(index).nbytes, EVENT_DTYPE.itemsize
+            )
+        self.segmentCache[index] = events
+        self.segmentCacheBytes += max(events.nbytes, EVENT_DTYPE.itemsize)
+        while self.segmentCacheBytes > self.segmentMemoryBudget and self.segmentCache:
+            _, evicted = self.segmentCache.popitem(last=False)
+            self.segmentCacheBytes -= max(evicted.nbytes, EVENT_DTYPE.itemsize)
+
+    def getSegmentHeader(self, index: int) -> dict[str, any]:
+        """Creates the header that identifies the saved events of a segment, saved events are only
+        loaded when their header matches the current one.
+
+        Parameters
+        ------------
+        index: `int`
+            The index of the segment.
+
+        Returns
+        ---------
+        `dict[str, any]`
+            The parameters and times the segment's events depend on.
+        """
+        return {
+            "fingerprint": self.getParameterFingerprint(),
+            "eventEngine": self.eventEngine,
+            "refineIncrement": self.refineIncrement,
+            "minimumStep": self.minimumStep,
+            "rootPrecision": self.rootPrecision,
+            "start": index * self.segmentLength,
+            "stop": (index + 1) * self.segmentLength,
+        }
+
+    def saveSegment(self, index: int, events: np.ndarray) -> None:
+        """Saves the events of a segment to self.store.
+
+        Parameters
+        ------------
+        index: `int`
+            The index of the segment.
+        events: `np.ndarray`
+            The segment's events with the EventStore.EVENT_DTYPE layout.
+        """
+        self.store.saveEvents(
+            self.getSegmentName(index),
+            events,
+            self.getSegmentHeader(index),
+        )
+
+    def loadSegment(self, index: int) -> np.ndarray | None:
+        """Loads the saved events of a segment from self.store.
+
+        Parameters
+        ------------
+        index: `int`
+            The index of the segment.
+
+        Returns
+        ---------
+        `np.ndarray | None`
+            The segment's events with the EventStore.EVENT_DTYPE layout, None if the segment
+            wasn't saved or was saved with different parameters.
+        """
+        segment = self.store.loadEvents(self.getSegmentName(index))
+        if segment is None:
+            return None
+        header, events = segment
+        if not self.isSegmentValid(index, header) or events.dtype != EVENT_DTYPE:
+            return None
+        return np.array(events)
+
+    def getSegmentName(self, index: int) -> str:
+        """Gets the name the events of a segment are saved under.
+
+        Parameters
+        ------------
+        index: `int`
+            The index of the segment.
+
+        Returns
+        ---------
+        `str`
+            The name of the segment in self.store.
+        """
+        return f"segments/segment-{index}"
+
+    def getSavedSegments(self) -> dict[int, str]:
+        """Gets the segments saved in self.store.
+
+        Returns
+        ---------
+        `dict[int, str]`
+            The name of each saved segment keyed by its index.
+        """
+        prefix = "segments/segment-"
+        return {
+            int(name[len(prefix) :]): name for name in self.store.listEvents(prefix)
+        }
+
+    def isSegmentValid(self, index: int, header: dict[str, any]) -> bool:
+        """Checks if a saved segment was calculated with the current parameters.
+
+        Parameters
+        ------------
+        index: `int`
+            The index of the segment.
+        header: `dict[str, any]`
+            The header the segment was saved with.
+
+        Returns
+        ---------
+        `bool`
+            True if the header matches the one created by `getSegmentHeader`.
+        """
+        expectedHeader = self.getSegmentHeader(index)
+        return all(header.get(key) == value for key, value in expectedHeader.items())
+
+    def removeStaleSegments(self) -> None:
+        """Removes the segments in self.store that were calculated with different parameters, they
+        can't be loaded again once the parameters have changed (e.g. after a recalibration).
+        """
+        for index, name in self.getSavedSegments().items():
+            segment = self.store.loadEvents(name)
+            if segment is not None and not self.isSegmentValid(index, segment[0]):
+                self.store.removeEvents(name)
+
+    def limitSavedSegments(self, keep: set[int]) -> None:
+        """Removes the saved segments furthest from the current time until at most
+        self.maxTimelineSegments are left in self.store.
+
+        Parameters
+        ------------
+        keep: `set[int]`
+            The indices of segments that are never removed, e.g. the ones just requested.
+        """
+        savedSegments = self.getSavedSegments()
+        numExtra = len(savedSegments) - self.maxTimelineSegments
+        if numExtra <= 0:
+            return
+        currentIndex = int(time.time() * 1000) // self.segmentLength
+        furthest = sorted(
+            (index for index in savedSegments if index not in keep),
+            key=lambda index: abs(index - currentIndex),
+            reverse=True,
+        )
+        for index in furthest[:numExtra]:
+            self.store.removeEvents(savedSegments[index])
+
+    def getAlignmentMaskAt(self, time: int, state: EphemerisState | None = None) -> int:
+        """Gets the packed alignment state of every orb at a point in time with a single
+        O(log(n)) search of self.scrollEventsCache. Times the cache doesn't cover are calculated directly.
+
+        Parameters
+        ---------
+            time: `int`
+                The epoch timestamp in ms to get the alignment states at.
+            state: `EphemerisState` *(optional)*
+                The state to use. Defaults to the current state.
+
+        Returns
+        ---------
+            `int`
+            A bitmask where bit i is set when ORB_NAMES[i] is aligned with any other orb at time.
+        """
+        state = self.state if state is None else state
+        timestamps = state.events["timestamp"]
+        index = np.searchsorted(timestamps, time, side="right") - 1
+        if index < 0 or not state.start <= time < state.stop:
+            return int(
+                OrbitalKernel.getAlignmentMasks(
+                    self.getOrbitalParams(state), np.array([time])
+                )[0]
+            )
+        return int(state.events["state"][index])
+
+    def getOrbStates(self, time: int) -> dict[str, any]:
+        """Gets which orbs are glowing and which are dark at a point in time.
+
+        Parameters
+        ---------
+            time: `int`
+                The epoch timestamp in ms to get the orb states at.
+
+        Returns
+        ---------
+            `dict[str, any]`
+            A `dict` containing lists of the orbs that are glowing and dark at time, and the epoch
+            timestamp in ms of the next cached event after time or None if there isn't one.
+        """
+        state = self.state
+        mask = self.getAlignmentMaskAt(time, state)
+        shadowBit = ORB_BITS["Shadow"]
+        orbs = self.getOrbNames(mask & ~shadowBit)
+        # orbs aligned with the shadow go dark, otherwise aligned orbs glow
+        shadowAligned = mask & shadowBit != 0
+        timestamps = state.events["timestamp"]
+        index = np.searchsorted(timestamps, time, side="right")
+        return {
+            "glowing": [] if shadowAligned else orbs,
+            "dark": orbs if shadowAligned else [],
+            "nextChange": int(timestamps[index]) if index < len(timestamps) else None,
+        }
+
+    def findNextEvent(
+        self,
+        orbs: list[str],
+        phase: str,
+        startTime: int | None = None,
+        maxDays: int = 365,
+    ) -> tuple[int, dict[str, any]] | None:
+        """Finds the next event in which any of the orbs begin to glow, go dark, or return to normal.
+        Events in self.scrollEventsCache are searched first, later times are searched with
+        `OrbitalKernel.findNextEvent` which only follows the orb pairs that can cause the event and
+        skips the stretches of time they can't cross their thresholds in.
+
+        Parameters
+        ------------
+        orbs: `list[str]`
+            The names of the orbs to search for, an event with any of them matches.
+        phase: `str`
+            The change to search for, one of "glow", "dark" or "normal".
+        startTime: `int` *(optional)*
+            The epoch time in ms that the search starts after. Defaults to the current time.
+        maxDays: `int` *(optional)*
+            The number of days after startTime to search. Defaults to 365.
+
+        Returns
+        ---------
+        `tuple[int, dict[str, any]] | None`
+            A `tuple` who's first element is the epoch time stamp in ms for the event and the second
+            element is a `dict` containing the event information. None if there isn't an event
+            within maxDays.
+        """
+        fields = {"glow": "glows", "dark": "darks", "normal": "normals"}
+        if phase not in fields:
+            print(f'Unknown phase "{phase}", must be one of {list(fields)}')
+            return None
+        orbMask = self.getOrbMask(orbs)
+        if orbMask == 0:
+            print("At least one orb must be given")
+            return None
+        startTime = int(time.time() * 1000) if startTime is None else int(startTime)
+        stopTime = startTime + maxDays * 86400000
+        field = fields[phase]
+        state = self.state
+        searchStart = startTime
+        if state.start <= startTime < state.stop:
+            timestamps = state.events["timestamp"]
+            events = state.events[
+                np.searchsorted(timestamps, startTime, side="right") :
+            ]
+            found = np.flatnonzero(events[field] & orbMask != 0)
+            if len(found) > 0 and events["timestamp"][found[0]] < stopTime:
+                event = events[found[0]]
+                return (int(event["timestamp"]), self.createEventInfo(event))
+            # the cache holds every event before scrollCacheStop
+            searchStart = state.stop - 1
+        events = OrbitalKernel.findNextEvent(
+            self.getOrbitalParams(state),
+            searchStart,
+            stopTime,
+            orbMask,
+            field,
+            self.refineIncrement if self.eventEngine == "scan" else self.rootPrecision,
+        )
+        if len(events) == 0:
+            return None
+        return (int(events[0]["timestamp"]), self.createEventInfo(events[0]))
 
     def checkForAlignmentChange(
         self, lastAlignmentStates=[], currentAlignmentStates=[]
@@ -354,77 +1757,73 @@ class Ephemeris:
             and the second element is a `dict` containing the event information.
 
         """
-        names = [
-            "Shadow",
-            "White",
-            "Black",
-            "Green",
-            "Red",
-            "Purple",
-            "Yellow",
-            "Cyan",
-            "Blue",
-        ]
-        darkList = []
-        glowList = []
-        returnedToNormal = []
-        aligned = []
-        stillAligned = []
         if len(lastAlignmentStates) < 1:
             lastAlignmentStates = self.lastAlignmentStates
         if len(currentAlignmentStates) < 1:
             currentAlignmentStates = self.currentAlignmentStates
-        for i, v in enumerate(currentAlignmentStates):
-            if v != lastAlignmentStates[i]:
-                # if changed to being aligned
-                if v == True:
-                    aligned.append(names[i])
-                # if changed to being unaligned
-                else:
-                    returnedToNormal.append(names[i])
-            # if still aligned
-            elif v == True:
-                stillAligned.append(names[i])
-
-        # if anything is aligns with the shadow orb or aligns while something else is already aligned with the shadow orb
-        if len(aligned) > 0 and (
-            aligned[0] == names[0]
-            or (len(stillAligned) > 0 and stillAligned[0] == names[0])
-        ):
-            # add all the newly aligned orbs to the new dark list
-            darkList.extend(aligned)
-            # if there are orbs previously aligned
-            if len(stillAligned) > 0 and not lastAlignmentStates[0]:
-                # add the previously aligned orbs to the dark list if there is a new dark
-                darkList.extend(stillAligned)
-        # if alignments with the shadow orb end
-        elif len(returnedToNormal) > 0 and returnedToNormal[0] == names[0]:
-            if len(aligned) > 0:
-                # add newly aligned orbs to glow list
-                glowList.extend(aligned)
-            # if there are orbs that are still aligned (were previously glowing)
-            if len(stillAligned) > 0:
-                # add the still aligned orbs to the glow list
-                glowList.extend(stillAligned)
-        else:
-            # if not a new dark or returning to normal, newly aligned orbs should be glowing
-            glowList.extend(aligned)
+        event = OrbitalKernel.createEventRecords(
+            np.array([timestamp]),
+            self.packAlignmentStates(np.asarray(lastAlignmentStates))[np.newaxis],
+            self.packAlignmentStates(np.asarray(currentAlignmentStates))[np.newaxis],
+        )[0]
+        return (timestamp, self.createEventInfo(event))
 
-        event = (
-            timestamp,
-            {
-                "newGlows": glowList,
-                "newDarks": darkList,
-                "returnedToNormal": returnedToNormal,
-            },
-        )
+    def createEventInfo(self, event: np.void) -> dict[str, any]:
+        """Converts an event into the `dict` format used when displaying events.
 
+        Parameters
+        ---------
+        event: `np.void`
+            A single event with the EventStore.EVENT_DTYPE layout.
+
+        Returns
+        ---------
+        `dict[str, any]`
+            A `dict` containing lists of the orbs that begin to glow, go dark, and return to normal,
+            and a discord timestamp for the event if self.discordTimestamps is set.
+        """
+        eventInfo = {
+            "newGlows": self.getOrbNames(event["glows"]),
+            "newDarks": self.getOrbNames(event["darks"]),
+            "returnedToNormal": self.getOrbNames(event["normals"]),
+        }
         if self.discordTimestamps:
-            event[1][
-                "discordTS"
-            ] = f"<t:{int(np.floor(timestamp/1000))}:D> <t:{int(np.floor(timestamp/1000))}:T>"
+            timestamp = int(event["timestamp"]) // 1000
+            eventInfo["discordTS"] = f"<t:{timestamp}:D> <t:{timestamp}:T>"
+        return eventInfo
+
+    def getOrbNames(self, mask: int) -> list[str]:
+        """Gets the names of the orbs in a bitmask.
+
+        Parameters
+        ---------
+        mask: `int`
+            A bitmask, bit i corresponding to ORB_NAMES[i].
+
+        Returns
+        ---------
+        `list[str]`
+            The names of the orbs whose bits are set, in ORB_NAMES order.
+        """
+        return list(MASK_ORB_NAMES[mask])
+
+    def getOrbMask(self, orbs: list[str]) -> int:
+        """Gets the bitmask of a list of orbs.
+
+        Parameters
+        ---------
+        orbs: `list[str]`
+            Names of orbs as they appear in ORB_NAMES.
 
-        return event
+        Returns
+        ---------
+        `int`
+            A bitmask with the bit of each listed orb set, bit i corresponding to ORB_NAMES[i].
+        """
+        mask = 0
+        for orb in orbs:
+            mask |= ORB_BITS[orb]
+        return mask
 
     # UPDATE DOCK STRING, RETURNS NOW
     def setAlignmentStates(self, time: int) -> None:
@@ -456,6 +1855,92 @@ class Ephemeris:
                 alignmentStates[i] = alignmentStates[i + j + 1] = True
         return alignmentStates
 
+    def getAlignmentStatesBatch(self, times: np.ndarray[int]) -> np.ndarray[bool]:
+        """Batched version of `setAlignmentStates` that determines the alignment state of
+        every orb at each of the passed in times with a few array operations.
+
+        Parameters
+        ---------
+            times: `np.ndarray[int]`
+                An array of N epoch timestamps in ms at which the alignment states are calculated.
+        Returns
+        ---------
+        `np.ndarray[bool]`
+            An (N, 9) array where row n holds the alignment state of each orb at times[n]
+            with True corresponding to being aligned with any other orb.
+        """
+        return self.unpackAlignmentMask(self.getAlignmentMasks(times))
+
+    def getAlignmentMasks(self, times: np.ndarray[int]) -> np.ndarray[np.uint16]:
+        """Determines the alignment state of every orb at each of the passed in times and
+        packs the states of each time into a single bitmask.
+
+        Parameters
+        ---------
+            times: `np.ndarray[int]`
+                An array of N epoch timestamps in ms at which the alignment states are calculated.
+        Returns
+        ---------
+        `np.ndarray[np.uint16]`
+            An array of N bitmasks where bit i of element n is set when ORB_NAMES[i]
+            is aligned with any other orb at times[n].
+        """
+        return OrbitalKernel.getAlignmentMasks(self.getOrbitalParams(), times)
+
+    def getPairMargins(
+        self, times: np.ndarray[int], pairs: np.ndarray[int] | None = None
+    ) -> np.ndarray[float]:
+        """Calculates how far each orb pair is from its alignment threshold at each of the passed in times.
+
+        Parameters
+        ---------
+            times: `np.ndarray[int]`
+                An array of N epoch timestamps in ms at which the pair margins are calculated.
+            pairs: `np.ndarray[int]` *(optional)*
+                The P indices (into PAIR_A and PAIR_B) of the pairs to calculate the margins of.
+                Only the positions of the orbs in these pairs are calculated. Defaults to all 36 pairs.
+        Returns
+        ---------
+        `np.ndarray[float]`
+            An (N, P) array where element [n, k] is the angular difference in degrees between the
+            orbs of pairs[k] minus the pair's alignment threshold at times[n].
+            Negative values indicate that the pair is aligned.
+        """
+        return OrbitalKernel.getPairMargins(self.getOrbitalParams(), times, pairs)
+
+    def packAlignmentStates(self, states: np.ndarray[bool]) -> np.ndarray[np.uint16]:
+        """Packs alignment state arrays into bitmasks.
+
+        Parameters
+        ---------
+            states: `np.ndarray[bool]`
+                An array whose last axis holds the alignment state of the 9 orbs.
+        Returns
+        ---------
+        `np.ndarray[np.uint16]`
+            The bitmask for each set of states, bit i corresponding to ORB_NAMES[i].
+        """
+        return OrbitalKernel.packAlignmentStates(states)
+
+    def unpackAlignmentMask(self, masks: np.ndarray[np.uint16]) -> np.ndarray[bool]:
+        """Unpacks alignment bitmasks into alignment state arrays.
+
+        Parameters
+        ---------
+            masks: `np.ndarray[np.uint16]`
+                A bitmask or array of bitmasks, bit i corresponding to ORB_NAMES[i].
+        Returns
+        ---------
+        `np.ndarray[bool]`
+            An array with an extra last axis that holds the alignment state of the 9 orbs.
+        """
+        return (
+            np.right_shift(
+                np.asarray(masks)[..., np.newaxis], np.arange(len(ORB_NAMES))
+            )
+            & 1
+        ).astype(bool)
+
     def calcAlignmentDifs(
         self, positions: np.ndarray[float]
     ) -> list[np.ndarray[float]]:
@@ -508,6 +1993,25 @@ class Ephemeris:
         positions = np.append(positions, (np.degrees(np.arctan2(y, x))) % 360)
         return positions
 
+    def posRelCandleBatch(
+        self, times: np.ndarray[int], orbs: np.ndarray[int] | None = None
+    ) -> np.ndarray[float]:
+        """Batched version of `posRelCandle` that gets the position of each orb relative
+        to the candle at each of the passed in times.
+
+        Parameters
+        ---------
+            times: `np.ndarray[int]`
+                An array of N epoch timestamps in ms at which the orb positions are retrieved.
+            orbs: `np.ndarray[int]` *(optional)*
+                The M indices (into ORB_NAMES) of the orbs to get the positions of. Defaults to all orbs.
+        Returns
+        ---------
+        `np.ndarray[float]`
+            An (N, M) array where row n holds the position of each orb relative to the candle at times[n].
+        """
+        return OrbitalKernel.posRelCandleBatch(self.getOrbitalParams(), times, orbs)
+
     def posRelWhite(self, time: int) -> np.ndarray[float]:
         """Calculates the position of each orb, excluding the shadow orb, relative to the
         white orb (sun equivalent)
@@ -522,9 +2026,10 @@ class Ephemeris:
             An array with each index corresponding to the position of a unique orb or the candle in
             degrees relative to the white orb.
         """
-        positions = (
-            (360 / self.periods) * (time - self.refTimes) + self.refPositions
-        ) % 360
+        state = self.state
+        positions = OrbitalKernel.getPhaseAngles(
+            time, state.periods, state.refTimes, state.refPositions
+        )
         # positions[0] is white pos rel candle, add 180 to make it the candle pos rel white
         positions[0] = (positions[0] + 180) % 360
         return positions
@@ -542,15 +2047,18 @@ class Ephemeris:
         `float`
             The position of the shadow orb relative to the candle at the passed in time argument
         """
-        return (
-            (360 / self.v["shadow"]["period"]) * (time - self.v["shadow"]["refTime"])
-            + self.v["shadow"]["refOffset"]
-        ) % 360
+        shadow = self.v["shadow"]
+        return float(
+            OrbitalKernel.getPhaseAngles(
+                time, shadow["period"], shadow["refTime"], shadow["refOffset"]
+            )
+        )
 
     def setRefPositions(self) -> None:
         """Calculates and stores the positions of each orb during their experimentally sampled
-        reference times in self.refOffsets for future calculations.
-        Updates variables.json to reflect these calculations
+        reference times in self.v for future calculations. Only used by `setVariables` on variables
+        that haven't been published yet. The positions are only saved to self.store along with new
+        reference times (see `updateRefTimes`).
         """
 
         # note the shadow orb refOffset and refTime is experimentally gathered to
@@ -561,14 +2069,16 @@ class Ephemeris:
         shadow = self.v["shadow"]
 
         # the candle position is determined using alignments between the white orb and the shadow orb
-        self.v["candle"]["refPos"] = (
-            (360 / shadow["period"]) * (rt[0] - shadow["refTime"]) + shadow["refOffset"]
-        ) % 360
+        self.v["candle"]["refPos"] = float(
+            OrbitalKernel.getPhaseAngles(
+                rt[0], shadow["period"], shadow["refTime"], shadow["refOffset"]
+            )
+        )
 
         # the rest of the orbs are determined using alignments between the white orb and the orb in question
-        posList = (
-            (360 / p[0]) * (rt[1:8] - rt[0]) + self.v["candle"]["refPos"] + ros[1:8]
-        ) % 360
+        posList = OrbitalKernel.getPhaseAngles(
+            rt[1:8], p[0], rt[0], self.v["candle"]["refPos"] + ros[1:8]
+        )
 
         self.v["black"]["refPos"] = posList[0]
         self.v["green"]["refPos"] = posList[1]
@@ -578,8 +2088,6 @@ class Ephemeris:
         self.v["cyan"]["refPos"] = posList[5]
         self.v["blue"]["refPos"] = posList[6]
 
-        self.updateVariables()
-
     def getPeriods(self) -> np.ndarray[int]:
         """Gets the stored periods from self.v and packages them in an array to more easily parse.
 
@@ -692,69 +2200,226 @@ class Ephemeris:
             ]
         )
 
-    def saveCache(self, fileLoc: Path) -> None:
-        """Saves the scroll event cache a JSON file.
+    def saveCache(self, fileLoc: Path | None = None) -> None:
+        """Saves the scroll event cache to self.store as "cache", or to a binary event store file that
+        can be memory-mapped by other processes (see `EventStore.saveEventStore`).
+
+        Parameters
+        ---------
+            fileLoc: `Path` *(optional)*
+                The path to the file the event cache data will be saved to. Defaults to None,
+                in which case the cache is saved to self.store.
+        """
+        state = self.state
+        header = {
+            "fingerprint": self.getParameterFingerprint(state),
+            "eventEngine": self.eventEngine,
+            "start": state.start,
+            "stop": state.stop,
+        }
+        if fileLoc is None:
+            self.store.saveEvents("cache", state.events, header)
+        else:
+            saveEventStore(fileLoc, state.events, header)
+
+    def loadSavedScrollCache(self) -> bool:
+        """Replaces the scroll event cache with the events saved by `saveCache` if they were created
+        with the current orbital parameters and event engine.
+
+        Returns
+        ---------
+            `bool`
+                True if the saved events were loaded.
+        """
+        savedCache = self.store.loadEvents("cache")
+        if savedCache is None:
+            return False
+        header, events = savedCache
+        state = self.state
+        if (
+            header.get("fingerprint") != self.getParameterFingerprint(state)
+            or header.get("eventEngine") != self.eventEngine
+            or events.dtype != EVENT_DTYPE
+        ):
+            return False
+        # copy the events so the file can be replaced while they are in use, pair windows
+        # aren't saved so the loaded events are extended without them
+        self.publishState(
+            state._replace(
+                events=np.array(events),
+                start=header["start"],
+                stop=header["stop"],
+                pairWindows=None,
+                eventWindows=None,
+                eventWindowsKey=None,
+            )
+        )
+        return True
+
+    def saveMoonCache(self) -> None:
+        """Saves the moon cycle cache to self.store as "moonCache"."""
+        events = np.zeros(len(self.moonCyclesCache), dtype=MOON_DTYPE)
+        for i, (timestamp, phaseInfo) in enumerate(self.moonCyclesCache):
+            events[i] = (timestamp, MOON_PHASES.index(phaseInfo["phase"]))
+        self.store.saveEvents(
+            "moonCache",
+            events,
+            {
+                "fingerprint": self.getParameterFingerprint(),
+                "start": int(self.moonCacheStart),
+            },
+        )
+
+    def loadSavedMoonCache(
+        self, startTime: int, numMoonCycles: int
+    ) -> list[tuple[int, dict[str, any]]] | None:
+        """Gets the moon phase changes saved by `saveMoonCache` if they were created with the
+        current orbital parameters and cover numMoonCycles from startTime.
 
         Parameters
         ---------
-            fileLoc: `Path`
-                The path to the JSON file the event cache data will be saved to.
+            startTime: `int`
+                The epoch time in ms for which events after will be returned.
+            numMoonCycles: `int`
+                The number of events for each phase that are needed.
+
+        Returns
+        ---------
+            `list[tuple[int, dict[str, any]]] | None`
+                The moon cycle cache in the format created by `createLunarCalendar`,
+                None if the saved phase changes can't be used.
         """
-        json_object = json.dumps(self.scrollEventsCache, indent=4)
-        with open(fileLoc, "w") as outfile:
-            outfile.write(json_object)
+        savedCache = self.store.loadEvents("moonCache")
+        if savedCache is None:
+            return None
+        header, events = savedCache
+        firstNoon = self.getLastNoonTime(int(startTime))
+        if (
+            header.get("fingerprint") != self.getParameterFingerprint()
+            or events.dtype != MOON_DTYPE
+            or header["start"] > firstNoon
+        ):
+            return None
+        # 8 phases in one moon cycle plus almost full and almost new
+        numEvents = numMoonCycles * 10
+        events = events[events["timestamp"] >= firstNoon]
+        # new calendars start at a primary phase (new, quarters and full have even indices)
+        primaryPhases = np.flatnonzero(events["phase"] % 2 == 0)
+        if len(primaryPhases) == 0:
+            return None
+        events = events[primaryPhases[0] :][:numEvents]
+        if len(events) < numEvents:
+            return None
+        return [
+            (
+                int(timestamp),
+                {
+                    "phase": MOON_PHASES[phase],
+                    "discordTS": f"<t:{int(timestamp) // 1000}:D> <t:{int(timestamp) // 1000}:t>",
+                },
+            )
+            for timestamp, phase in events
+        ]
 
-    def updateVariables(self) -> None:
-        """Overwrites the JSON file containing the orb variables with the current
-        variables object (self.v)
+    def getOrbitalParams(self, state: EphemerisState | None = None) -> OrbitalParams:
+        """Packages the orbital parameters and step sizes used to calculate scroll events,
+        this is all the OrbitalKernel functions and worker processes need.
+
+        Parameters
+        ---------
+            state: `EphemerisState` *(optional)*
+                The state to use. Defaults to the current state.
+
+        Returns
+        ---------
+            `OrbitalParams`
+                An immutable snapshot of the state's parameters.
         """
-        json_object = json.dumps(self.v, indent=4)
-        with self.variablesFile.open("w") as outfile:
-            outfile.write(json_object)
+        state = self.state if state is None else state
+        shadow = state.variables["shadow"]
+        return OrbitalParams(
+            periods=tuple(state.periods.tolist()),
+            radii=tuple(state.radii.tolist()),
+            refTimes=tuple(state.refTimes.tolist()),
+            refPositions=tuple(state.refPositions.tolist()),
+            shadowPeriod=shadow["period"],
+            shadowRefTime=shadow["refTime"],
+            shadowRefOffset=shadow["refOffset"],
+            pairThresholds=tuple(self.pairThresholds.tolist()),
+            refineIncrement=self.refineIncrement,
+            batchSize=self.batchSize,
+            minimumStep=self.minimumStep,
+            rootPrecision=self.rootPrecision,
+        )
 
-    def getVariables(self, variablesFile: Path) -> dict[str, dict]:
-        """Gets the orb variables from a local JSON file.
+    def getEnsembleParams(
+        self, state: EphemerisState | None = None
+    ) -> OrbitalKernel.EnsembleParams:
+        """Creates self.ensembleSize sets of orbital parameters with every measured period and
+        reference time shifted by up to self.periodTolerance and self.refTimeTolerance ms.
 
         Parameters
         ---------
-            variablesFile: `Path`
-                The path to the JSON file that the orb variables are saved to.
+            state: `EphemerisState` *(optional)*
+                The state to use. Defaults to the current state.
 
         Returns
         ---------
-            `dict[str, dict]`
-                A dictionary containing variable information about the orbs
+            `OrbitalKernel.EnsembleParams`
+                The parameters of every ensemble member, the first member uses the measured ones.
         """
-        variables = {}
-        with variablesFile.open("r") as json_file:
-            variables = json.load(json_file)
-        return variables
+        state = self.state if state is None else state
+        return OrbitalKernel.createEnsembleParams(
+            self.getOrbitalParams(state),
+            state.refOffsets,
+            self.ensembleSize,
+            self.periodTolerance,
+            self.refTimeTolerance,
+            self.ensembleSeed,
+        )
 
-    # # used to update the event cache at set intervals (may slightly improve accuracy) instead of when
-    # # an event is requested outside of the cache range, not actively used in prod
-    # def autoRefreshCache(self, refreshRate:int=60 * 60 * 12):
-    #     """Updates variables with any more recent and reference times received then automatically re-calculate
-    #     event the cache. Should Be used with an asynchronous wrapper.
+    def getParameterFingerprint(self, state: EphemerisState | None = None) -> str:
+        """Creates a hash of the orbital parameters that determine when scroll events occur,
+        used to tell whether saved events are still valid for the current parameters.
 
-    #     Parameters
-    #     ---------
-    #         refreshRate: `int`
-    #             The time interval in seconds between event cache recalculations
-    #     """
-    #     while True:
-    #         #time.sleep(refreshRate)
-    #         self.updateRefTimes()
-    #         self.createScrollEventRange(
-    #             startTime=(time.time() * 1000) - 2 * 86400000,
-    #             stopTime=(time.time() * 1000) + 12 * 86400000,
-    #             saveToCache=True
-    #         )
-    #         print("New Cache Last Item:", self.scrollEventsCache[-1])
-    #         time.sleep(60*3)
+        Parameters
+        ---------
+            state: `EphemerisState` *(optional)*
+                The state to use. Defaults to the current state.
 
-    def updateScrollCache(self, start: int, stop: int) -> None:
-        """Updates the reference time and position of each orb and overwrites the current
-        scroll event cache with a new one.
+        Returns
+        ---------
+            `str`
+                A hex digest that changes whenever any of the parameters change.
+        """
+        state = self.state if state is None else state
+        shadow = state.variables["shadow"]
+        params = {
+            "periods": state.periods.tolist(),
+            "radii": state.radii.tolist(),
+            "refTimes": state.refTimes.tolist(),
+            "refOffsets": state.refOffsets.tolist(),
+            "shadow": [shadow["period"], shadow["refTime"], shadow["refOffset"]],
+            "thresholds": [self.glowThresh, self.darkThresh],
+            "noon": [self.noonRefTime, self.oneAberothDay],
+        }
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+    def updateVariables(self) -> None:
+        """Overwrites the orb variables saved in self.store with the current
+        variables object (self.v)
+        """
+        self.store.saveVariables(self.v)
+
+    def updateScrollCache(
+        self, start: int, stop: int, eventWindows: bool = False
+    ) -> None:
+        """Updates the reference time and position of each orb and moves the scroll event cache
+        to the new time range. The cache is only rebuilt from scratch when a reference time
+        changed and the cache can't be recalibrated with `recalibrateScrollCache`, otherwise the
+        existing cache is extended like `extendScrollCache`. Everything is calculated on a snapshot
+        (see `getSnapshot`) and published at once, so it can run on a worker thread while other
+        threads keep using the current parameters and cache.
 
         Parameters
         ------------
@@ -762,14 +2427,295 @@ class Ephemeris:
             The epoch time in ms that alignment calculations will start from for the new cache.
         stop: `int`
             The epoch time in ms that alignment calculations will stop at for the new cache.
+        eventWindows: `bool` *(optional)*
+            When set to true the confidence windows of the new cache are created along with it
+            (see `getEventWindows`). Defaults to False.
+        """
+        with self.updateLock:
+            snapshot = self.getSnapshot()
+            changedOrbs = snapshot.updateRefTimes()
+            # only the pairs of the changed orbs are recalculated when the engine keeps pair windows
+            rebuild = (
+                len(changedOrbs) > 0
+                and snapshot.recalibrateScrollCache(changedOrbs) is None
+            )
+            events, pairWindows = snapshot.buildScrollCacheWindows(start, stop, rebuild)
+            snapshot.swapScrollCache(
+                events,
+                start,
+                stop,
+                pairWindows,
+                snapshot.getEventWindows(events) if eventWindows else None,
+            )
+            self.publishState(snapshot.state)
+
+    def extendScrollCache(self, start: int, stop: int) -> None:
+        """Slides the scroll event cache to a new time range by dropping the events before the new
+        start time and only calculating the events after the end of the cached time range.
+        Falls back to rebuilding the whole cache when the new range doesn't overlap the cached one.
+
+        Parameters
+        ------------
+        start: `int`
+            The epoch time in ms that the cache will start from.
+        stop: `int`
+            The epoch time in ms that the cache will stop at.
+        """
+        start = int(start)
+        stop = int(stop)
+        with self.updateLock:
+            events, pairWindows = self.buildScrollCacheWindows(start, stop)
+            self.swapScrollCache(events, start, stop, pairWindows)
+
+    def recalibrateScrollCache(
+        self, changedOrbs: list[str]
+    ) -> list[dict[str, int | None]] | None:
+        """Updates the scroll event cache after the reference times of some orbs changed by only
+        recalculating the alignment windows of the pairs those orbs are in. The windows of every
+        other pair can't change, so they're reused and merged with the new windows.
+
+        Parameters
+        ------------
+        changedOrbs: `list[str]`
+            The names of the orbs whose reference time or offset changed as returned by
+            `updateRefTimes` ("candle" for the white orb).
+
+        Returns
+        ---------
+        `list[dict[str, int | None]] | None`
+            A chronologically ordered `list` with a `dict` for every event that moved, was added, or was
+            removed. Each holds the event's "oldTime" and "newTime" epoch timestamps in ms and the
+            "shift" in ms between them, with None in place of the missing time of an added or removed
+            event. None if the cache doesn't keep pair windows (only the roots engine does) and has
+            to be rebuilt instead.
+        """
+        with self.updateLock:
+            state = self.state
+            if state.pairWindows is None:
+                return None
+            # every orb is seen from the candle so the candle affects all of them
+            changedMask = 0
+            for orb in changedOrbs:
+                if orb == "candle":
+                    changedMask |= self.getOrbMask(ORB_NAMES[1:])
+                else:
+                    changedMask |= ORB_BITS[orb.capitalize()]
+            pairs = np.flatnonzero(PAIR_BITS & changedMask)
+            pairWindows = {
+                **state.pairWindows,
+                **self.createPairWindowRange(state.start, state.stop, pairs),
+            }
+            events = self.mergePairWindows(pairWindows, state.start, state.stop)
+            self.swapScrollCache(events, state.start, state.stop, pairWindows)
+        return self.getMovedEvents(state.events, events)
+
+    def getMovedEvents(
+        self, oldEvents: np.ndarray, newEvents: np.ndarray
+    ) -> list[dict[str, int | None]]:
+        """Compares two versions of the same events, e.g. from before and after a recalibration.
+        Events that are only in one of them are matched up in chronological order with the events
+        in the other that have the same orb changes.
+
+        Parameters
+        ------------
+        oldEvents: `np.ndarray`
+            The previous events with the EventStore.EVENT_DTYPE layout.
+        newEvents: `np.ndarray`
+            The updated events with the EventStore.EVENT_DTYPE layout.
+
+        Returns
+        ---------
+        `list[dict[str, int | None]]`
+            A chronologically ordered `list` with a `dict` for every event that moved, was added, or was
+            removed. Each holds the event's "oldTime" and "newTime" epoch timestamps in ms and the
+            "shift" in ms between them, with None in place of the missing time of an added or removed
+            event.
+        """
+        fields = ["timestamp", "glows", "darks", "normals"]
+        oldEvents = np.asarray(oldEvents)[fields]
+        newEvents = np.asarray(newEvents)[fields]
+        oldOnly = oldEvents[~np.isin(oldEvents, newEvents)]
+        newOnly = newEvents[~np.isin(newEvents, oldEvents)]
+        movedEvents = []
+        changes = set(
+            (int(event["glows"]), int(event["darks"]), int(event["normals"]))
+            for event in np.concatenate((oldOnly, newOnly))
+        )
+        for glows, darks, normals in changes:
+            oldTimes, newTimes = [
+                events["timestamp"][
+                    (events["glows"] == glows)
+                    & (events["darks"] == darks)
+                    & (events["normals"] == normals)
+                ].tolist()
+                for events in (oldOnly, newOnly)
+            ]
+            for i in range(max(len(oldTimes), len(newTimes))):
+                oldTime = oldTimes[i] if i < len(oldTimes) else None
+                newTime = newTimes[i] if i < len(newTimes) else None
+                movedEvents.append(
+                    {
+                        "oldTime": oldTime,
+                        "newTime": newTime,
+                        "shift": (
+                            newTime - oldTime
+                            if oldTime is not None and newTime is not None
+                            else None
+                        ),
+                    }
+                )
+        movedEvents.sort(
+            key=lambda event: (
+                event["oldTime"] if event["oldTime"] is not None else event["newTime"]
+            )
+        )
+        return movedEvents
+
+    def buildScrollCache(
+        self, start: int, stop: int, rebuild: bool = False
+    ) -> np.ndarray:
+        """Creates the scroll event cache for a new time range without modifying the current cache.
+        Events from the current cache are reused where the time ranges overlap and only the parts
+        of the new range before or after the cached range are calculated. Safe to run in a
+        separate process or thread, the result can be put in place with `swapScrollCache`.
+
+        Parameters
+        ------------
+        start: `int`
+            The epoch time in ms that the new cache will start from.
+        stop: `int`
+            The epoch time in ms that the new cache will stop at.
+        rebuild: `bool` *(optional)*
+            When set to true none of the current cache is reused, should be used
+            after the reference times change. Defaults to False.
+
+        Returns
+        ---------
+        `np.ndarray`
+            A chronologically ordered structured array of events with the EventStore.EVENT_DTYPE layout,
+            each holding a timestamp and bitmasks of the orbs whose states changed.
+        """
+        start = int(start)
+        stop = int(stop)
+        state = self.state
+        if rebuild or stop <= state.start or start >= state.stop:
+            return self.multiProcessCreateScrollEventRange(start, stop)
+        # calculate the part of the range before the cached range
+        leadingEvents = np.zeros(0, dtype=EVENT_DTYPE)
+        if start < state.start:
+            leadingEvents = self.multiProcessCreateScrollEventRange(start, state.start)
+        # resume from the last cached state, either the last event or the last step of the cached range
+        resumeTime = state.stop - self.increment
+        if len(state.events) > 0:
+            resumeTime = max(resumeTime, int(state.events["timestamp"][-1]))
+        newEvents = np.zeros(0, dtype=EVENT_DTYPE)
+        if stop > resumeTime:
+            newEvents = self.multiProcessCreateScrollEventRange(resumeTime, stop)
+        # drop events that are no longer in range
+        startIndex, stopIndex = np.searchsorted(
+            state.events["timestamp"], [start, stop], side="left"
+        )
+        return np.concatenate(
+            (leadingEvents, state.events[startIndex:stopIndex], newEvents)
+        )
+
+    def buildScrollCacheWindows(
+        self, start: int, stop: int, rebuild: bool = False
+    ) -> tuple[np.ndarray, dict[int, np.ndarray[np.int64]] | None]:
+        """Creates the scroll event cache for a new time range like `buildScrollCache`, along with
+        the alignment windows of every orb pair over the range when the roots engine is used.
+        Cached windows are reused where the time ranges overlap and only the windows before or after
+        the cached range are calculated. Safe to run in a separate process or thread, the results can
+        be put in place with `swapScrollCache`.
+
+        Parameters
+        ------------
+        start: `int`
+            The epoch time in ms that the new cache will start from.
+        stop: `int`
+            The epoch time in ms that the new cache will stop at.
+        rebuild: `bool` *(optional)*
+            When set to true none of the current cache is reused, should be used
+            after the reference times change. Defaults to False.
+
+        Returns
+        ---------
+        `tuple[np.ndarray, dict[int, np.ndarray[np.int64]] | None]`
+            The new cache as created by `buildScrollCache` and the alignment windows of every orb pair
+            as created by `createPairWindows`, or None when the scan engine is used or the current cache
+            was loaded without its windows.
+        """
+        start = int(start)
+        stop = int(stop)
+        state = self.state
+        overlaps = stop > state.start and start < state.stop
+        if self.eventEngine != "roots" or (
+            overlaps and not rebuild and state.pairWindows is None
+        ):
+            return self.buildScrollCache(start, stop, rebuild), None
+        if rebuild or not overlaps:
+            pairWindows = self.createPairWindowRange(start, stop)
+        else:
+            # calculate the windows before and after the cached range and join them to the cached ones
+            pairWindowsList = [
+                OrbitalKernel.clipPairWindows(state.pairWindows, start, stop)
+            ]
+            if start < state.start:
+                pairWindowsList.insert(
+                    0, self.createPairWindowRange(start, state.start)
+                )
+            if stop > state.stop:
+                pairWindowsList.append(self.createPairWindowRange(state.stop, stop))
+            pairWindows = OrbitalKernel.joinPairWindows(pairWindowsList)
+        return self.mergePairWindows(pairWindows, start, stop), pairWindows
+
+    def swapScrollCache(
+        self,
+        events: np.ndarray,
+        start: int,
+        stop: int,
+        pairWindows: dict[int, np.ndarray[np.int64]] | None = None,
+        eventWindows: np.ndarray | None = None,
+    ) -> None:
+        """Replaces the scroll event cache and the time range it covers, then saves it. The new
+        cache is published with the current parameters in a single state (see `publishState`),
+        so the events must have been created with them, e.g. on a snapshot that publishes its
+        state afterwards.
+
+        Parameters
+        ------------
+        events: `np.ndarray`
+            The new cache as created by `buildScrollCache`.
+        start: `int`
+            The epoch time in ms that the new cache starts from.
+        stop: `int`
+            The epoch time in ms that the new cache stops at.
+        pairWindows: `dict[int, np.ndarray[np.int64]]` *(optional)*
+            The alignment windows of every orb pair that the new cache was merged from as created by
+            `buildScrollCacheWindows`. Defaults to None, in which case the cache can't be recalibrated.
+        eventWindows: `np.ndarray` *(optional)*
+            The confidence window of every event in the new cache as created by `getEventWindows`.
+            Defaults to None, in which case confidence windows are calculated when they're requested.
         """
-        self.updateRefTimes()
-        self.createScrollEventRange(startTime=start, stopTime=stop, saveToCache=True)
-        # print("New Cache Last Item:", self.eventsCache[-1])
+        with self.updateLock:
+            self.publishState(
+                self.state._replace(
+                    events=events,
+                    start=int(start),
+                    stop=int(stop),
+                    pairWindows=pairWindows,
+                    eventWindows=eventWindows,
+                    eventWindowsKey=(
+                        None if eventWindows is None else self.getEventWindowsKey()
+                    ),
+                )
+            )
+            self.saveCache()
 
     def updateMoonCache(self, start: int, numMoonCycles: int) -> None:
         """Updates the reference time and position of each orb and overwrites the current
-        scroll event cache with a new one.
+        moon cycle cache with a new one. The scroll event cache is recalibrated, or rebuilt over
+        the same time range, along with the new reference times so they're published together.
 
         Parameters
         ------------
@@ -778,23 +2724,112 @@ class Ephemeris:
         numMoonCycles: `int`
             The number of synodic months that are calculated.
         """
-        self.updateRefTimes()
-        self.moonCyclesCache = self.createLunarCalendar(start, numMoonCycles)
+        with self.updateLock:
+            snapshot = self.getSnapshot()
+            changedOrbs = snapshot.updateRefTimes()
+            # the next scroll cache update won't see these changes, so apply them to the scroll cache now
+            if (
+                len(changedOrbs) > 0
+                and snapshot.recalibrateScrollCache(changedOrbs) is None
+            ):
+                state = snapshot.state
+                events, pairWindows = snapshot.buildScrollCacheWindows(
+                    state.start, state.stop, rebuild=True
+                )
+                snapshot.swapScrollCache(events, state.start, state.stop, pairWindows)
+            self.publishState(snapshot.state)
+        self.moonCyclesCache = snapshot.createLunarCalendar(start, numMoonCycles)
+        self.indexMoonCache()
+        self.moonCacheStart = self.getLastNoonTime(int(start))
+        self.saveMoonCache()
+
+    def indexMoonCache(self) -> None:
+        """Creates the sorted array of moon phase change times (self.moonTimestamps) and the
+        indices of the changes to each phase (self.moonPhaseIndices) used to look up events in
+        self.moonCyclesCache without searching through it.
+        """
+        self.moonTimestamps = np.array(
+            [timestamp for timestamp, _ in self.moonCyclesCache]
+        )
+        phases = np.array(
+            [MOON_PHASES.index(event["phase"]) for _, event in self.moonCyclesCache],
+            dtype=np.int64,
+        )
+        self.moonPhaseIndices = {
+            phase: np.flatnonzero(phases == i) for i, phase in enumerate(MOON_PHASES)
+        }
+
+    def getMoonCacheIndex(self, time: int) -> int | None:
+        """Finds the first moon phase change after the passed in time in O(log(n)) time.
+
+        Parameters
+        ---------
+            time: `int`
+                An epoch timestamp in ms.
+
+        Returns
+        ---------
+            `int | None`
+                The index of the event in self.moonCyclesCache, None if there are no events after time.
+        """
+        index = int(np.searchsorted(self.moonTimestamps, time, side="right"))
+        return index if index < len(self.moonTimestamps) else None
+
+    def getMoonPhaseEvents(
+        self, startIndex: int, phases: list[str], count: int | None = None
+    ) -> list[tuple[int, dict[str, any]]]:
+        """Gets the changes to any of the passed in phases from self.moonCyclesCache starting at
+        startIndex, using the per phase index arrays rather than checking every event.
+
+        Parameters
+        ---------
+            startIndex: `int`
+                The index in self.moonCyclesCache of the first event that can be included.
+            phases: `list[str]`
+                The phases to include, as they appear in MOON_PHASES.
+            count: `int` *(optional)*
+                The max number of events to return. Defaults to all of them.
+
+        Returns
+        ---------
+            `list[tuple[int, dict[str, any]]]`
+                The chronologically ordered events from self.moonCyclesCache, not copies.
+        """
+        indices = np.sort(
+            np.concatenate(
+                [np.empty(0, dtype=np.int64)]
+                + [
+                    phaseIndices[np.searchsorted(phaseIndices, startIndex) :]
+                    for phase, phaseIndices in self.moonPhaseIndices.items()
+                    if phase in phases
+                ]
+            )
+        )
+        if count is not None:
+            indices = indices[:count]
+        return [self.moonCyclesCache[i] for i in indices]
 
-    def updateRefTimes(self) -> None:
-        """Parses newRefTimes.json which may contain more recent reference times for the orbs.
-        Screens new reference times to make sure they're within an expected range and updates the variables
-        and variables.json file to reflect the new valid reference times.
+    def updateRefTimes(self) -> list[str]:
+        """Parses the new reference times in self.store (newRefTimes.json for a FileStore) which may contain
+        more recent reference times for the orbs. Screens new reference times to make sure they're within an
+        expected range and updates the variables in memory and in self.store to reflect the new valid
+        reference times.
+
+        Returns
+        ---------
+            `list[str]`
+            The names of the orbs (using "candle" for the white orb) whose reference time or offset changed.
         """
-        newVars: dict[str, list[int]] = {}
-        with self.newRefTimeFile.open("r") as f:
-            newVars = json.load(f)
+        changedOrbs = []
+        newVars: dict[str, list[int]] = self.store.loadNewRefTimes() or {}
+        # the published variables are never changed, the new ones are published at once
+        variables = copy.deepcopy(self.v)
 
         for orb in newVars:
             compOrb = orb if orb != "white" else "candle"
             # Check if current ref time is most recent refTime and check that it's within an expected alignment time range
             if (
-                self.v[compOrb]["refTime"]
+                variables[compOrb]["refTime"]
                 != (newVars[orb][0] + newVars[orb][1] - 500) / 2
             ) and self.checkValidRefTime(orb, newVars[orb]):
                 # average two times then subtract the total average time the events are off by
@@ -820,22 +2855,23 @@ class Ephemeris:
                 )
                 if refOffset == 360:
                     refOffset = 0
+                if (
+                    variables[orb]["refTime"] != eventTime
+                    or variables[orb]["refOffset"] != refOffset
+                ):
+                    changedOrbs.append(orb)
                 # update variables
-                self.v[orb]["refTime"] = eventTime
-                self.v[orb]["refOffset"] = refOffset
+                variables[orb]["refTime"] = eventTime
+                variables[orb]["refOffset"] = refOffset
         # reset arrays used to calculate events
-        self.periods = self.getPeriods()
-        self.radii = self.getRadii()
-        self.refTimes = self.getRefTimes()
-        self.refOffsets = self.getRefOffsets()
-        self.setRefPositions()
-        self.refPositions = self.getRefPositions()
+        self.setVariables(variables)
         # Update the variables file to match the new refTimes
         self.updateVariables()
+        return changedOrbs
 
     def checkValidRefTime(self, orb: str, refTimes: list[int]) -> bool:
-        """Creates a small scroll event cache overlapping the first refTime in order to check if
-        that refTime is within an expected range for that event to happen.
+        """Checks the orb's state 15 seconds either side of both refTimes in order to check if
+        the refTimes are within an expected range for the events to happen.
 
         Parameters
         ---------
@@ -850,35 +2886,24 @@ class Ephemeris:
             `bool`
             True if the refTimes[0] is a valid reference time.
         """
-        startRange = self.getScrollEventsInRange(
-            startTime=refTimes[0] - 15000, endTime=refTimes[0] + 15000
-        )
-        endRange = self.getScrollEventsInRange(
-            startTime=refTimes[1] - 15000, endTime=refTimes[1] + 15000
-        )
-        if len(startRange) == 0 or len(endRange) == 0:
-            return False
         orb = orb.capitalize()
+        orbBit = ORB_BITS[orb]
+        shadowBit = ORB_BITS["Shadow"]
         # white orb position is determined from darks rather than glows
-        validStart = False
-        validEnd = False
-        if orb == "White":
-            for event in startRange:
-                if orb in event["newDarks"]:
-                    validStart = True
-        else:
-            for event in startRange:
-                if orb in event["newGlows"]:
-                    validStart = True
-        if validStart == True:
-            for event in endRange:
-                if orb in event["returnedToNormal"]:
-                    validEnd = True
+        startState = orbBit | (shadowBit if orb == "White" else 0)
+        startMask = orbBit | shadowBit
+        before = self.getAlignmentMaskAt(refTimes[0] - 15000) & startMask
+        after = self.getAlignmentMaskAt(refTimes[0] + 15000) & startMask
+        validStart = before != startState and after == startState
+        validEnd = (
+            self.getAlignmentMaskAt(refTimes[1] - 15000) & orbBit != 0
+            and self.getAlignmentMaskAt(refTimes[1] + 15000) & orbBit == 0
+        )
         # print("Orb:", orb, (validStart and validEnd))
-        return validStart and validEnd
+        return bool(validStart and validEnd)
 
     def createLunarCalendar(
-        self, startTime: int, numMoonCycles: int
+        self, startTime: int, numMoonCycles: int, analytic: bool = True
     ) -> list[tuple[int, dict[str, any]]]:
         """Creates a chronologically ordered `list` of `tuples` that each
         contain information about a moon phase change.
@@ -889,6 +2914,9 @@ class Ephemeris:
                 The epoch time in ms for which events after will recorded
             numMoonCycles: `int`
                 The number of events for each phase that will be recorded
+            analytic: `bool` *(optional)*
+                When set to true the phase changes are solved for with `solveLunarCalendar`
+                rather than by stepping through each day. Defaults to True.
 
         Returns
         ---------
@@ -898,6 +2926,8 @@ class Ephemeris:
         """
         if numMoonCycles == 0:
             return []
+        if analytic:
+            return self.solveLunarCalendar(startTime, numMoonCycles)
 
         # 8 phases in one moon cycle plus almost full and almost new
         numEvents = numMoonCycles * 10
@@ -992,6 +3022,61 @@ class Ephemeris:
         # print(tempCache)
         return tempCache
 
+    def solveLunarCalendar(
+        self, startTime: int, numMoonCycles: int
+    ) -> list[tuple[int, dict[str, any]]]:
+        """Creates the same moon phase changes as `createLunarCalendar` in one vectorized pass.
+        The position of the shadow orb relative to the white orb increases linearly with time, so the
+        times it crosses 0, 90, 180 and 270 degrees (new, first quarter, full and third quarter) are
+        solved for directly and moved to the noon that starts the night of the crossing.
+
+        Parameters
+        ---------
+            startTime: `int`
+                The epoch time in ms for which events after will recorded
+            numMoonCycles: `int`
+                The number of events for each phase that will be recorded
+
+        Returns
+        ---------
+            `list[tuple[int, dict[str, any]]]`
+                A `list` of `tuples` containing the epoch time at which the moon phase change happens and
+                a dictionary containing the name of the new phase and a discord timestamp for the event.
+        """
+        if numMoonCycles == 0:
+            return []
+        firstNoon = self.getLastNoonTime(startTime)
+        startPos = (
+            self.getShadowPos(firstNoon) - self.getWhitePos(firstNoon) + 360
+        ) % 360
+        # degrees per ms that the shadow orb gains on the white orb
+        rate = 360 / self.v["shadow"]["period"] - 360 / self.periods[0]
+        # each primary phase is the next multiple of 90 degrees, 5 per cycle to match createLunarCalendar
+        quarters = np.floor(startPos / 90) + 1 + np.arange(numMoonCycles * 5)
+        crossingTimes = (quarters * 90 - startPos) / rate
+        # the phase starts at the last noon before the crossing
+        days = np.ceil(crossingTimes / self.oneAberothDay).astype(np.int64) - 1
+        noons = (firstNoon + days * self.oneAberothDay).tolist()
+        # primary phases have even indices in MOON_PHASES and are followed by the next phase a day later
+        phases = (quarters.astype(np.int64) % 4 * 2).tolist()
+
+        tempCache = []
+        for noon, phase in zip(noons, phases):
+            for timestamp, phaseIndex in (
+                (noon, phase),
+                (noon + self.oneAberothDay, phase + 1),
+            ):
+                tempCache.append(
+                    (
+                        timestamp,
+                        {
+                            "phase": MOON_PHASES[phaseIndex],
+                            "discordTS": f"<t:{int(np.floor(timestamp/1000))}:D> <t:{int(np.floor(timestamp/1000))}:t>",
+                        },
+                    )
+                )
+        return tempCache
+
     def getLastNoonTime(self, time: int) -> int:
         """Gets the time at which noon last occurred in aberoth relative to the passed in time.
 
@@ -1020,10 +3105,10 @@ class Ephemeris:
             `float`
                 The position of the white orb in degrees at the given time.
         """
-        position = (
-            (360 / self.periods[0]) * (time - self.refTimes[0]) + self.refPositions[0]
-        ) % 360
-        return position
+        position = OrbitalKernel.getPhaseAngles(
+            time, self.periods[0], self.refTimes[0], self.refPositions[0]
+        )
+        return float(position)
 
 
 def formatTime(milliseconds: int) -> str:
@@ -1047,22 +3132,3 @@ def formatTime(milliseconds: int) -> str:
     ms = milliseconds % 1000
     # Return formatted time string
     return f"{hours:.0f}h {minutes:.0f}m {seconds:.0f}s {ms}ms"
-
-
-if __name__ == "__main__":
-    startTime = time.time_ns() // 1_000_000
-    ephermis = Ephemeris(
-        start=round((time.time() * 1000) + -4 * 86400000),
-        end=round((time.time() * 1000) + 35 * 86400000),
-        numMoonCycles=8,
-        discordTimestamps=True,
-        multiProcess=True,
-    )
-    stopTime = time.time_ns() // 1_000_000
-    print(
-        f"{ephermis.numCores} cores; Execution time: {formatTime(stopTime-startTime)}"
-    )
-    # import timeit
-    # execution_time = timeit.timeit("Ephemeris(start=round((time.time() * 1000) - 0 * 86400000), end=round((time.time() * 1000) + 35 * 86400000), numMoonCycles=8, multiProcess=False)", globals=globals(), number=10)
-
-    # print(execution_time/10)
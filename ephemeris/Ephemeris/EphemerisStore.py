@@ -0,0 +1,158 @@
+import json
+import numpy as np
+from pathlib import Path
+from .EventStore import saveEventStore, loadEventStore
+
+
+class EphemerisStore:
+    """The interface an Ephemeris persists its variables and events through. Events are saved under
+    names such as "cache", "moonCache", "checkpoints/scroll-<start>-<stop>" and
+    "segments/segment-<index>". This base store keeps nothing, subclasses decide where things go.
+    """
+
+    def loadVariables(self) -> dict[str, dict] | None:
+        """Loads the orb variables.
+
+        Returns
+        ---------
+            `dict[str, dict] | None`
+                The orb variables in the variables.json layout, None if the store has none.
+        """
+        return None
+
+    def saveVariables(self, variables: dict[str, dict]) -> None:
+        """Saves the orb variables.
+
+        Parameters
+        ---------
+            variables: `dict[str, dict]`
+                The orb variables in the variables.json layout.
+        """
+
+    def loadNewRefTimes(self) -> dict[str, list[int]] | None:
+        """Loads the reference times reported since the variables were last updated.
+
+        Returns
+        ---------
+            `dict[str, list[int]] | None`
+                The two epoch times in ms of the latest reported alignment of each orb,
+                None if the store has none.
+        """
+        return None
+
+    def loadEvents(self, name: str) -> tuple[dict, np.ndarray] | None:
+        """Loads saved events.
+
+        Parameters
+        ---------
+            name: `str`
+                The name the events were saved under.
+
+        Returns
+        ---------
+            `tuple[dict, np.ndarray] | None`
+                The header the events were saved with and the events, which may be read only.
+                None if there are no events saved under the name.
+        """
+        return None
+
+    def saveEvents(self, name: str, events: np.ndarray, header: dict) -> None:
+        """Saves events, replacing any saved under the same name.
+
+        Parameters
+        ---------
+            name: `str`
+                The name to save the events under.
+            events: `np.ndarray`
+                A structured array of events, e.g. with the EVENT_DTYPE or MOON_DTYPE layout.
+            header: `dict`
+                JSON serializable information about the events.
+        """
+
+    def removeEvents(self, name: str) -> None:
+        """Removes saved events if there are any.
+
+        Parameters
+        ---------
+            name: `str`
+                The name the events were saved under.
+        """
+
+    def listEvents(self, prefix: str) -> list[str]:
+        """Lists the names saved events are kept under.
+
+        Parameters
+        ---------
+            prefix: `str`
+                The start of the names to list, e.g. "segments/segment-".
+
+        Returns
+        ---------
+            `list[str]`
+                The names of the saved events that start with prefix, in no particular order.
+        """
+        return []
+
+
+class FileStore(EphemerisStore):
+    """Keeps the variables in a JSON file and the events as binary event stores (see
+    `EventStore.saveEventStore`) in a directory, the layout the bot and web server share.
+    """
+
+    def __init__(
+        self,
+        directory: Path = Path("ephemeris/Ephemeris"),
+        newRefTimeFile: Path = Path("ephemeris/UpdateWebServer/newRefTimes.json"),
+    ) -> None:
+        self.directory = Path(directory)
+        self.variablesFile = self.directory / "variables.json"
+        self.newRefTimeFile = Path(newRefTimeFile)
+
+    def getEventsFile(self, name: str) -> Path:
+        """Gets the path of the file events are saved to.
+
+        Parameters
+        ---------
+            name: `str`
+                The name the events are saved under.
+
+        Returns
+        ---------
+            `Path`
+                The path to the event store file in self.directory.
+        """
+        return self.directory / f"{name}.bin"
+
+    def loadVariables(self) -> dict[str, dict] | None:
+        if not self.variablesFile.exists():
+            return None
+        with self.variablesFile.open("r") as json_file:
+            return json.load(json_file)
+
+    def saveVariables(self, variables: dict[str, dict]) -> None:
+        json_object = json.dumps(variables, indent=4)
+        with self.variablesFile.open("w") as outfile:
+            outfile.write(json_object)
+
+    def loadNewRefTimes(self) -> dict[str, list[int]] | None:
+        if not self.newRefTimeFile.exists():
+            return None
+        with self.newRefTimeFile.open("r") as f:
+            return json.load(f)
+
+    def loadEvents(self, name: str) -> tuple[dict, np.ndarray] | None:
+        return loadEventStore(self.getEventsFile(name))
+
+    def saveEvents(self, name: str, events: np.ndarray, header: dict) -> None:
+        fileLoc = self.getEventsFile(name)
+        fileLoc.parent.mkdir(parents=True, exist_ok=True)
+        saveEventStore(fileLoc, events, header)
+
+    def removeEvents(self, name: str) -> None:
+        self.getEventsFile(name).unlink(missing_ok=True)
+
+    def listEvents(self, prefix: str) -> list[str]:
+        return [
+            fileLoc.relative_to(self.directory).with_suffix("").as_posix()
+            for fileLoc in self.directory.glob(f"{prefix}*.bin")
+        ]
@@ -0,0 +1,103 @@
+import json
+import os
+import numpy as np
+from pathlib import Path
+
+# layout of each stored event, the glows, darks and normals fields are bitmasks of the orbs
+# that changed state with bit i corresponding to ORB_NAMES[i] in OrbitalKernel.py and state is
+# the bitmask of every aligned orb after the event. pairs is the bitmask of the orb pairs that
+# moved into or out of alignment at the event, bit k corresponding to pair k of PAIR_A and PAIR_B
+EVENT_DTYPE = np.dtype(
+    [
+        ("timestamp", "<i8"),
+        ("glows", "<u2"),
+        ("darks", "<u2"),
+        ("normals", "<u2"),
+        ("state", "<u2"),
+        ("pairs", "<u8"),
+    ]
+)
+# layout of each stored moon phase change, phase is an index into MOON_PHASES in Ephemeris.py
+MOON_DTYPE = np.dtype([("timestamp", "<i8"), ("phase", "u1")])
+# the header is padded to a fixed size so the events start on a page boundary
+HEADER_SIZE = 4096
+MAGIC = b"EPHEMERIS-EVENTS"
+VERSION = 1
+
+
+def saveEventStore(fileLoc: Path, events: np.ndarray, header: dict) -> None:
+    """Atomically writes events to a binary event store. The file starts with a fixed size
+    JSON header followed by the raw event records so it can be memory-mapped without parsing.
+
+    Parameters
+    ---------
+        fileLoc: `Path`
+            The path to the file the events will be saved to.
+        events: `np.ndarray`
+            A structured array of events, e.g. with the EVENT_DTYPE or MOON_DTYPE layout.
+        header: `dict`
+            JSON serializable information about the events, e.g. the parameter fingerprint
+            and time range used to create them.
+    """
+    fileLoc = Path(fileLoc)
+    events = np.ascontiguousarray(events)
+    headerBytes = (
+        MAGIC
+        + b"\n"
+        + json.dumps(
+            {
+                **header,
+                "version": VERSION,
+                "count": len(events),
+                "dtype": events.dtype.descr,
+            }
+        ).encode()
+    )
+    if len(headerBytes) >= HEADER_SIZE:
+        print("Event store header is too large, events were not saved")
+        return
+    # write to a temporary file and swap it in so readers never see a partially written store
+    tempLoc = fileLoc.with_name(fileLoc.name + ".tmp")
+    with tempLoc.open("wb") as outfile:
+        outfile.write(headerBytes.ljust(HEADER_SIZE - 1) + b"\n")
+        outfile.write(events.tobytes())
+        outfile.flush()
+        os.fsync(outfile.fileno())
+    os.replace(tempLoc, fileLoc)
+
+
+def loadEventStore(fileLoc: Path) -> tuple[dict, np.ndarray] | None:
+    """Memory-maps the events of a binary event store written by `saveEventStore`.
+
+    Parameters
+    ---------
+        fileLoc: `Path`
+            The path to the event store file.
+
+    Returns
+    ---------
+        `tuple[dict, np.ndarray] | None`
+            The store's header and a read only structured array of its events with the layout
+            they were saved with. None if the file doesn't exist or isn't a compatible event store.
+    """
+    fileLoc = Path(fileLoc)
+    if not fileLoc.exists():
+        return None
+    with fileLoc.open("rb") as infile:
+        headerBytes = infile.read(HEADER_SIZE)
+    if not headerBytes.startswith(MAGIC + b"\n") or len(headerBytes) < HEADER_SIZE:
+        return None
+    header = json.loads(headerBytes[len(MAGIC) + 1 :])
+    if header.get("version") != VERSION:
+        return None
+    dtype = np.dtype([tuple(field) for field in header["dtype"]])
+    if header["count"] == 0:
+        return header, np.empty(0, dtype=dtype)
+    events = np.memmap(
+        fileLoc,
+        dtype=dtype,
+        mode="r",
+        offset=HEADER_SIZE,
+        shape=(header["count"],),
+    )
+    return header, events
@@ -0,0 +1,1525 @@
+import numpy as np
+import threading
+from typing import NamedTuple
+from concurrent.futures import ProcessPoolExecutor
+from .EventStore import EVENT_DTYPE
+
+# Orb ordering shared by alignment state arrays and their packed bitmasks,
+# bit i of a packed alignment mask corresponds to ORB_NAMES[i]
+ORB_NAMES = [
+    "Shadow",
+    "White",
+    "Black",
+    "Green",
+    "Red",
+    "Purple",
+    "Yellow",
+    "Cyan",
+    "Blue",
+]
+# every unordered pair of orbs (PAIR_A[k] < PAIR_B[k]) in the same order that
+# calcAlignmentDifs compares them
+PAIR_A, PAIR_B = np.triu_indices(len(ORB_NAMES), k=1)
+# the packed alignment mask contribution of each pair when the pair is aligned
+PAIR_BITS = (np.left_shift(1, PAIR_A) | np.left_shift(1, PAIR_B)).astype(np.uint16)
+# the bit of each pair in a packed pair mask, bit k corresponds to PAIR_A[k] and PAIR_B[k]
+PAIR_MASK_BITS = np.left_shift(np.uint64(1), np.arange(len(PAIR_A), dtype=np.uint64))
+# the bit of each orb in a packed mask
+ORB_BITS = {name: 1 << i for i, name in enumerate(ORB_NAMES)}
+# number of distinct packed alignment masks
+NUM_MASKS = 1 << len(ORB_NAMES)
+# the names of the orbs in every packed mask, in ORB_NAMES order
+MASK_ORB_NAMES = tuple(
+    tuple(name for name, bit in ORB_BITS.items() if mask & bit)
+    for mask in range(NUM_MASKS)
+)
+
+# number of steps each orb pair samples ahead per iteration of the threshold crossing search
+LOOKAHEAD_STEPS = 8
+# number of steps a phasor is rotated along a uniform time grid before it is recalculated
+# from its exact angle, bounds the rounding error built up by repeated rotations
+PHASOR_ANCHOR_STEPS = 32
+
+# worker processes shared by every multi-process build in this process, created on first use
+workerPool = None
+workerPoolSize = 0
+workerPoolLock = threading.Lock()
+# the (glows, darks, normals) masks of every (previous mask, mask) pair, created on first use
+transitionTable = None
+
+
+class OrbitalParams(NamedTuple):
+    """The orbital parameters and step sizes needed to calculate scroll events. This is the only
+    data sent to worker processes, the candle and orb values are indexed the same as
+    Ephemeris.periods."""
+
+    periods: tuple[int, ...]
+    radii: tuple[float, ...]
+    refTimes: tuple[int, ...]
+    refPositions: tuple[float, ...]
+    shadowPeriod: int
+    shadowRefTime: int
+    shadowRefOffset: float
+    pairThresholds: tuple[float, ...]
+    refineIncrement: int
+    batchSize: int
+    minimumStep: int
+    rootPrecision: int
+
+
+class EnsembleParams(NamedTuple):
+    """Perturbed copies of the measured periods and reference times, one row per ensemble member.
+    The candle and orb columns are indexed the same as OrbitalParams.periods, everything not held
+    here is shared with the OrbitalParams the ensemble was created from."""
+
+    periods: np.ndarray[np.int64]
+    refTimes: np.ndarray[np.int64]
+    refPositions: np.ndarray[float]
+    shadowPeriods: np.ndarray[np.int64]
+    shadowRefTimes: np.ndarray[np.int64]
+
+
+def getWorkerPool(numCores: int) -> ProcessPoolExecutor:
+    """Gets the process pool used for multi-process builds, creating it the first time it's needed
+    or when the requested number of workers changes. Safe to call from several threads, they all
+    share the same pool.
+
+    Parameters
+    ---------
+        numCores: `int`
+            The number of worker processes.
+
+    Returns
+    ---------
+        `ProcessPoolExecutor`
+            A pool that is kept alive between builds.
+    """
+    global workerPool, workerPoolSize
+    with workerPoolLock:
+        if workerPool is None or workerPoolSize != numCores:
+            if workerPool is not None:
+                # work already queued on the old pool still completes
+                workerPool.shutdown(wait=False)
+            # each worker builds the transition table as it starts rather than on its first event
+            workerPool = ProcessPoolExecutor(
+                max_workers=numCores, initializer=getTransitionTable
+            )
+            workerPoolSize = numCores
+        return workerPool
+
+
+def shutdownWorkerPool(pool: ProcessPoolExecutor) -> None:
+    """Shuts down a pool returned by `getWorkerPool` that broke because a worker died, the next
+    call to `getWorkerPool` creates a new one. Every future of a broken pool has already failed,
+    so no other build loses its work. A pool that has already been replaced is left alone.
+
+    Parameters
+    ---------
+        pool: `ProcessPoolExecutor`
+            The pool to shut down.
+    """
+    global workerPool, workerPoolSize
+    with workerPoolLock:
+        if pool is not workerPool:
+            return
+        workerPool = None
+        workerPoolSize = 0
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def getPhaseAngles(
+    times: np.ndarray[int],
+    periods: np.ndarray[int],
+    refTimes: np.ndarray[int],
+    refAngles: np.ndarray[float],
+) -> np.ndarray[float]:
+    """Calculates the angles of bodies rotating at a constant rate. The time elapsed since each
+    reference time is reduced modulo the period in int64 before it is scaled to degrees, so the
+    angles don't lose precision as reference times get older.
+
+    Parameters
+    ---------
+        times: `np.ndarray[int]`
+            Epoch timestamps in ms, broadcastable with periods, refTimes, and refAngles.
+        periods: `np.ndarray[int]`
+            The time in ms each body takes to complete a full rotation.
+        refTimes: `np.ndarray[int]`
+            The epoch timestamps in ms at which each body is at its reference angle.
+        refAngles: `np.ndarray[float]`
+            The angle in degrees of each body at its reference time.
+
+    Returns
+    ---------
+        `np.ndarray[float]`
+            The angle in degrees in [0, 360) of each body at each time.
+    """
+    periods = np.asarray(periods, dtype=np.int64)
+    elapsed = np.mod(
+        np.asarray(times, dtype=np.int64) - np.asarray(refTimes, dtype=np.int64),
+        periods,
+    )
+    angles = elapsed * (360 / periods) + np.asarray(refAngles, dtype=np.float64)
+    return angles % 360
+
+
+def getShadowPos(params: OrbitalParams, times: np.ndarray[int]) -> np.ndarray[float]:
+    """Calculates the position of the shadow orb (moon equivalent) relative to
+    the candle (earth equivalent) at each of the passed in times.
+
+    Parameters
+    ---------
+        params: `OrbitalParams`
+            The orbital parameters to use.
+        times: `np.ndarray[int]`
+            An array of epoch timestamps in ms.
+
+    Returns
+    ---------
+        `np.ndarray[float]`
+            The position of the shadow orb in degrees at each time.
+    """
+    return getPhaseAngles(
+        times,
+        params.shadowPeriod,
+        params.shadowRefTime,
+        params.shadowRefOffset,
+    )
+
+
+def posRelCandleBatch(
+    params: OrbitalParams,
+    times: np.ndarray[int],
+    orbs: np.ndarray[int] | None = None,
+) -> np.ndarray[float]:
+    """Gets the position of each orb relative to the candle at each of the passed in times.
+
+    Parameters
+    ---------
+        params: `OrbitalParams`
+            The orbital parameters to use.
+        times: `np.ndarray[int]`
+            An array of N epoch timestamps in ms at which the orb positions are retrieved.
+        orbs: `np.ndarray[int]` *(optional)*
+            The M indices (into ORB_NAMES) of the orbs to get the positions of. Defaults to all orbs.
+
+    Returns
+    ---------
+        `np.ndarray[float]`
+            An (N, M) array where row n holds the position of each orb relative to the candle at times[n].
+    """
+    times = np.asarray(times)
+    orbs = np.arange(len(ORB_NAMES)) if orbs is None else np.asarray(orbs)
+    periods = np.asarray(params.periods)
+    radii = np.asarray(params.radii)
+    refTimes = np.asarray(params.refTimes)
+    refPositions = np.asarray(params.refPositions)
+    # the candle and the orbs that orbit white, indexed the same as params.periods
+    bodies = np.concatenate(([0], orbs[orbs > 1] - 1))
+    # positions relative to white for every time, candle in column 0
+    rw = getPhaseAngles(
+        times[:, np.newaxis],
+        periods[bodies],
+        refTimes[bodies],
+        refPositions[bodies],
+    )
+    rw[:, 0] = (rw[:, 0] + 180) % 360
+
+    positions = np.empty((len(times), len(orbs)))
+    positions[:, orbs == 0] = getShadowPos(params, times)[:, np.newaxis]
+    positions[:, orbs == 1] = ((rw[:, 0] + 180) % 360)[:, np.newaxis]
+    # note candle implicitly has a radius of 1, or 1 AU and planet radii are in AU
+    candlePos = np.radians(rw[:, :1])
+    x = radii[bodies[1:]] * np.cos(np.radians(rw[:, 1:])) - np.cos(candlePos)
+    y = radii[bodies[1:]] * np.sin(np.radians(rw[:, 1:])) - np.sin(candlePos)
+    positions[:, orbs > 1] = (np.degrees(np.arctan2(y, x))) % 360
+    return positions
+
+
+def posRelCandleElementwise(
+    params: OrbitalParams, times: np.ndarray[int], orbs: np.ndarray[int]
+) -> np.ndarray[float]:
+    """Gets the position of orbs[n] relative to the candle at times[n] for every n, without
+    calculating the positions of any other orbs.
+
+    Parameters
+    ---------
+        params: `OrbitalParams`
+            The orbital parameters to use.
+        times: `np.ndarray[int]`
+            An array of N epoch timestamps in ms.
+        orbs: `np.ndarray[int]`
+            An array of N indices (into ORB_NAMES) of the orbs to get the positions of.
+
+    Returns
+    ---------
+        `np.ndarray[float]`
+            An array of N positions in degrees.
+    """
+    times = np.asarray(times)
+    orbs = np.asarray(orbs)
+    periods = np.asarray(params.periods)
+    radii = np.asarray(params.radii)
+    refTimes = np.asarray(params.refTimes)
+    refPositions = np.asarray(params.refPositions)
+    # bodies indexed the same as params.periods, the shadow and white rows use the candle's values
+    bodies = np.maximum(orbs - 1, 0)
+    candlePos = getPhaseAngles(times, periods[0], refTimes[0], refPositions[0] + 180)
+    bodyPos = getPhaseAngles(
+        times, periods[bodies], refTimes[bodies], refPositions[bodies]
+    )
+    x = radii[bodies] * np.cos(np.radians(bodyPos)) - np.cos(np.radians(candlePos))
+    y = radii[bodies] * np.sin(np.radians(bodyPos)) - np.sin(np.radians(candlePos))
+    positions = np.degrees(np.arctan2(y, x)) % 360
+    positions = np.where(orbs == 1, (candlePos + 180) % 360, positions)
+    return np.where(orbs == 0, getShadowPos(params, times), positions)
+
+
+def rotatePhasors(
+    startAngles: np.ndarray[float], stepAngles: np.ndarray[float], numSteps: int
+) -> np.ndarray[complex]:
+    """Propagates unit phasors that rotate by a constant angle every step. Rather than calculating
+    cos and sin at every step each phasor is multiplied by its rotation per step, and is
+    re-anchored to its exact angle every PHASOR_ANCHOR_STEPS steps.
+
+    Parameters
+    ---------
+        startAngles: `np.ndarray[float]`
+            The N starting angles in degrees.
+        stepAngles: `np.ndarray[float]`
+            The N angles in degrees each phasor rotates by per step.
+        numSteps: `int`
+            The number of steps to propagate the phasors for.
+
+    Returns
+    ---------
+        `np.ndarray[complex]`
+            An (N, numSteps) array where element [n, k] is the unit phasor at
+            startAngles[n] + (k + 1) * stepAngles[n].
+    """
+    startAngles = np.asarray(startAngles)
+    stepAngles = np.asarray(stepAngles)
+    blockSize = min(numSteps, PHASOR_ANCHOR_STEPS)
+    anchorSteps = np.arange(0, numSteps, blockSize)
+    anchors = np.exp(
+        1j
+        * np.radians(
+            (startAngles[:, np.newaxis] + stepAngles[:, np.newaxis] * anchorSteps) % 360
+        )
+    )
+    # rotations by 1 to blockSize steps, applied to the anchor at the start of each block
+    rotations = np.cumprod(
+        np.repeat(
+            np.exp(1j * np.radians(stepAngles % 360))[:, np.newaxis], blockSize, axis=1
+        ),
+        axis=1,
+    )
+    phasors = anchors[:, :, np.newaxis] * rotations[:, np.newaxis, :]
+    return phasors.reshape(len(startAngles), -1)[:, :numSteps]
+
+
+def directionsRelCandleGrid(
+    params: OrbitalParams,
+    startTimes: np.ndarray[int],
+    steps: np.ndarray[int],
+    numSteps: int,
+    orbs: np.ndarray[int],
+) -> np.ndarray[complex]:
+    """Gets the direction of each orb from the candle along a uniform time grid per orb by
+    rotating the phasors of the orb, candle, and shadow rather than recalculating their positions.
+    The position in degrees of an orb is the angle of its direction.
+
+    Parameters
+    ---------
+        params: `OrbitalParams`
+            The orbital parameters to use.
+        startTimes: `np.ndarray[int]`
+            The N epoch timestamps in ms that each grid starts at.
+        steps: `np.ndarray[int]`
+            The N step sizes in ms of each grid.
+        numSteps: `int`
+            The number of steps taken along each grid, the start times themselves aren't included.
+        orbs: `np.ndarray[int]`
+            The N indices (into ORB_NAMES) of the orb followed along each grid.
+
+    Returns
+    ---------
+        `np.ndarray[complex]`
+            An (N, numSteps) array where element [n, k] is the direction of orbs[n] from the candle
+            at startTimes[n] + (k + 1) * steps[n] as a complex number.
+    """
+    startTimes = np.asarray(startTimes)
+    steps = np.asarray(steps)
+    orbs = np.asarray(orbs)
+    periods = np.asarray(params.periods)
+    refTimes = np.asarray(params.refTimes)
+    refPositions = np.asarray(params.refPositions)
+    # bodies indexed the same as params.periods, the shadow and white rows use the candle's values
+    bodies = np.maximum(orbs - 1, 0)
+    isShadow = orbs == 0
+    # the candle's phasor for every grid followed by each orb's, all rotated together
+    numGrids = len(orbs)
+    periods = np.concatenate(
+        (
+            np.full(numGrids, periods[0]),
+            np.where(isShadow, params.shadowPeriod, periods[bodies]),
+        )
+    )
+    refTimes = np.concatenate(
+        (
+            np.full(numGrids, refTimes[0]),
+            np.where(isShadow, params.shadowRefTime, refTimes[bodies]),
+        )
+    )
+    refAngles = np.concatenate(
+        (
+            np.full(numGrids, refPositions[0] + 180),
+            np.where(isShadow, params.shadowRefOffset, refPositions[bodies]),
+        )
+    )
+    candle, phasors = rotatePhasors(
+        getPhaseAngles(np.tile(startTimes, 2), periods, refTimes, refAngles),
+        getPhaseAngles(np.tile(steps, 2), periods, 0, 0),
+        numSteps,
+    ).reshape(2, numGrids, numSteps)
+    radii = np.asarray(params.radii)[bodies, np.newaxis]
+    # white is seen in the opposite direction of the candle's position around white
+    return np.where(
+        isShadow[:, np.newaxis],
+        phasors,
+        np.where((orbs == 1)[:, np.newaxis], -candle, radii * phasors - candle),
+    )
+
+
+def getPairMargins(
+    params: OrbitalParams,
+    times: np.ndarray[int],
+    pairs: np.ndarray[int] | None = None,
+    elementwise: bool = False,
+) -> np.ndarray[float]:
+    """Calculates how far each orb pair is from its alignment threshold at each of the passed in times.
+
+    Parameters
+    ---------
+        params: `OrbitalParams`
+            The orbital parameters to use.
+        times: `np.ndarray[int]`
+            An array of N epoch timestamps in ms at which the pair margins are calculated.
+        pairs: `np.ndarray[int]` *(optional)*
+            The P indices (into PAIR_A and PAIR_B) of the pairs to calculate the margins of.
+            Only the positions of the orbs in these pairs are calculated. Defaults to all 36 pairs.
+        elementwise: `bool` *(optional)*
+            When set to true times and pairs must be the same length and only the margin of
+            pairs[n] at times[n] is calculated. Defaults to False.
+
+    Returns
+    ---------
+        `np.ndarray[float]`
+            An (N, P) array where element [n, k] is the angular difference in degrees between the
+            orbs of pairs[k] minus the pair's alignment threshold at times[n], or an array of N margins
+            when elementwise is set. Negative values indicate that the pair is aligned.
+    """
+    if pairs is None:
+        pairs = np.arange(len(PAIR_A))
+    pairs = np.asarray(pairs)
+    if elementwise:
+        times = np.asarray(times)
+        positions = posRelCandleElementwise(
+            params,
+            np.concatenate((times, times)),
+            np.concatenate((PAIR_A[pairs], PAIR_B[pairs])),
+        ).reshape(2, -1)
+        # difference between each orb pair, with opposite alignments folded onto same side ones
+        difs = np.abs(positions[1] % 180 - positions[0] % 180)
+    else:
+        orbs, orbColumns = np.unique(
+            np.concatenate((PAIR_A[pairs], PAIR_B[pairs])), return_inverse=True
+        )
+        pairA, pairB = orbColumns.reshape(2, -1)
+        # difference between every orb pair, with opposite alignments folded onto same side ones
+        positions = posRelCandleBatch(params, times, orbs) % 180
+        difs = np.abs(positions[:, pairB] - positions[:, pairA])
+    difs = np.where(difs > 90, 180 - difs, difs)
+    return difs - np.asarray(params.pairThresholds)[pairs]
+
+
+def getMaxPairRates(params: OrbitalParams) -> np.ndarray[float]:
+    """Calculates an upper bound on how fast the margin of each orb pair can change. An orb at
+    radius r orbiting white with angular velocity w, seen from the candle at radius 1 with angular
+    velocity wc, moves across the candle's sky no faster than (r * w + wc) / |r - 1|.
+
+    Parameters
+    ---------
+        params: `OrbitalParams`
+            The orbital parameters to use.
+
+    Returns
+    ---------
+        `np.ndarray[float]`
+            The max rate in degrees per ms at which the margin of each of the 36 pairs can change,
+            indexed the same as PAIR_A and PAIR_B.
+    """
+    angularVelocities = 360 / np.abs(np.asarray(params.periods, dtype=float))
+    radii = np.asarray(params.radii, dtype=float)
+    orbRates = np.empty(len(ORB_NAMES))
+    orbRates[0] = 360 / abs(params.shadowPeriod)
+    # white is seen from the candle so it moves at the candle's angular velocity
+    orbRates[1] = angularVelocities[0]
+    with np.errstate(divide="ignore"):
+        orbRates[2:] = (
+            radii[1:] * angularVelocities[1:] + angularVelocities[0]
+        ) / np.abs(radii[1:] - 1)
+    # margins fold the pair's angular difference so they can't change faster than both orbs' rates
+    return orbRates[PAIR_A] + orbRates[PAIR_B]
+
+
+def getAlignmentMasks(
+    params: OrbitalParams, times: np.ndarray[int]
+) -> np.ndarray[np.uint16]:
+    """Determines the alignment state of every orb at each of the passed in times and
+    packs the states of each time into a single bitmask.
+
+    Parameters
+    ---------
+        params: `OrbitalParams`
+            The orbital parameters to use.
+        times: `np.ndarray[int]`
+            An array of N epoch timestamps in ms at which the alignment states are calculated.
+
+    Returns
+    ---------
+        `np.ndarray[np.uint16]`
+            An array of N bitmasks where bit i of element n is set when ORB_NAMES[i]
+            is aligned with any other orb at times[n].
+    """
+    # an orb is aligned if any pair it is a part of is within the pair's threshold
+    return np.bitwise_or.reduce(
+        np.where(getPairMargins(params, times) < 0, PAIR_BITS, 0), axis=1
+    ).astype(np.uint16)
+
+
+def calcTransitions(
+    previousMasks: np.ndarray[np.uint16], masks: np.ndarray[np.uint16]
+) -> tuple[np.ndarray[np.uint16], np.ndarray[np.uint16], np.ndarray[np.uint16]]:
+    """Determines which orbs begin to glow, go dark, or return to normal at each alignment change
+    from the bits of the masks, used to build the table `classifyTransitions` looks changes up in.
+
+    Parameters
+    ---------
+        previousMasks: `np.ndarray[np.uint16]`
+            The packed alignment masks before each change.
+        masks: `np.ndarray[np.uint16]`
+            The packed alignment masks after each change.
+
+    Returns
+    ---------
+        `tuple[np.ndarray[np.uint16], np.ndarray[np.uint16], np.ndarray[np.uint16]]`
+            The bitmasks of the orbs that begin to glow, go dark, and return to normal for each change.
+    """
+    previousMasks = np.asarray(previousMasks, dtype=np.uint16)
+    masks = np.asarray(masks, dtype=np.uint16)
+    shadow = np.uint16(ORB_BITS["Shadow"])
+    aligned = masks & ~previousMasks
+    stillAligned = masks & previousMasks
+    normals = previousMasks & ~masks
+    # anything aligning while the shadow orb is aligned goes dark, along with the orbs that
+    # were already aligned if the shadow orb is one of the newly aligned orbs
+    newDark = (aligned != 0) & (masks & shadow != 0)
+    darks = np.where(
+        newDark,
+        aligned | np.where(previousMasks & shadow != 0, 0, stillAligned),
+        0,
+    )
+    # when alignments with the shadow orb end, the orbs that are still aligned glow again
+    shadowEnded = ~newDark & (normals & shadow != 0)
+    glows = np.where(newDark, 0, np.where(shadowEnded, aligned | stillAligned, aligned))
+    return glows.astype(np.uint16), darks.astype(np.uint16), normals
+
+
+def getTransitionTable() -> np.ndarray[np.uint16]:
+    """Gets the table of every possible alignment change, creating it the first time it's needed.
+    Also used as the initializer of the worker pool's processes.
+
+    Returns
+    ---------
+        `np.ndarray[np.uint16]`
+            A read only (3, NUM_MASKS, NUM_MASKS) array where [:, previousMask, mask] holds the
+            glows, darks, and normals bitmasks of the change from previousMask to mask.
+    """
+    global transitionTable
+    if transitionTable is None:
+        previousMasks, masks = np.indices((NUM_MASKS, NUM_MASKS), dtype=np.uint16)
+        table = np.stack(calcTransitions(previousMasks, masks))
+        table.setflags(write=False)
+        transitionTable = table
+    return transitionTable
+
+
+def classifyTransitions(
+    previousMasks: np.ndarray[np.uint16], masks: np.ndarray[np.uint16]
+) -> tuple[np.ndarray[np.uint16], np.ndarray[np.uint16], np.ndarray[np.uint16]]:
+    """Determines which orbs begin to glow, go dark, or return to normal at each alignment change
+    with a single lookup per change in the transition table.
+
+    Parameters
+    ---------
+        previousMasks: `np.ndarray[np.uint16]`
+            The packed alignment masks before each change.
+        masks: `np.ndarray[np.uint16]`
+            The packed alignment masks after each change.
+
+    Returns
+    ---------
+        `tuple[np.ndarray[np.uint16], np.ndarray[np.uint16], np.ndarray[np.uint16]]`
+            The bitmasks of the orbs that begin to glow, go dark, and return to normal for each change.
+    """
+    glows, darks, normals = getTransitionTable()[
+        :,
+        np.asarray(previousMasks, dtype=np.uint16),
+        np.asarray(masks, dtype=np.uint16),
+    ]
+    return glows, darks, normals
+
+
+def createEventRecords(
+    timestamps: np.ndarray[np.int64],
+    previousMasks: np.ndarray[np.uint16],
+    masks: np.ndarray[np.uint16],
+    pairMasks: np.ndarray[np.uint64] | None = None,
+) -> np.ndarray:
+    """Creates events from the packed alignment masks before and after each alignment change.
+
+    Parameters
+    ---------
+        timestamps: `np.ndarray[np.int64]`
+            The N epoch times in ms at which the alignment changes happen.
+        previousMasks: `np.ndarray[np.uint16]`
+            The N packed alignment masks before each change.
+        masks: `np.ndarray[np.uint16]`
+            The N packed alignment masks after each change.
+        pairMasks: `np.ndarray[np.uint64]` *(optional)*
+            The N packed masks of the pairs that crossed their thresholds at each change.
+            Defaults to no pairs.
+
+    Returns
+    ---------
+        `np.ndarray`
+            A structured array of N events with the EventStore.EVENT_DTYPE layout.
+    """
+    events = np.zeros(len(timestamps), dtype=EVENT_DTYPE)
+    events["timestamp"] = timestamps
+    events["glows"], events["darks"], events["normals"] = classifyTransitions(
+        previousMasks, masks
+    )
+    events["state"] = masks
+    if pairMasks is not None:
+        events["pairs"] = pairMasks
+    return events
+
+
+def scanScrollTimeRange(
+    params: OrbitalParams, startTime: int, stopTime: int
+) -> np.ndarray:
+    """Finds every change in scroll/alignment states by finding the threshold crossings of every
+    orb pair to the next multiple of params.refineIncrement ms (since the epoch) and evaluating the
+    alignment states at each of those steps. The steps don't depend on startTime so scans of
+    overlapping time ranges report the same events. Multi-processing friendly
+
+    Parameters
+    ---------
+        params: `OrbitalParams`
+            The orbital parameters to use.
+        startTime: `int`
+            An epoch timestamp in ms that represents the time at which calculations will start at.
+        stopTime: `int`
+            An epoch timestamp in ms that represents the time at which calculations will stop at.
+
+    Returns
+    ---------
+        `np.ndarray`
+            A chronologically ordered structured array of events with the EventStore.EVENT_DTYPE layout.
+    """
+    # Set starting state
+    lastMask = getAlignmentMasks(params, np.array([startTime]))[0]
+    # crossings between the grid step before startTime and startTime are found at the step after
+    # startTime, where the states they changed are already part of lastMask
+    crossingTimes, crossingPairs = findThresholdCrossings(
+        params,
+        startTime - startTime % params.refineIncrement,
+        stopTime,
+        precision=params.refineIncrement,
+    )
+    # the alignment states only change at the steps where a pair crossed its threshold
+    eventTimes, crossingEvents = np.unique(crossingTimes, return_inverse=True)
+    pairMasks = np.zeros(len(eventTimes), dtype=np.uint64)
+    np.bitwise_or.at(pairMasks, crossingEvents, PAIR_MASK_BITS[crossingPairs])
+    masks = np.concatenate(
+        [np.empty(0, dtype=np.uint16)]
+        + [
+            getAlignmentMasks(params, eventTimes[i : i + params.batchSize])
+            for i in range(0, len(eventTimes), params.batchSize)
+        ]
+    )
+    previousMasks = np.concatenate(([lastMask], masks[:-1])).astype(np.uint16)
+    changed = masks != previousMasks
+    return createEventRecords(
+        eventTimes[changed], previousMasks[changed], masks[changed], pairMasks[changed]
+    )
+
+
+def findNextEvent(
+    params: OrbitalParams,
+    startTime: int,
+    stopTime: int,
+    orbMask: int,
+    field: str,
+    precision: int,
+) -> np.ndarray:
+    """Finds the first event after startTime in which any of the orbs in orbMask begin to glow, go
+    dark, or return to normal. An orb's changes only depend on the pairs it's part of and the pairs
+    of the shadow orb, so only those pairs are searched and each skips ahead as far as its max rate
+    allows. The time range is searched in windows that double in length so near events are found
+    without searching far ahead.
+
+    Parameters
+    ---------
+        params: `OrbitalParams`
+            The orbital parameters to use.
+        startTime: `int`
+            The epoch time in ms that the search starts after.
+        stopTime: `int`
+            The epoch time in ms that the search stops at.
+        orbMask: `int`
+            The packed mask of the orbs to search for.
+        field: `str`
+            The change to search for, one of "glows", "darks" or "normals".
+        precision: `int`
+            Events are reported at the first multiple of precision ms after they happen.
+
+    Returns
+    ---------
+        `np.ndarray`
+            The event with the EventStore.EVENT_DTYPE layout, empty if there isn't one before stopTime.
+    """
+    fieldIndex = ("glows", "darks", "normals").index(field)
+    if not np.any(getTransitionTable()[fieldIndex] & orbMask):
+        # no alignment change can cause the event, e.g. the shadow orb never glows
+        return np.zeros(0, dtype=EVENT_DTYPE)
+    shadowMask = orbMask | ORB_BITS["Shadow"]
+    pairs = np.flatnonzero(PAIR_BITS & shadowMask != 0)
+    windowStart = startTime - startTime % precision
+    lastMask = getAlignmentMasks(params, np.array([windowStart]))[0]
+    windowLength = 86400000
+    while windowStart < stopTime:
+        windowStop = min(windowStart + windowLength, stopTime)
+        # crossings reported at windowStop belong to this window, the next one only finds later ones
+        crossingTimes, crossingPairs = findThresholdCrossings(
+            params,
+            windowStart,
+            windowStop + precision,
+            pairs=pairs,
+            precision=precision,
+        )
+        eventTimes, crossingEvents = np.unique(crossingTimes, return_inverse=True)
+        pairMasks = np.zeros(len(eventTimes), dtype=np.uint64)
+        np.bitwise_or.at(pairMasks, crossingEvents, PAIR_MASK_BITS[crossingPairs])
+        masks = getAlignmentMasks(params, eventTimes)
+        previousMasks = np.concatenate(([lastMask], masks[:-1])).astype(np.uint16)
+        events = createEventRecords(eventTimes, previousMasks, masks, pairMasks)
+        found = np.flatnonzero(
+            (events[field] & orbMask != 0)
+            & (events["timestamp"] > startTime)
+            & (events["timestamp"] < stopTime)
+        )
+        if len(found) > 0:
+            return events[found[:1]]
+        if len(masks) > 0:
+            lastMask = masks[-1]
+        windowStart = windowStop
+        windowLength = min(windowLength * 2, 32 * 86400000)
+    return np.zeros(0, dtype=EVENT_DTYPE)
+
+
+def scanScrollChunk(
+    params: OrbitalParams,
+    chunkStart: int,
+    chunkStop: int,
+    overlap: int,
+    rangeStart: int,
+    rangeStop: int,
+) -> np.ndarray:
+    """Finds the changes in scroll/alignment states within one chunk of a longer time range. The scan
+    starts overlap ms before the chunk and stops overlap ms after it (but stays within the full
+    range) so events on the chunk boundaries are found by both neighbouring chunks, then only the
+    events the chunk owns are kept. Multi-processing friendly
+
+    Parameters
+    ---------
+        params: `OrbitalParams`
+            The orbital parameters to use.
+        chunkStart: `int`
+            The epoch time in ms of the first ms owned by the chunk.
+        chunkStop: `int`
+            The epoch time in ms that the chunk's ownership stops at.
+        overlap: `int`
+            The time in ms scanned on either side of the chunk.
+        rangeStart: `int`
+            The epoch time in ms that the full time range starts at.
+        rangeStop: `int`
+            The epoch time in ms that the full time range stops at.
+
+    Returns
+    ---------
+        `np.ndarray`
+            A chronologically ordered structured array of the events in [chunkStart, chunkStop)
+            with the EventStore.EVENT_DTYPE layout.
+    """
+    events = scanScrollTimeRange(
+        params,
+        max(chunkStart - overlap, rangeStart),
+        min(chunkStop + overlap, rangeStop),
+    )
+    owned = (events["timestamp"] >= chunkStart) & (events["timestamp"] < chunkStop)
+    return events[owned]
+
+
+def solveScrollChunk(
+    params: OrbitalParams,
+    chunkStart: int,
+    chunkStop: int,
+    overlap: int,
+    rangeStart: int,
+    rangeStop: int,
+) -> np.ndarray:
+    """Roots engine version of `scanScrollChunk` that finds the changes in scroll/alignment states
+    within one chunk by solving for the alignment windows of every orb pair (see
+    `createPairWindows`) rather than stepping through the chunk. Multi-processing friendly
+
+    Parameters
+    ---------
+        params: `OrbitalParams`
+            The orbital parameters to use.
+        chunkStart: `int`
+            The epoch time in ms of the first ms owned by the chunk.
+        chunkStop: `int`
+            The epoch time in ms that the chunk's ownership stops at.
+        overlap: `int`
+            The time in ms solved on either side of the chunk.
+        rangeStart: `int`
+            The epoch time in ms that the full time range starts at.
+        rangeStop: `int`
+            The epoch time in ms that the full time range stops at.
+
+    Returns
+    ---------
+        `np.ndarray`
+            A chronologically ordered structured array of the events in [chunkStart, chunkStop)
+            with the EventStore.EVENT_DTYPE layout.
+    """
+    solveStart = max(chunkStart - overlap, rangeStart)
+    solveStop = min(chunkStop + overlap, rangeStop)
+    events = mergePairWindows(
+        createPairWindows(params, solveStart, solveStop), solveStart, solveStop
+    )
+    owned = (events["timestamp"] >= chunkStart) & (events["timestamp"] < chunkStop)
+    return events[owned]
+
+
+def stitchEventChunks(eventChunks: list[np.ndarray]) -> np.ndarray:
+    """Joins the events of consecutive chunks of a time range. The changes of every event after the
+    first are classified again from the state left by the event before it, so events that don't
+    change that state (e.g. found by two overlapping chunks) are dropped and the result doesn't
+    depend on where the chunk boundaries fall.
+
+    Parameters
+    ---------
+        eventChunks: `list[np.ndarray]`
+            The chronologically ordered events of each chunk, in chunk order, with the
+            EventStore.EVENT_DTYPE layout.
+
+    Returns
+    ---------
+        `np.ndarray`
+            A chronologically ordered structured array of events with the EventStore.EVENT_DTYPE layout.
+    """
+    events = np.concatenate([np.empty(0, dtype=EVENT_DTYPE)] + eventChunks)
+    if len(events) < 2:
+        return events
+    previousMasks, masks = events["state"][:-1], events["state"][1:]
+    events = np.concatenate(
+        (
+            events[:1],
+            createEventRecords(
+                events["timestamp"][1:], previousMasks, masks, events["pairs"][1:]
+            ),
+        )
+    )
+    return events[np.append(True, masks != previousMasks)]
+
+
+def createPairWindows(
+    params: OrbitalParams,
+    startTime: int,
+    stopTime: int,
+    pairs: np.ndarray[int] | None = None,
+) -> dict[int, np.ndarray[np.int64]]:
+    """Finds the windows of time each orb pair spends aligned. Every pair is independent of
+    the others, so any subset of pairs can be calculated separately (e.g. in another process)
+    and merged afterwards with `mergePairWindows`.
+
+    Parameters
+    ---------
+        params: `OrbitalParams`
+            The orbital parameters to use.
+        startTime: `int`
+            The epoch time in ms that the window search will start from.
+        stopTime: `int`
+            The epoch time in ms that the window search will stop at.
+        pairs: `np.ndarray[int]` *(optional)*
+            The indices (into PAIR_A and PAIR_B) of the pairs to find windows for. Defaults to all pairs.
+
+    Returns
+    ---------
+        `dict[int, np.ndarray[np.int64]]`
+            A `dict` with pair indices for keys and (W, 2) arrays of chronologically ordered
+            [start, end) epoch times in ms for values. Windows are clipped to the time range, a window
+            that starts at startTime was already aligned and one that ends at stopTime is still aligned.
+    """
+    pairs = np.arange(len(PAIR_A)) if pairs is None else np.asarray(pairs)
+    startStates = getPairMargins(params, np.array([startTime]), pairs)[0] < 0
+    crossingTimes, crossingPairs = findThresholdCrossings(
+        params, startTime, stopTime, pairs
+    )
+    pairWindows = {}
+    for pair, startState in zip(pairs, startStates):
+        crossings = crossingTimes[crossingPairs == pair]
+        if startState:
+            crossings = np.concatenate(([startTime], crossings))
+        if len(crossings) % 2 == 1:
+            crossings = np.append(crossings, stopTime)
+        pairWindows[int(pair)] = crossings.reshape(-1, 2)
+    return pairWindows
+
+
+def clipPairWindows(
+    pairWindows: dict[int, np.ndarray[np.int64]], startTime: int, stopTime: int
+) -> dict[int, np.ndarray[np.int64]]:
+    """Clips alignment windows to a shorter time range, dropping the windows outside of it.
+
+    Parameters
+    ---------
+        pairWindows: `dict[int, np.ndarray[np.int64]]`
+            The alignment windows of orb pairs as created by `createPairWindows`.
+        startTime: `int`
+            The epoch time in ms that the clipped windows start from.
+        stopTime: `int`
+            The epoch time in ms that the clipped windows stop at.
+
+    Returns
+    ---------
+        `dict[int, np.ndarray[np.int64]]`
+            The windows of each pair that overlap the time range, clipped to it.
+    """
+    clippedWindows = {}
+    for pair, windows in pairWindows.items():
+        windows = windows[(windows[:, 1] > startTime) & (windows[:, 0] < stopTime)]
+        clippedWindows[pair] = np.clip(windows, startTime, stopTime)
+    return clippedWindows
+
+
+def joinPairWindows(
+    pairWindowsList: list[dict[int, np.ndarray[np.int64]]],
+) -> dict[int, np.ndarray[np.int64]]:
+    """Joins the alignment windows of consecutive time ranges, a window that was clipped at the
+    end of one range is joined with the window that is aligned at the start of the next.
+
+    Parameters
+    ---------
+        pairWindowsList: `list[dict[int, np.ndarray[np.int64]]]`
+            The alignment windows of the same orb pairs for chronologically ordered time ranges
+            that each start where the previous one stops.
+
+    Returns
+    ---------
+        `dict[int, np.ndarray[np.int64]]`
+            The windows of each pair over the combined time range.
+    """
+    pairWindows = {}
+    for pair in pairWindowsList[0]:
+        windows = np.concatenate([part[pair] for part in pairWindowsList])
+        if len(windows) > 0:
+            # a window continues into the next range when it ends where the next one starts
+            continued = windows[:-1, 1] == windows[1:, 0]
+            windows = np.column_stack(
+                (
+                    windows[np.concatenate(([True], ~continued)), 0],
+                    windows[np.append(~continued, True), 1],
+                )
+            )
+        pairWindows[pair] = windows
+    return pairWindows
+
+
+def packAlignmentStates(states: np.ndarray[bool]) -> np.ndarray[np.uint16]:
+    """Packs alignment state arrays into bitmasks.
+
+    Parameters
+    ---------
+        states: `np.ndarray[bool]`
+            An array whose last axis holds the alignment state of the 9 orbs.
+
+    Returns
+    ---------
+        `np.ndarray[np.uint16]`
+            The bitmask for each set of states, bit i corresponding to ORB_NAMES[i].
+    """
+    return (
+        np.asarray(states, dtype=np.uint16)
+        << np.arange(len(ORB_NAMES), dtype=np.uint16)
+    ).sum(axis=-1, dtype=np.uint16)
+
+
+def mergePairWindows(
+    pairWindows: dict[int, np.ndarray[np.int64]],
+    startTime: int,
+    stopTime: int,
+) -> np.ndarray:
+    """Merges the alignment windows of every orb pair into scroll events with a sweep line.
+    Each window start and end is a point where an orb's count of aligned pairs changes,
+    an orb is aligned whenever its count is above zero.
+
+    Parameters
+    ---------
+        pairWindows: `dict[int, np.ndarray[np.int64]]`
+            The alignment windows of every orb pair as created by `createPairWindows`.
+        startTime: `int`
+            The epoch time in ms that the windows start from.
+        stopTime: `int`
+            The epoch time in ms that the windows stop at.
+
+    Returns
+    ---------
+        `np.ndarray`
+            A chronologically ordered structured array of events with the EventStore.EVENT_DTYPE layout,
+            each holding a timestamp and bitmasks of the orbs whose states changed.
+    """
+    numOrbs = len(ORB_NAMES)
+    startCounts = np.zeros(numOrbs, dtype=np.int64)
+    times, deltas, pairs = [], [], []
+    for pair, windows in pairWindows.items():
+        startsAligned = windows[:, 0] == startTime
+        startCounts[[PAIR_A[pair], PAIR_B[pair]]] += np.count_nonzero(startsAligned)
+        # window ends at stopTime are where the range was clipped rather than alignments ending
+        starts = windows[~startsAligned, 0]
+        ends = windows[windows[:, 1] < stopTime, 1]
+        times.extend((starts, ends))
+        deltas.extend((np.ones(len(starts)), -np.ones(len(ends))))
+        pairs.extend((np.full(len(starts), pair), np.full(len(ends), pair)))
+    startMask = packAlignmentStates(startCounts > 0)
+    if len(times) == 0:
+        return np.zeros(0, dtype=EVENT_DTYPE)
+    times = np.concatenate(times).astype(np.int64)
+    deltas = np.concatenate(deltas).astype(np.int64)
+    pairs = np.concatenate(pairs).astype(np.int64)
+    order = np.argsort(times, kind="stable")
+    times, deltas, pairs = times[order], deltas[order], pairs[order]
+
+    # sweep through the window boundaries keeping a running count of aligned pairs per orb
+    countChanges = np.zeros((len(times), numOrbs), dtype=np.int64)
+    countChanges[np.arange(len(times)), PAIR_A[pairs]] += deltas
+    countChanges[np.arange(len(times)), PAIR_B[pairs]] += deltas
+    masks = packAlignmentStates(startCounts + np.cumsum(countChanges, axis=0) > 0)
+    # only the state after the last boundary at a given ms is observable
+    lastAtTime = np.append(times[1:] != times[:-1], True)
+    # every pair with a boundary at a given ms contributes to the change at that ms
+    pairMasks = np.bitwise_or.reduceat(
+        PAIR_MASK_BITS[pairs], np.flatnonzero(np.append(True, lastAtTime[:-1]))
+    )
+    times, masks = times[lastAtTime], masks[lastAtTime]
+    previousMasks = np.concatenate(([startMask], masks[:-1]))
+    changed = masks != previousMasks
+    return createEventRecords(
+        times[changed], previousMasks[changed], masks[changed], pairMasks[changed]
+    )
+
+
+def createOrbIntervals(
+    events: np.ndarray, startMask: int, startTime: int, stopTime: int
+) -> tuple[list[np.ndarray[np.int64]], list[np.ndarray[np.int64]]]:
+    """Finds the intervals of time each orb spends glowing and dark from the alignment states of a
+    chronologically ordered array of events. Aligned orbs go dark while the shadow orb is aligned
+    and glow otherwise.
+
+    Parameters
+    ---------
+        events: `np.ndarray`
+            The chronologically ordered events of the time range with the EventStore.EVENT_DTYPE layout.
+        startMask: `int`
+            The packed alignment mask at startTime.
+        startTime: `int`
+            The epoch time in ms that the events start from.
+        stopTime: `int`
+            The epoch time in ms that the events stop at.
+
+    Returns
+    ---------
+        `tuple[list[np.ndarray[np.int64]], list[np.ndarray[np.int64]]]`
+            The glow and dark intervals of each orb in ORB_NAMES order, each an (N, 2) array of
+            chronologically ordered [start, stop) epoch times in ms clipped to the time range.
+    """
+    times = np.concatenate(([startTime], events["timestamp"], [stopTime]))
+    masks = np.concatenate(([startMask], events["state"])).astype(np.uint16)
+    shadowAligned = masks & ORB_BITS["Shadow"] != 0
+    intervals = ([], [])
+    for bit in ORB_BITS.values():
+        aligned = masks & bit != 0
+        for phaseIntervals, inPhase in zip(
+            intervals, (aligned & ~shadowAligned, aligned & shadowAligned)
+        ):
+            # the interval boundaries are the times the orb's phase changes
+            changes = np.flatnonzero(np.diff(inPhase, prepend=False, append=False))
+            phaseIntervals.append(times[changes].reshape(-1, 2))
+    return intervals
+
+
+def findIntervalOverlaps(
+    intervalsList: list[np.ndarray[np.int64]], minCount: int
+) -> np.ndarray[np.int64]:
+    """Finds the times covered by at least minCount of the interval arrays at once by sweeping over
+    every interval boundary, the number of intervals covering each stretch is a cumulative sum.
+
+    Parameters
+    ---------
+        intervalsList: `list[np.ndarray[np.int64]]`
+            (N, 2) arrays of chronologically ordered, non overlapping [start, stop) intervals.
+        minCount: `int`
+            The least number of interval arrays that must cover a time.
+
+    Returns
+    ---------
+        `np.ndarray[np.int64]`
+            An (N, 2) array of the chronologically ordered [start, stop) intervals covered by at
+            least minCount of the interval arrays.
+    """
+    intervals = np.concatenate([np.empty((0, 2), dtype=np.int64)] + intervalsList)
+    if len(intervals) == 0:
+        return intervals
+    times = np.concatenate((intervals[:, 0], intervals[:, 1]))
+    deltas = np.concatenate(
+        (np.ones(len(intervals), dtype=int), np.full(len(intervals), -1))
+    )
+    order = np.argsort(times, kind="stable")
+    times, counts = times[order], np.cumsum(deltas[order])
+    # only the count after the last boundary at each time covers the stretch that follows it
+    last = np.append(times[1:] != times[:-1], True)
+    times, covered = times[last], counts[last] >= minCount
+    changes = np.flatnonzero(np.diff(covered, prepend=False))
+    return times[changes].reshape(-1, 2)
+
+
+def getSafeSteps(
+    margins: np.ndarray[float],
+    maxRates: np.ndarray[float],
+    precision: int,
+    minimumStep: int,
+    maximumStep: int,
+) -> np.ndarray[np.int64]:
+    """Calculates the longest steps that orb pairs can take without crossing their alignment
+    thresholds, a pair can't cross its threshold sooner than |margin| / max rate.
+
+    Parameters
+    ---------
+        margins: `np.ndarray[float]`
+            The margins of the pairs as calculated by `getPairMargins`.
+        maxRates: `np.ndarray[float]`
+            The max rate in degrees per ms that each margin can change at, broadcastable with margins.
+        precision: `int`
+            Steps are rounded down to a multiple of precision ms.
+        minimumStep: `int`
+            The shortest step in ms, steps near a crossing are lengthened to this.
+        maximumStep: `int`
+            The longest step in ms.
+
+    Returns
+    ---------
+        `np.ndarray[np.int64]`
+            The step in ms for each margin.
+    """
+    safeSteps = np.minimum(np.abs(margins) / maxRates, maximumStep)
+    return np.maximum(
+        (safeSteps // precision).astype(np.int64) * precision, minimumStep
+    )
+
+
+def findThresholdCrossings(
+    params: OrbitalParams,
+    startTime: int,
+    stopTime: int,
+    pairs: np.ndarray[int] | None = None,
+    precision: int | None = None,
+) -> tuple[np.ndarray[np.int64], np.ndarray[int]]:
+    """Finds the times at which each orb pair moves into or out of alignment. Each pair steps
+    through the time range on its own, taking the longest step that its margin and max rate
+    guarantee it can't cross its threshold in but never less than params.minimumStep, so any
+    alignment window at least params.minimumStep long is found. Crossings are then solved by bisection.
+
+    Parameters
+    ---------
+        params: `OrbitalParams`
+            The orbital parameters to use.
+        startTime: `int`
+            The epoch time in ms that the crossing search will start from.
+        stopTime: `int`
+            The epoch time in ms that the crossing search will stop at.
+        pairs: `np.ndarray[int]` *(optional)*
+            The indices (into PAIR_A and PAIR_B) of the pairs to search. Defaults to all pairs.
+        precision: `int` *(optional)*
+            Crossings are solved to the first multiple of precision ms after startTime at which the pair
+            is in its new state. Defaults to params.rootPrecision.
+
+    Returns
+    ---------
+        `tuple[np.ndarray[np.int64], np.ndarray[int]]`
+            The chronologically ordered epoch times in ms of the first step at which each pair is in
+            its new state and the index of the pair (into PAIR_A and PAIR_B) that crossed at that time.
+            Only crossings after startTime and before stopTime are included.
+    """
+    pairs = np.arange(len(PAIR_A)) if pairs is None else np.asarray(pairs)
+    precision = params.rootPrecision if precision is None else precision
+    pairRates = getMaxPairRates(params)[pairs]
+    minimumStep = max(-(-params.minimumStep // precision), 1) * precision
+    maximumStep = max(stopTime - startTime, minimumStep)
+    offsets = np.arange(1, LOOKAHEAD_STEPS + 1)
+    # columns (into pairs) of the pairs that haven't reached stopTime yet
+    columns = np.arange(len(pairs))
+    times = np.full(len(pairs), startTime, dtype=np.int64)
+    margins = getPairMargins(params, np.array([startTime]), pairs)[0]
+    lo, hi = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+    crossedColumns = [np.empty(0, dtype=int)]
+    while len(columns) > 0:
+        rates = pairRates[columns][:, np.newaxis]
+        steps = getSafeSteps(margins, rates[:, 0], precision, minimumStep, maximumStep)
+        # sample several steps ahead at once along each pair's uniform grid, each sample is only
+        # kept if the margin at the sample before it still allows a step this long
+        directions = directionsRelCandleGrid(
+            params,
+            np.tile(times, 2),
+            np.tile(steps, 2),
+            LOOKAHEAD_STEPS,
+            np.concatenate((PAIR_A[pairs[columns]], PAIR_B[pairs[columns]])),
+        ).reshape(2, len(columns), LOOKAHEAD_STEPS)
+        # angle between each pair's directions, with opposite alignments folded onto same side ones
+        difs = np.abs(np.degrees(np.angle(directions[0] * np.conj(directions[1]))))
+        sampleMargins = np.column_stack(
+            (
+                margins,
+                np.minimum(difs, 180 - difs)
+                - np.asarray(params.pairThresholds)[pairs[columns], np.newaxis],
+            )
+        )
+        sampleTimes = times[:, np.newaxis] + steps[:, np.newaxis] * np.arange(
+            LOOKAHEAD_STEPS + 1
+        )
+        covered = (
+            getSafeSteps(
+                sampleMargins[:, :-1], rates, precision, minimumStep, maximumStep
+            )
+            >= steps[:, np.newaxis]
+        )
+        numKept = np.where(covered.all(axis=1), LOOKAHEAD_STEPS, covered.argmin(axis=1))
+        kept = offsets <= numKept[:, np.newaxis]
+        rows, cols = np.nonzero(
+            kept & ((sampleMargins[:, 1:] < 0) != (sampleMargins[:, :-1] < 0))
+        )
+        lo.append(sampleTimes[rows, cols])
+        hi.append(sampleTimes[rows, cols + 1])
+        crossedColumns.append(columns[rows])
+        rows = np.arange(len(columns))
+        times, margins = sampleTimes[rows, numKept], sampleMargins[rows, numKept]
+        stepping = times < stopTime
+        columns, times, margins = columns[stepping], times[stepping], margins[stepping]
+    lo, hi = np.concatenate(lo), np.concatenate(hi)
+    columns = np.concatenate(crossedColumns)
+    # bisection uses the exact margins rather than the propagated ones, which can differ by rounding
+    loStates, hiStates = (
+        getPairMargins(
+            params,
+            np.concatenate((lo, hi)),
+            np.tile(pairs[columns], 2),
+            elementwise=True,
+        ).reshape(2, -1)
+        < 0
+    )
+    crossing = loStates != hiStates
+    lo, hi, columns, loStates = (
+        lo[crossing],
+        hi[crossing],
+        columns[crossing],
+        loStates[crossing],
+    )
+    # bisect every bracket at once until each crossing is known to the required precision
+    while len(lo) > 0 and np.any(hi - lo > precision):
+        mid = lo + np.maximum((hi - lo) // (2 * precision), 1) * precision
+        mid = np.where(hi - lo > precision, mid, lo)
+        midStates = getPairMargins(params, mid, pairs[columns], elementwise=True) < 0
+        # keep the half of the bracket where the pair changes state
+        sameAsLo = midStates == loStates
+        lo = np.where(sameAsLo, mid, lo)
+        hi = np.where(sameAsLo, hi, mid)
+    inRange = hi < stopTime
+    hi, crossed = hi[inRange], pairs[columns[inRange]]
+    order = np.lexsort((crossed, hi))
+    return hi[order], crossed[order]
+
+
+def createEnsembleParams(
+    params: OrbitalParams,
+    refOffsets: np.ndarray[int],
+    numMembers: int,
+    periodTolerance: int,
+    refTimeTolerance: int,
+    seed: int | None = None,
+) -> EnsembleParams:
+    """Creates an ensemble of orbital parameters by shifting every measured period and reference time
+    by a uniformly random amount within its tolerance. The reference positions of each member are
+    recalculated from its own shadow and candle values the same way Ephemeris.setRefPositions does.
+
+    Parameters
+    ---------
+        params: `OrbitalParams`
+            The measured orbital parameters.
+        refOffsets: `np.ndarray[int]`
+            The offset in degrees of each orb from the candle at its reference time, indexed the
+            same as params.periods.
+        numMembers: `int`
+            The number of parameter sets in the ensemble, the first is always params unchanged.
+        periodTolerance: `int`
+            The most in ms any period is shifted by.
+        refTimeTolerance: `int`
+            The most in ms any reference time is shifted by.
+        seed: `int` *(optional)*
+            The seed of the random shifts, the same seed always creates the same ensemble.
+            Defaults to a random seed.
+
+    Returns
+    ---------
+        `EnsembleParams`
+            The parameters of every member.
+    """
+    rng = np.random.default_rng(seed)
+
+    def perturb(values: np.ndarray[int], tolerance: int) -> np.ndarray[np.int64]:
+        shifts = rng.integers(
+            -tolerance, tolerance, size=(numMembers,) + values.shape, endpoint=True
+        )
+        shifts[0] = 0
+        return values + shifts
+
+    periods = perturb(np.asarray(params.periods, dtype=np.int64), periodTolerance)
+    refTimes = perturb(np.asarray(params.refTimes, dtype=np.int64), refTimeTolerance)
+    shadowPeriods = perturb(np.int64(params.shadowPeriod), periodTolerance)
+    shadowRefTimes = perturb(np.int64(params.shadowRefTime), refTimeTolerance)
+    refPositions = np.empty(periods.shape)
+    refPositions[:, 0] = getPhaseAngles(
+        refTimes[:, 0], shadowPeriods, shadowRefTimes, params.shadowRefOffset
+    )
+    refPositions[:, 1:] = getPhaseAngles(
+        refTimes[:, 1:],
+        periods[:, :1],
+        refTimes[:, :1],
+        refPositions[:, :1] + np.asarray(refOffsets)[1:],
+    )
+    return EnsembleParams(
+        periods, refTimes, refPositions, shadowPeriods, shadowRefTimes
+    )
+
+
+def posRelCandleEnsemble(
+    params: OrbitalParams,
+    ensemble: EnsembleParams,
+    times: np.ndarray[int],
+    orbs: np.ndarray[int],
+    members: np.ndarray[int],
+) -> np.ndarray[float]:
+    """Gets the position of orbs[n] relative to the candle at times[n] with the parameters of
+    ensemble member members[n] for every n, the ensemble counterpart of `posRelCandleElementwise`.
+
+    Parameters
+    ---------
+        params: `OrbitalParams`
+            The orbital parameters the ensemble was created from.
+        ensemble: `EnsembleParams`
+            The parameters of every ensemble member.
+        times: `np.ndarray[int]`
+            An array of N epoch timestamps in ms.
+        orbs: `np.ndarray[int]`
+            An array of N indices (into ORB_NAMES) of the orbs to get the positions of.
+        members: `np.ndarray[int]`
+            An array of N indices of the ensemble members whose parameters are used.
+
+    Returns
+    ---------
+        `np.ndarray[float]`
+            An array of N positions in degrees.
+    """
+    times = np.asarray(times)
+    orbs = np.asarray(orbs)
+    members = np.asarray(members)
+    radii = np.asarray(params.radii)
+    # bodies indexed the same as params.periods, the shadow and white rows use the candle's values
+    bodies = np.maximum(orbs - 1, 0)
+    candlePos = getPhaseAngles(
+        times,
+        ensemble.periods[members, 0],
+        ensemble.refTimes[members, 0],
+        ensemble.refPositions[members, 0] + 180,
+    )
+    bodyPos = getPhaseAngles(
+        times,
+        ensemble.periods[members, bodies],
+        ensemble.refTimes[members, bodies],
+        ensemble.refPositions[members, bodies],
+    )
+    x = radii[bodies] * np.cos(np.radians(bodyPos)) - np.cos(np.radians(candlePos))
+    y = radii[bodies] * np.sin(np.radians(bodyPos)) - np.sin(np.radians(candlePos))
+    positions = np.degrees(np.arctan2(y, x)) % 360
+    positions = np.where(orbs == 1, (candlePos + 180) % 360, positions)
+    shadowPos = getPhaseAngles(
+        times,
+        ensemble.shadowPeriods[members],
+        ensemble.shadowRefTimes[members],
+        params.shadowRefOffset,
+    )
+    return np.where(orbs == 0, shadowPos, positions)
+
+
+def getEnsemblePairMargins(
+    params: OrbitalParams,
+    ensemble: EnsembleParams,
+    times: np.ndarray[int],
+    pairs: np.ndarray[int],
+    members: np.ndarray[int],
+) -> np.ndarray[float]:
+    """Calculates how far pairs[n] is from its alignment threshold at times[n] with the parameters of
+    ensemble member members[n] for every n.
+
+    Parameters
+    ---------
+        params: `OrbitalParams`
+            The orbital parameters the ensemble was created from.
+        ensemble: `EnsembleParams`
+            The parameters of every ensemble member.
+        times: `np.ndarray[int]`
+            An array of N epoch timestamps in ms.
+        pairs: `np.ndarray[int]`
+            An array of N indices (into PAIR_A and PAIR_B) of the pairs to calculate the margins of.
+        members: `np.ndarray[int]`
+            An array of N indices of the ensemble members whose parameters are used.
+
+    Returns
+    ---------
+        `np.ndarray[float]`
+            An array of N margins in degrees, negative values indicate that the pair is aligned.
+    """
+    times = np.asarray(times)
+    pairs = np.asarray(pairs)
+    members = np.asarray(members)
+    positions = posRelCandleEnsemble(
+        params,
+        ensemble,
+        np.concatenate((times, times)),
+        np.concatenate((PAIR_A[pairs], PAIR_B[pairs])),
+        np.concatenate((members, members)),
+    ).reshape(2, -1)
+    # difference between each orb pair, with opposite alignments folded onto same side ones
+    difs = np.abs(positions[1] % 180 - positions[0] % 180)
+    difs = np.where(difs > 90, 180 - difs, difs)
+    return difs - np.asarray(params.pairThresholds)[pairs]
+
+
+def findEnsembleCrossings(
+    params: OrbitalParams,
+    ensemble: EnsembleParams,
+    times: np.ndarray[int],
+    pairs: np.ndarray[int],
+    window: int,
+    precision: int,
+) -> np.ndarray[np.int64]:
+    """Finds the time every ensemble member sees each of the passed in threshold crossings at. Each
+    member's state at the crossing time decides whether it crosses before or after it, its nearest
+    crossing in that direction is bracketed by doubling steps and the brackets of every
+    (crossing, member) combination are bisected at once.
+
+    Parameters
+    ---------
+        params: `OrbitalParams`
+            The orbital parameters the ensemble was created from, pairs[k] crosses its threshold
+            at times[k] with these parameters.
+        ensemble: `EnsembleParams`
+            The parameters of every ensemble member.
+        times: `np.ndarray[int]`
+            An array of K epoch timestamps in ms of the first step at which each pair is in its new state.
+        pairs: `np.ndarray[int]`
+            An array of K indices (into PAIR_A and PAIR_B) of the pairs that crossed.
+        window: `int`
+            The furthest in ms from times[k] a member's crossing is searched for, a multiple of precision.
+        precision: `int`
+            Crossings are solved to the first multiple of precision ms from times[k] at which the pair
+            is in its new state.
+
+    Returns
+    ---------
+        `np.ndarray[np.int64]`
+            A (K, M) array where element [k, m] is the epoch time in ms at which pairs[k] reaches its
+            new state with the parameters of member m, or -1 when it doesn't within the window.
+    """
+    numMembers = len(ensemble.shadowPeriods)
+    times = np.repeat(np.asarray(times, dtype=np.int64), numMembers)
+    pairs = np.repeat(np.asarray(pairs), numMembers)
+    members = np.tile(np.arange(numMembers), len(times) // numMembers)
+    newStates = getPairMargins(params, times, pairs, elementwise=True) < 0
+    # members already in the new state at the crossing time cross before it, the rest after it
+    before = getEnsemblePairMargins(params, ensemble, times, pairs, members) < 0
+    before = before == newStates
+    directions = np.where(before, -1, 1)
+    # step away from the crossing time in doubling steps until the state on the far side of the
+    # member's crossing is reached, so short alignment windows don't hide the nearest crossing
+    near, far = times.copy(), times.copy()
+    valid = np.zeros(len(times), dtype=bool)
+    searching = np.arange(len(times))
+    step = precision
+    while len(searching) > 0:
+        far[searching] = times[searching] + directions[searching] * min(step, window)
+        farStates = (
+            getEnsemblePairMargins(
+                params, ensemble, far[searching], pairs[searching], members[searching]
+            )
+            < 0
+        )
+        found = (farStates == newStates[searching]) != before[searching]
+        valid[searching[found]] = True
+        if step >= window:
+            break
+        searching = searching[~found]
+        near[searching] = far[searching]
+        step *= 2
+    lo, hi = np.minimum(near, far), np.maximum(near, far)
+    # bisect every bracket at once until each crossing is known to the required precision
+    searching = np.flatnonzero(valid)
+    while len(searching) > 0:
+        searchLo, searchHi = lo[searching], hi[searching]
+        mid = (
+            searchLo
+            + np.maximum((searchHi - searchLo) // (2 * precision), 1) * precision
+        )
+        midStates = (
+            getEnsemblePairMargins(
+                params, ensemble, mid, pairs[searching], members[searching]
+            )
+            < 0
+        )
+        # keep the half of the bracket where the pair changes state
+        reached = midStates == newStates[searching]
+        lo[searching] = np.where(reached, searchLo, mid)
+        hi[searching] = np.where(reached, mid, searchHi)
+        searching = searching[hi[searching] - lo[searching] > precision]
+    return np.where(valid, hi, -1).reshape(-1, numMembers)
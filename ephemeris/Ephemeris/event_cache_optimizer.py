@@ -0,0 +1,62 @@
+import argparse
+import time
+from pathlib import Path
+from .Ephemeris import Ephemeris
+from .EventStore import loadEventStore
+
+oneDay = 86400000
+
+
+def main() -> None:
+    """Builds the scroll event cache ahead of time and writes it as a binary event store
+    so the bot and web server can memory-map it instead of recomputing it on startup.
+    """
+    parser = argparse.ArgumentParser(
+        description="Precompute the scroll event cache as a compact binary event store."
+    )
+    parser.add_argument(
+        "--start-day",
+        type=int,
+        default=-4,
+        help="first day of the cache relative to now (default: -4)",
+    )
+    parser.add_argument(
+        "--end-day",
+        type=int,
+        default=35,
+        help="last day of the cache relative to now (default: 35)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["scan", "roots"],
+        default="scan",
+        help="event engine used to build the cache (default: scan)",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="where to write the event store (default: the Ephemeris cache file)",
+    )
+    args = parser.parse_args()
+
+    now = int(time.time() * 1000)
+    buildStart = time.time()
+    ephemeris = Ephemeris(
+        start=now + args.start_day * oneDay,
+        end=now + args.end_day * oneDay,
+        eventEngine=args.engine,
+    )
+    cacheFile = ephemeris.store.getEventsFile("cache")
+    if args.output is not None:
+        cacheFile = args.output
+        ephemeris.saveCache(cacheFile)
+    header, events = loadEventStore(cacheFile)
+    print(
+        f"Wrote {header['count']} events ({events.nbytes} bytes) to {cacheFile} "
+        f"in {time.time() - buildStart:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
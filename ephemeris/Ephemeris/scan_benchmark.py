@@ -0,0 +1,98 @@
+import argparse
+import time
+from .Ephemeris import Ephemeris, formatTime
+from .EphemerisStore import FileStore
+
+oneDay = 86400000
+
+
+def main() -> None:
+    """Times building scroll events with each event engine over the same time range. Can also time
+    creating the bot's Ephemeris and a long checkpointed build, both use the default FileStore.
+    """
+    parser = argparse.ArgumentParser(
+        description="Compare the speed of the scan and roots event engines."
+    )
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=40,
+        help="length of the time range in days, starting now (default: 40)",
+    )
+    parser.add_argument(
+        "--engines",
+        nargs="+",
+        choices=["scan", "roots"],
+        default=["scan", "roots"],
+        help="event engines to time (default: scan roots)",
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=5,
+        help="number of timed builds per engine, the fastest is reported (default: 5)",
+    )
+    parser.add_argument(
+        "--startup",
+        action="store_true",
+        help="also time creating the Ephemeris the discord bot starts with",
+    )
+    parser.add_argument(
+        "--build-days",
+        type=int,
+        default=0,
+        help="also build this many days from now in checkpointed chunks, an interrupted "
+        "build resumes from its checkpoints when run again (default: 0)",
+    )
+    args = parser.parse_args()
+
+    now = int(time.time() * 1000)
+    # the variables are passed in without a store so the benchmark doesn't read or write caches
+    ephemeris = Ephemeris(
+        start=now,
+        end=now + oneDay,
+        multiProcess=False,
+        warmStart=False,
+        variables=FileStore().loadVariables(),
+    )
+    for engine in args.engines:
+        ephemeris.eventEngine = engine
+        bestTime = float("inf")
+        for _ in range(args.repeats):
+            buildStart = time.perf_counter()
+            events = ephemeris.processScrollTimeRange(now, now + args.days * oneDay)
+            bestTime = min(bestTime, time.perf_counter() - buildStart)
+        print(f"{engine}: {len(events)} events in {bestTime:.3f}s")
+
+    if args.startup:
+        startupStart = time.perf_counter()
+        ephemeris = Ephemeris(
+            start=now + -4 * oneDay,
+            end=now + 35 * oneDay,
+            numMoonCycles=8,
+            discordTimestamps=True,
+            multiProcess=True,
+        )
+        startupTime = round((time.perf_counter() - startupStart) * 1000)
+        print(f"{ephemeris.numCores} cores; Execution time: {formatTime(startupTime)}")
+    if args.build_days > 0:
+        ephemeris = Ephemeris(
+            start=now, end=now + oneDay, multiProcess=True, warmStart=False
+        )
+        buildStart = time.perf_counter()
+        # long builds report their progress and resume from their checkpoints if interrupted
+        events = ephemeris.buildScrollEventRange(
+            now,
+            now + args.build_days * oneDay,
+            progressCallback=lambda numCompleted, numChunks: print(
+                f"Chunk {numCompleted}/{numChunks}", end="\r"
+            ),
+        )
+        print(
+            f"\n{len(events)} events in the next {args.build_days} days "
+            f"in {time.perf_counter() - buildStart:.1f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,7 @@ from .configFiles.variables import (
     ENABLE_USAGE_REPORTS,
     USAGE_REPORT_INTERVAL_HOURS,
     USAGE_REPORT_CHANNEL_ID,
+    cacheRefreshMinutes,
     ownerID,
 )
 
@@ -64,6 +65,8 @@ async def on_ready():
         usage_report_task.start()
     if not steam_player_task.is_running():
         steam_player_task.start()
+    if not scroll_cache_task.is_running():
+        scroll_cache_task.start()
 
 
 def _format_usage_report(range_label: str, start_ts: int, end_ts: int) -> list[str]:
@@ -255,3 +258,16 @@ async def _update_steam_player_menus() -> None:
 @steam_player_task.before_loop
 async def steam_player_task_before_loop():
     await bot.wait_until_ready()
+
+
+@tasks.loop(minutes=cacheRefreshMinutes)
+async def scroll_cache_task():
+    try:
+        await refreshScrollCache()
+    except Exception as e:
+        print(f"Scroll cache refresh task error: {e}")
+
+
+@scroll_cache_task.before_loop
+async def scroll_cache_task_before_loop():
+    await bot.wait_until_ready()
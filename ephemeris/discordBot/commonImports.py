@@ -15,4 +15,12 @@ ephemeris = Ephemeris.Ephemeris(
     numMoonCycles=numMoonCycles,
     discordTimestamps=True,
     multiProcess=True,
+    # the roots engine keeps the windows of every orb pair with the cache, so new reference
+    # times only recalculate the pairs of the changed orbs
+    eventEngine="roots",
 )
+ephemeris.periodTolerance = periodTolerance
+ephemeris.refTimeTolerance = refTimeTolerance
+ephemeris.ensembleSize = ensembleSize
+if showConfidenceWindows:
+    ephemeris.updateEventWindows()
@@ -29,6 +29,18 @@ numMoonCycles = 8
 numDisplayMoonCycles = 2
 numFilterDisplayMoonCycles = 5
 oneDay = 86400000
+# minutes between checks made by the background scroll cache refresher
+cacheRefreshMinutes = 30
+# the scroll cache is refreshed in the background once it ends less than this many days from now
+cacheRefreshDays = 30
+# scroll event lists show the earliest and latest times each event could happen at, found by
+# shifting the measured periods and reference times by up to these tolerances in ms. The windows
+# are calculated along with each scroll event cache, which takes a few seconds per build
+showConfidenceWindows = False
+periodTolerance = 100
+refTimeTolerance = 1000
+# number of shifted parameter sets used to find each event's earliest and latest times
+ensembleSize = 256
 
 # the amount of seconds it takes from the last interaction before guild menu
 # filters automatically reset back to their default values when unused
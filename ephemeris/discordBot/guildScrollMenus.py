@@ -54,6 +54,10 @@ class GuildScrollMenu(discord.ui.View):
     ):
         await self.guildScrollMenuBtnPress(interaction=interaction, button=button)
 
+    @discord.ui.button(label="Now", style=discord.ButtonStyle.grey, custom_id="now")
+    async def now(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.guildScrollMenuBtnPress(interaction=interaction, button=button)
+
     async def guildScrollMenuBtnPress(
         self, interaction: discord.Interaction, button: discord.ui.Button
     ):
@@ -109,24 +113,27 @@ class GuildScrollMenu(discord.ui.View):
                 "source": "guild",
             },
         )
+        if button.label == "Now":
+            await interaction.response.send_message(
+                content=getOrbStatusMsg(ephemeris, useEmojis=useEmojis, emojis=emojis),
+                ephemeral=self.ephemeralRes,
+            )
+            return
         startDays = {"Yesterday": -1, "Today": 0, "Tomorrow": 1}
-        dayList = getDayList(
-            ephemeris,
-            startDay=startDays[button.label],
-            filters=self.filterList,
-            useEmojis=useEmojis,
-            emojis=emojis,
-        )
-        # if enough time has passed that request can be outside of the cache range
-        # rebuild the cache to expand the range
-        if dayList[0] == "Out of Range":
+        if isDayListCached(ephemeris, startDays[button.label]):
+            dayList = getDayList(
+                ephemeris,
+                startDay=startDays[button.label],
+                filters=self.filterList,
+                useEmojis=useEmojis,
+                emojis=emojis,
+            )
+        else:
+            # days outside the cache may have to be calculated, so the response is deferred
+            # and the list is created off the event loop
             await interaction.response.defer(ephemeral=self.ephemeralRes, thinking=True)
             messageDeferred = True
-            ephemeris.updateScrollCache(
-                start=(time.time() * 1000) + cacheStartDay * oneDay,
-                stop=(time.time() * 1000) + cacheEndDay * oneDay,
-            )
-            dayList = getDayList(
+            dayList = await getDayListInExecutor(
                 ephemeris,
                 startDay=startDays[button.label],
                 filters=self.filterList,
@@ -232,22 +239,21 @@ class GuildDaySelMenu(discord.ui.Select):
                 "source": "guild",
             },
         )
-        dayList = getDayList(
-            ephemeris,
-            startDay=start,
-            endDay=end,
-            filters=self.filterList,
-            useEmojis=useEmojis,
-            emojis=emojis,
-        )
-        if dayList[0] == "Out of Range":
+        if isDayListCached(ephemeris, start, end):
+            dayList = getDayList(
+                ephemeris,
+                startDay=start,
+                endDay=end,
+                filters=self.filterList,
+                useEmojis=useEmojis,
+                emojis=emojis,
+            )
+        else:
+            # days outside the cache may have to be calculated, so the response is deferred
+            # and the list is created off the event loop
             await interaction.response.defer(ephemeral=self.ephemeralRes, thinking=True)
             messageDeferred = True
-            ephemeris.updateScrollCache(
-                start=(time.time() * 1000) + cacheStartDay * oneDay,
-                stop=(time.time() * 1000) + cacheEndDay * oneDay,
-            )
-            dayList = dayList = getDayList(
+            dayList = await getDayListInExecutor(
                 ephemeris,
                 startDay=start,
                 endDay=end,
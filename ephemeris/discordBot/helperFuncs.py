@@ -1,7 +1,11 @@
+import asyncio
 from num2words import num2words
 from .commonImports import *
 from .configFiles.usageDataBase import log_usage_event
 
+# held while the scroll event cache is replaced, only one refresh or build runs at a time
+cacheRefreshLock = asyncio.Lock()
+
 
 def is_owner(interaction: discord.Interaction) -> bool:
     """Checks if the user that triggered the interaction is the bot owner"""
@@ -41,6 +45,104 @@ def log_usage(
         pass
 
 
+async def refreshScrollCache(force: bool = False) -> None:
+    """Builds the next scroll event cache on a worker thread and swaps it in once it's complete,
+    interactions keep using the current cache while the new one is built.
+    Only one refresh runs at a time, concurrent calls wait for the running refresh to finish.
+
+    Parameters
+    ---------
+        force: `bool` *optional*
+            When set to true the cache is refreshed even if it still extends
+            cacheRefreshDays into the future. Defaults to False.
+    """
+    async with cacheRefreshLock:
+        currentTime = int(time.time() * 1000)
+        if (
+            not force
+            and ephemeris.scrollCacheStop > currentTime + cacheRefreshDays * oneDay
+        ):
+            return
+        start = currentTime + cacheStartDay * oneDay
+        stop = currentTime + cacheEndDay * oneDay
+        # new reference times, the new cache and its confidence windows are published together
+        # once they're all calculated, so day lists only look the windows up
+        await asyncio.get_running_loop().run_in_executor(
+            None, ephemeris.updateScrollCache, start, stop, showConfidenceWindows
+        )
+
+
+def getDayRange(startDay: int, endDay: int = None) -> tuple[int, int]:
+    """Gets the time range that a list of days covers.
+
+    Parameters
+    ---------
+        startDay: `int`
+            The number of days from the current time that the range starts at, day 0 starts
+            6 hours before the current time.
+        endDay: `int` *optional*
+            The number of days from the current time of the last day in the range.
+            Defaults to None, in which case the range is a single day.
+
+    Returns
+    ---------
+        `tuple[int, int]`
+            The epoch times in ms that the range starts and ends at.
+    """
+    currentTime = round((time.time() * 1000))
+    start = (
+        currentTime - round(0.25 * oneDay)
+        if startDay == 0
+        else currentTime + int(startDay) * int(oneDay)
+    )
+    if endDay == None:
+        end = currentTime + oneDay if startDay == 0 else start + oneDay
+    else:
+        end = currentTime + int(oneDay) * int(endDay) + oneDay
+    return start, end
+
+
+def isDayListCached(ephemeris: Ephemeris, startDay: int, endDay: int = None) -> bool:
+    """Checks if the events of a list of days, and their confidence windows when they're shown,
+    are all in the scroll event cache. Days outside the cache come from the segmented timeline,
+    which may have to calculate them.
+
+    Parameters
+    ---------
+        ephemeris: `Ephemeris`
+            An instance of the Ephemeris class.
+        startDay: `int`
+            The number of days from the current time that the list starts at.
+        endDay: `int` *optional*
+            The number of days from the current time of the last day in the list. Defaults to None.
+
+    Returns
+    ---------
+        `bool`
+        True if getDayList can be answered from the cache without calculating any events.
+    """
+    start, end = getDayRange(startDay, endDay)
+    state = ephemeris.state
+    if showConfidenceWindows and ephemeris.getCachedEventWindows(state) is None:
+        return False
+    return state.start <= start and end < state.stop
+
+
+async def getDayListInExecutor(
+    ephemeris: Ephemeris,
+    startDay: int,
+    useEmojis: bool = False,
+    filters: list[str] = None,
+    emojis: dict = None,
+    endDay: int = None,
+) -> str:
+    """Runs `getDayList` on a worker thread so days whose events have to be calculated
+    don't block the event loop. Takes the same parameters as `getDayList`."""
+    return await asyncio.get_running_loop().run_in_executor(
+        None, getDayList, ephemeris, startDay, useEmojis, filters, emojis, endDay
+    )
+
+
 def getDayList(
     ephemeris: Ephemeris,
     startDay: int,
@@ -74,33 +176,11 @@ def getDayList(
         `str`
             A multi-line string describing the phase changes for a preset number of cycles from startTime.
     """
-    currentTime = round((time.time() * 1000))
-    start = (
-        currentTime - round(0.25 * oneDay)
-        if startDay == 0
-        else currentTime + int(startDay) * int(oneDay)
+    start, end = getDayRange(startDay, endDay)
+    # filter out specific orb events, days outside the cache are taken from the segmented timeline
+    cacheSubSet = ephemeris.getScrollEventsInRange(
+        start, end, orbs=filters, confidenceWindows=showConfidenceWindows
     )
-    if endDay == None:
-        end = currentTime + oneDay if startDay == 0 else start + oneDay
-    else:
-        end = currentTime + int(oneDay) * int(endDay) + oneDay
-    if end >= ephemeris.scrollEventsCache[-1][0]:
-        return ["Out of Range"]
-    cacheSubSet = ephemeris.getScrollEventsInRange(start, end)
-
-    # filter out specific orb events
-    if filters != None and len(filters) != 0:
-        tempCache = []
-        for e in cacheSubSet:
-            for orb in filters:
-                if (
-                    orb in e["newGlows"]
-                    or orb in e["newDarks"]
-                    or orb in e["returnedToNormal"]
-                ):
-                    tempCache.append(e)
-                    break
-        cacheSubSet = tempCache
 
     if len(cacheSubSet) == 0:
         if filters != None and len(filters) != 0:
@@ -115,6 +195,137 @@ def getDayList(
     return eventMsg
 
 
+def getNextEventMsg(ephemeris: Ephemeris, orbs: list[str], phase: str) -> str:
+    """Creates a message describing the next event in which any of the orbs begin to glow,
+    go dark, or return to normal.
+
+    Parameters
+    ---------
+        ephemeris: `Ephemeris`
+            An instance of the Ephemeris class.
+        orbs: `list[str]`
+            The names of the orbs to search for.
+        phase: `str`
+            The change to search for, one of "glow", "dark" or "normal".
+
+    Returns
+    ---------
+        `str`
+            A multi-line string describing the next matching event.
+    """
+    labels = {"glow": "glows", "dark": "goes dark", "normal": "returns to normal"}
+    if len(orbs) >= 3:
+        names = "__" + "__, __".join(orbs[:-1]) + "__, or __" + orbs[-1] + "__"
+    else:
+        names = "__" + "__ or __".join(orbs) + "__"
+    event = ephemeris.findNextEvent(orbs, phase)
+    if event == None:
+        return f"> {names} never {labels[phase]} within the next year."
+    return (
+        f"> **Next time** {names} **{labels[phase]}** <t:{event[0] // 1000}:R>\n"
+        + createScrollEventMsgLine(event[1], useEmojis=False, firstEvent=True)
+    )
+
+
+def getOrbOverlapMsg(
+    ephemeris: Ephemeris,
+    orbs: list[str],
+    phase: str,
+    minOrbs: int,
+    days: int,
+) -> str:
+    """Creates a message listing the times within the next days at which at least minOrbs of the
+    orbs are in the same phase. Only the scroll event cache is searched, when it ends before the
+    requested days the message says when the search stopped.
+
+    Parameters
+    ---------
+        ephemeris: `Ephemeris`
+            An instance of the Ephemeris class.
+        orbs: `list[str]`
+            The names of the orbs to check.
+        phase: `str`
+            The phase the orbs must be in, either "glow" or "dark".
+        minOrbs: `int`
+            The least number of the orbs that must be in the phase at once.
+        days: `int`
+            The number of days from the current time to search.
+
+    Returns
+    ---------
+        `str`
+            A multi-line string with a line for each overlap.
+    """
+    currentTime = round((time.time() * 1000))
+    requestedEnd = currentTime + days * oneDay
+    searchEnd = min(requestedEnd, ephemeris.scrollCacheStop)
+    overlaps = ephemeris.findOrbOverlaps(orbs, phase, minOrbs, currentTime, searchEnd)
+    label = "glowing" if phase == "glow" else "dark"
+    if minOrbs == len(orbs):
+        if len(orbs) == 1:
+            names = f"__{orbs[0]}__"
+        else:
+            names = "__" + "__, __".join(orbs[:-1]) + "__ and __" + orbs[-1] + "__"
+        msg = f"> **Times** {names} **{'is' if len(orbs) == 1 else 'are'} {label}**"
+    else:
+        msg = f"> **Times at least {minOrbs} of** __{'__, __'.join(orbs)}__ **are {label}**"
+    if len(overlaps) == 0:
+        if searchEnd < requestedEnd:
+            return msg + f"\n> **There are none before** <t:{searchEnd // 1000}:f>."
+        return msg + f"\n> **There are none within the next {days} days.**"
+    for start, stop in overlaps.tolist():
+        msg += (
+            f"\n> <t:{start // 1000}:D> <t:{start // 1000}:T> - <t:{stop // 1000}:T>"
+            f" ({formatTime(stop - start)})"
+        )
+    if searchEnd < requestedEnd:
+        msg += f"\n> **Times after** <t:{searchEnd // 1000}:f> **were not searched.**"
+    return msg
+
+
+def getOrbStatusMsg(
+    ephemeris: Ephemeris,
+    useEmojis: bool = False,
+    emojis: dict = None,
+) -> str:
+    """Creates a message describing which orbs are glowing and dark right now and when
+    that will next change.
+
+    Parameters
+    ---------
+        ephemeris: `Ephemeris`
+            An instance of the Ephemeris class.
+        useEmojis: `bool` *optional*
+            When set to true the message will use emojis instead of the text name for orbs. Defaults to False.
+        emojis: `dict[str,str]` *optional*
+            A `dict` with orb names for keys and string containing a discord emoji for its values. Defaults to None.
+
+    Returns
+    ---------
+        `str`
+            A multi-line string describing the current orb states.
+    """
+    currentTime = round((time.time() * 1000))
+    states = ephemeris.getOrbStates(currentTime)
+    msg = f"> **Orb states as of** <t:{currentTime // 1000}:T>"
+    for cat, label in [("glowing", "**glowing.**"), ("dark", "**dark.**")]:
+        orbs = states[cat]
+        if len(orbs) == 0:
+            continue
+        if useEmojis and emojis != None:
+            names = "".join([emojis[orb] for orb in orbs])
+        elif len(orbs) >= 3:
+            names = "__" + "__, __".join(orbs[:-1]) + "__, and __" + orbs[-1] + "__"
+        else:
+            names = "__" + "__ and __".join(orbs) + "__"
+        msg += f"\n> {names} {'is' if len(orbs) == 1 else 'are'} {label}"
+    if len(states["glowing"]) == 0 and len(states["dark"]) == 0:
+        msg += "\n> All orbs are **normal.**"
+    if states["nextChange"] != None:
+        msg += f"\n> Next change <t:{states['nextChange'] // 1000}:R>"
+    return msg
+
+
 def getPhaseList(
     ephemeris: Ephemeris,
     startTime: int = None,
@@ -150,18 +361,11 @@ def getPhaseList(
     """
     start = startTime
     firstLine = ""
+    currentTime = round((time.time() * 1000))
     if start == None:
-        currentTime = round((time.time() * 1000))
         start = currentTime - ephemeris.oneAberothDay
 
-    startIndex = next(
-        (
-            i
-            for i, (timestamp, _) in enumerate(ephemeris.moonCyclesCache)
-            if timestamp > start
-        ),
-        None,
-    )
+    startIndex = ephemeris.getMoonCacheIndex(start)
 
     # filterLabelsToEventName = {
     #     lunarLabels["all"]: "all",
@@ -196,39 +400,32 @@ def getPhaseList(
                     firstLine = f"__**Next {num2words(numDisplayMoonCycles).capitalize()} Aberoth Synodic Months:**__"
             elif "current" in eventFilters:
                 displayingCurrent = True
-                subCache = [copy.deepcopy(ephemeris.moonCyclesCache[startIndex])]
+                timestamp, event = ephemeris.moonCyclesCache[startIndex]
                 # if the phase at the start index is the next phase
-                if subCache[0][0] > currentTime:
+                if timestamp > currentTime:
                     # we already have the next time now we need to get the phase for current phase
-                    subCache[0][1]["phase"] = previousPhases[subCache[0][1]["phase"]]
+                    event = {**event, "phase": previousPhases[event["phase"]]}
                 # check if there is another event in the moonCycle cache to find end of current event
-                elif len(ephemeris.moonCyclesCache[startIndex:]) < 2:
+                elif startIndex + 1 >= len(ephemeris.moonCyclesCache):
                     return ["Range too Small"]
                 # if current phase is a 1 night phase it can appear at the start index of moonCyclesCache
                 # in this case we have the current phase already but not the end time
                 else:
-                    subCache[0][1]["discordTS"] = ephemeris.moonCyclesCache[
-                        startIndex + 1
-                    ][1]["discordTS"]
+                    event = {
+                        **event,
+                        "discordTS": ephemeris.moonCyclesCache[startIndex + 1][1][
+                            "discordTS"
+                        ],
+                    }
+                subCache = [(timestamp, event)]
                 firstLine = "__**Current Phase:**__"
             elif firstEventOnly:
-                subCache = [
-                    next(
-                        (
-                            event
-                            for event in ephemeris.moonCyclesCache[startIndex:]
-                            if event[1]["phase"] in eventFilters
-                        ),
-                        None,
-                    )
-                ]
+                subCache = ephemeris.getMoonPhaseEvents(startIndex, eventFilters, 1)
+                if len(subCache) < 1:
+                    return ["Range too Small"]
                 firstLine = f"__**Next {(subCache[0][1]['phase']).capitalize()} Moon:**__\n*Note: phase may be the current phase.*"
             else:
-                subCache = [
-                    event
-                    for event in ephemeris.moonCyclesCache[startIndex:]
-                    if event[1]["phase"] in eventFilters
-                ]
+                subCache = ephemeris.getMoonPhaseEvents(startIndex, eventFilters)
                 if len(subCache) < numFilterDisplayMoonCycles * len(eventFilters):
                     return ["Range too Small"]
                 else:
@@ -309,6 +506,9 @@ def createScrollEventMsgLine(
     darks = [i for i in event["newDarks"] if i != "Shadow"]
     normals = [i for i in event["returnedToNormal"] if i != "Shadow"]
     msg = f"> {event['discordTS']}"
+    if "earliest" in event and event["latest"] // 1000 > event["earliest"] // 1000:
+        # the range of times the event could happen at given the uncertainty of the orbital parameters
+        msg += f" (between <t:{event['earliest'] // 1000}:T> and <t:{event['latest'] // 1000}:T>)"
     for index, cat in enumerate([glows, darks, normals]):
         tempMsg = ""
         if len(cat) < 1:
@@ -436,7 +636,7 @@ def join_with_oxford_comma(items: list) -> str:
 
 def checkWhiteListed(
     interaction: discord.Interaction,
-    guildSettings: dict,
+    guildSettings: dict | None,
     userSettings: dict,
     whiteListUsersOnly: bool = True,
 ) -> bool:
@@ -446,8 +646,9 @@ def checkWhiteListed(
     ---------
         interaction: `discord.Interaction`
             The interaction that the white list permissions need to be checked for.
-        guildSettings: `dict`
-            The settings for the guild that the interaction ocurred in.
+        guildSettings: `dict | None`
+            The settings for the guild that the interaction ocurred in, None when the interaction
+            isn't in a guild or the guild has no settings.
         userSettings: `dict`
             The settings for the user that triggered the interaction.
         whiteListUsersOnly: `bool` *optional*.
@@ -459,7 +660,7 @@ def checkWhiteListed(
         True if the user and guild pass the white check.
     """
     exp = 0
-    if 0 in interaction._integration_owners:
+    if 0 in interaction._integration_owners and guildSettings:
         exp = guildSettings["expiration"]
     whiteListed = True if exp == -1 else exp > time.time()
     if whiteListUsersOnly:
@@ -478,6 +679,41 @@ def checkWhiteListed(
     return whiteListed
 
 
+async def checkCommandAllowed(interaction: discord.Interaction) -> bool:
+    """Checks if the guild or user of a command interaction is white listed, responding to the
+    interaction with the reason if it isn't. Users without settings have them created.
+
+    Parameters
+    ---------
+        interaction: `discord.Interaction`
+            The command interaction that the white list permissions need to be checked for.
+
+    Returns
+    ---------
+        `bool`
+        True if the command can be completed, the interaction has been responded to otherwise.
+    """
+    guildSettings = (
+        fetch_guild_settings(interaction.guild_id)
+        if 0 in interaction._integration_owners
+        else None
+    )
+    userSettings = fetch_user_settings(interaction.user.id)
+    if not userSettings:
+        userSettings = newUserSettings(interaction.user.id, interaction.user.name)
+        update_user_settings(interaction.user.id, userSettings)
+    whiteListed = checkWhiteListed(
+        interaction, guildSettings, userSettings, whiteListUsersOnly=False
+    )
+    if not whiteListed and not disableWhitelisting:
+        await interaction.response.send_message(
+            content="**Server or user does not have permission to use this command.**\nUse `/permissions` for more information.",
+            ephemeral=True,
+        )
+        return False
+    return True
+
+
 def formatTime(milliseconds: int) -> str:
     """Takes in a length of time in milliseconds and formats it into h:m:s format
 
@@ -1,3 +1,4 @@
+import threading
 from peewee import fn
 from .bot import *
 from .helperFuncs import *
@@ -168,6 +169,153 @@ async def checkPermissions(interaction: discord.Interaction) -> None:
     )
 
 
+@bot.tree.command(
+    name="orb_status",
+    description="Tells the user which orbs are glowing and dark right now",
+)
+@app_commands.allowed_installs(guilds=True, users=True)
+@app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
+async def orbStatus(interaction: discord.Interaction) -> None:
+    """Responds to the interaction with the current glowing and dark orbs"""
+    if not await checkCommandAllowed(interaction):
+        return
+
+    log_usage(
+        interaction=interaction,
+        feature="scroll",
+        action="command",
+        context="orb_status",
+    )
+    await interaction.response.send_message(
+        content=getOrbStatusMsg(ephemeris),
+        ephemeral=True,
+    )
+
+
+# the orbs that can be picked in commands, the shadow orb only ever changes alongside another orb
+orbChoices = [
+    discord.app_commands.Choice(name=orb, value=orb) for orb in Ephemeris.ORB_NAMES[1:]
+]
+
+
+@bot.tree.command(
+    name="next_event",
+    description="Tells the user when an orb will next glow, go dark, or return to normal",
+)
+@app_commands.allowed_installs(guilds=True, users=True)
+@app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
+@app_commands.describe(
+    orb="The orb to search for",
+    phase="The change to search for",
+    orb_2="Another orb to search for, the first event of either orb is found",
+    orb_3="Another orb to search for, the first event of any orb is found",
+)
+@app_commands.choices(
+    orb=orbChoices,
+    orb_2=orbChoices,
+    orb_3=orbChoices,
+    phase=[
+        discord.app_commands.Choice(name="Glow", value="glow"),
+        discord.app_commands.Choice(name="Dark", value="dark"),
+        discord.app_commands.Choice(name="Normal", value="normal"),
+    ],
+)
+async def nextEvent(
+    interaction: discord.Interaction,
+    orb: discord.app_commands.Choice[str],
+    phase: discord.app_commands.Choice[str],
+    orb_2: Optional[discord.app_commands.Choice[str]] = None,
+    orb_3: Optional[discord.app_commands.Choice[str]] = None,
+) -> None:
+    """Responds to the interaction with the next time any of the selected orbs change to the selected phase"""
+    if not await checkCommandAllowed(interaction):
+        return
+
+    orbs = list(dict.fromkeys(o.value for o in (orb, orb_2, orb_3) if o is not None))
+    log_usage(
+        interaction=interaction,
+        feature="scroll",
+        action="command",
+        context="next_event",
+        details=f"{phase.value}:{','.join(orbs)}",
+    )
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    # searches far from the cached events can take a moment, keep the event loop responsive
+    msg = await asyncio.get_running_loop().run_in_executor(
+        None, getNextEventMsg, ephemeris, orbs, phase.value
+    )
+    await interaction.followup.send(content=msg, ephemeral=True)
+
+
+@bot.tree.command(
+    name="combo_search",
+    description="Tells the user when several orbs glow or are dark at the same time",
+)
+@app_commands.allowed_installs(guilds=True, users=True)
+@app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
+@app_commands.describe(
+    phase="The phase the orbs must be in at the same time",
+    orb_1="An orb to check, all orbs are checked when none are picked",
+    orb_2="An orb to check",
+    orb_3="An orb to check",
+    orb_4="An orb to check",
+    min_orbs="The least number of the orbs in the phase at once, defaults to all of them",
+    days=f"The number of days from now to search (1-{cacheEndDay})",
+)
+@app_commands.choices(
+    phase=[
+        discord.app_commands.Choice(name="Glow", value="glow"),
+        discord.app_commands.Choice(name="Dark", value="dark"),
+    ],
+    orb_1=orbChoices,
+    orb_2=orbChoices,
+    orb_3=orbChoices,
+    orb_4=orbChoices,
+)
+async def comboSearch(
+    interaction: discord.Interaction,
+    phase: discord.app_commands.Choice[str],
+    orb_1: Optional[discord.app_commands.Choice[str]] = None,
+    orb_2: Optional[discord.app_commands.Choice[str]] = None,
+    orb_3: Optional[discord.app_commands.Choice[str]] = None,
+    orb_4: Optional[discord.app_commands.Choice[str]] = None,
+    min_orbs: Optional[int] = None,
+    days: Optional[int] = 7,
+) -> None:
+    """Responds to the interaction with the times at which the selected orbs are in the selected phase together"""
+    if not await checkCommandAllowed(interaction):
+        return
+
+    orbs = list(
+        dict.fromkeys(o.value for o in (orb_1, orb_2, orb_3, orb_4) if o is not None)
+    )
+    if len(orbs) == 0:
+        orbs = [choice.value for choice in orbChoices]
+    if min_orbs is None:
+        min_orbs = len(orbs)
+    if not 1 <= min_orbs <= len(orbs):
+        await interaction.response.send_message(
+            content=f"**min_orbs must be between 1 and {len(orbs)}.**",
+            ephemeral=True,
+        )
+        return
+    if days is None:
+        days = 7
+    days = max(1, min(days, cacheEndDay))
+    log_usage(
+        interaction=interaction,
+        feature="scroll",
+        action="command",
+        context="combo_search",
+        details=f"{phase.value}:{min_orbs}:{','.join(orbs)}",
+    )
+    for msg in splitMsg(getOrbOverlapMsg(ephemeris, orbs, phase.value, min_orbs, days)):
+        if interaction.response.is_done():
+            await interaction.followup.send(content=msg, ephemeral=True)
+        else:
+            await interaction.response.send_message(content=msg, ephemeral=True)
+
+
 @bot.tree.command(
     name="set_server_emojis",
     description="Configures the emojis used for ephemerides requested from prediction menus used within this server.",
@@ -563,3 +711,115 @@ async def usageStats(
 @usageStats.error
 async def usageStatsError(interaction: discord.Interaction, error):
     await not_owner_error(interaction, error)
+
+
+class CancelBuildMenu(discord.ui.View):
+    def __init__(self, cancelEvent: threading.Event, timeout=None):
+        super().__init__(timeout=timeout)
+        self.cancelEvent = cancelEvent
+
+    @discord.ui.button(label="Cancel", style=discord.ButtonStyle.red)
+    async def cancelBuild(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ):
+        # the build stops after its current chunk, completed chunks stay checkpointed
+        self.cancelEvent.set()
+        button.disabled = True
+        await interaction.response.edit_message(view=self)
+
+
+@bot.tree.command(
+    name="build_cache",
+    description="Owner-only build of the scroll event cache over a long time range",
+)
+@commands.is_owner()
+@app_commands.check(is_owner)
+@app_commands.default_permissions()
+@app_commands.allowed_installs(guilds=False, users=True)
+@app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
+@app_commands.describe(
+    days_start="Start of the cache in days from now (negative = in the past)",
+    days_end="End of the cache in days from now (> start)",
+)
+async def buildCache(
+    interaction: discord.Interaction,
+    days_start: Optional[int] = cacheStartDay,
+    days_end: Optional[int] = 365,
+) -> None:
+    await interaction.response.defer(ephemeral=True, thinking=True)
+
+    if days_start is None:
+        days_start = cacheStartDay
+    if days_end is None:
+        days_end = 365
+    if days_end <= days_start:
+        await interaction.followup.send(
+            content="The end of the cache must be after its start.",
+            ephemeral=True,
+        )
+        return
+
+    currentTime = int(time.time() * 1000)
+    start = currentTime + days_start * oneDay
+    stop = currentTime + days_end * oneDay
+    cancelEvent = threading.Event()
+    loop = asyncio.get_running_loop()
+    message = await interaction.followup.send(
+        content="Starting the cache build...",
+        view=CancelBuildMenu(cancelEvent),
+        ephemeral=True,
+        wait=True,
+    )
+    lastUpdate = 0.0
+
+    def reportProgress(numCompleted: int, numChunks: int) -> None:
+        # called from the build thread, edits are limited to one every few seconds
+        nonlocal lastUpdate
+        if numCompleted < numChunks and time.time() - lastUpdate < 3:
+            return
+        lastUpdate = time.time()
+        asyncio.run_coroutine_threadsafe(
+            message.edit(
+                content=f"Building the cache: {numCompleted}/{numChunks} chunks "
+                f"({100 * numCompleted // numChunks}%)"
+            ),
+            loop,
+        )
+
+    async with cacheRefreshLock:
+        # the cache is built with the parameters it starts with and published along with them,
+        # interactions keep using the current cache until then
+        snapshot = ephemeris.getSnapshot()
+        events = await loop.run_in_executor(
+            None,
+            snapshot.buildScrollEventRange,
+            start,
+            stop,
+            reportProgress,
+            cancelEvent,
+        )
+        if events is not None:
+            eventWindows = None
+            if showConfidenceWindows:
+                eventWindows = await loop.run_in_executor(
+                    None, snapshot.getEventWindows, events
+                )
+            snapshot.swapScrollCache(events, start, stop, eventWindows=eventWindows)
+            ephemeris.publishState(snapshot.state)
+
+    if events is None:
+        content = (
+            "Cache build cancelled, completed chunks were checkpointed and will be "
+            "reused by the next build."
+        )
+    else:
+        content = (
+            f"Cache built with {len(events)} events from <t:{start // 1000}:f> "
+            f"to <t:{stop // 1000}:f>."
+        )
+    await message.edit(content=content, view=None)
+
+
+@buildCache.error
+async def buildCacheError(interaction: discord.Interaction, error):
+    await not_owner_error(interaction, error)
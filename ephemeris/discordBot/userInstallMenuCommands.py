@@ -63,6 +63,7 @@ async def userInstallScrollMenu(
         value="​\n**`Yesterday:`**\n```Returns all scroll events between now and 24 hours ago.```"
         "\n**`Today:    `**\n```Returns all scroll events between 6 hours ago and 24 hours from now.```"
         "\n**`Tomorrow: `**\n```Returns all scroll events between 24 hours from now to 48 hours from now.```"
+        "\n**`Now:      `**\n```Returns which orbs are glowing and dark right now and when that will next change.```"
         "\n**`Later:    `**\n```Use the drop down menu to select what day from now you'd like the scroll events for."
         " If only one day is selected events for that day will be given```"
         "\n***Note:** Due to automatic calibrations, predictions may improve in accuracy when requested closer to the date that they occur on.*",
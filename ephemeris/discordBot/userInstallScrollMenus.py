@@ -67,6 +67,10 @@ class UserInstallScrollMenu(discord.ui.View):
     ):
         await self.userMenuBtnPress(interaction=interaction, button=button)
 
+    @discord.ui.button(label="Now", style=discord.ButtonStyle.grey)
+    async def now(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.userMenuBtnPress(interaction=interaction, button=button)
+
     async def userMenuBtnPress(
         self, interaction: discord.Interaction, button: discord.ui.Button
     ) -> None:
@@ -98,22 +102,29 @@ class UserInstallScrollMenu(discord.ui.View):
                 "source": "user_install",
             },
         )
+        if button.label == "Now":
+            await interaction.response.send_message(
+                content=getOrbStatusMsg(
+                    ephemeris, useEmojis=self.useEmojis, emojis=self.emojis
+                ),
+                ephemeral=self.ephemeralRes,
+            )
+            return
         startDays = {"Yesterday": -1, "Today": 0, "Tomorrow": 1}
-        dayList = getDayList(
-            ephemeris,
-            startDay=startDays[button.label],
-            filters=self.filterList,
-            useEmojis=self.useEmojis,
-            emojis=self.emojis,
-        )
-        if dayList[0] == "Out of Range":
+        if isDayListCached(ephemeris, startDays[button.label]):
+            dayList = getDayList(
+                ephemeris,
+                startDay=startDays[button.label],
+                filters=self.filterList,
+                useEmojis=self.useEmojis,
+                emojis=self.emojis,
+            )
+        else:
+            # days outside the cache may have to be calculated, so the response is deferred
+            # and the list is created off the event loop
             await interaction.response.defer(ephemeral=False, thinking=True)
             messageDeferred = True
-            ephemeris.updateScrollCache(
-                start=(time.time() * 1000) + cacheStartDay * oneDay,
-                stop=(time.time() * 1000) + cacheEndDay * oneDay,
-            )
-            dayList = getDayList(
+            dayList = await getDayListInExecutor(
                 ephemeris,
                 startDay=startDays[button.label],
                 filters=self.filterList,
@@ -193,22 +204,21 @@ class UserInstallSelDayMenu(discord.ui.Select):
                 "source": "user_install",
             },
         )
-        dayList = getDayList(
-            ephemeris,
-            startDay=start,
-            endDay=end,
-            filters=self.filterList,
-            useEmojis=self.useEmojis,
-            emojis=self.emojis,
-        )
-        if dayList[0] == "Out of Range":
+        if isDayListCached(ephemeris, start, end):
+            dayList = getDayList(
+                ephemeris,
+                startDay=start,
+                endDay=end,
+                filters=self.filterList,
+                useEmojis=self.useEmojis,
+                emojis=self.emojis,
+            )
+        else:
+            # days outside the cache may have to be calculated, so the response is deferred
+            # and the list is created off the event loop
             await interaction.response.defer(ephemeral=False, thinking=True)
             messageDeferred = True
-            ephemeris.updateScrollCache(
-                start=(time.time() * 1000) + cacheStartDay * oneDay,
-                stop=(time.time() * 1000) + cacheEndDay * oneDay,
-            )
-            dayList = getDayList(
+            dayList = await getDayListInExecutor(
                 ephemeris,
                 startDay=start,
                 endDay=end,